@@ -10,6 +10,7 @@ from .routers import (
     files_router,
     seo_router,
     currency_router,
+    metrics_router,
 )
 
 router = APIRouter(prefix="/api/v1")
@@ -23,3 +24,4 @@ router.include_router(expense_router)
 router.include_router(categories_router)
 router.include_router(seo_router)
 router.include_router(currency_router)
+router.include_router(metrics_router)
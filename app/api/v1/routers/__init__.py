@@ -7,6 +7,7 @@ from .categories import router as categories_router
 from .files import router as files_router
 from .seo import router as seo_router
 from .currency import router as currency_router
+from .metrics import router as metrics_router
 
 __all__ = [
     "user_router",
@@ -18,4 +19,5 @@ __all__ = [
     "files_router",
     "seo_router",
     "currency_router",
+    "metrics_router",
 ]
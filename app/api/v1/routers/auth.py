@@ -4,6 +4,7 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import get_db
+from app.schemas.dataclasses.user import UserPrincipalDTO
 from app.schemas.token import TokenOut
 from app.schemas.user import UserCreate, UserOut
 from app.service.auth.dependencies import get_current_user
@@ -71,7 +72,7 @@ async def refresh_token(
 @router.post("/logout", summary="Выход из системы (удаляет сессию)")
 async def logout_user(
     refresh_token: Annotated[str, Body(..., embed=True)],
-    current_user: Annotated[UserOut, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
 ):
     """
     Принимает refresh токен и удаляет соответствующую сессию из Memcached.
@@ -4,7 +4,6 @@ from fastapi import APIRouter, Depends, Body, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from app.db import User
 from app.db.database import get_db
 from app.schemas.category import (
     CreateCategory,
@@ -13,6 +12,7 @@ from app.schemas.category import (
     CategoryUpdate,
 )
 from app.schemas.dataclasses.category import CategoryDTO
+from app.schemas.dataclasses.user import UserPrincipalDTO
 from app.service.auth.dependencies import get_current_user
 from app.service.category.service import CategoryService
 
@@ -29,7 +29,7 @@ category_service = CategoryService()
 async def create_category(
     db: Annotated[AsyncSession, Depends(get_db)],
     category: Annotated[CreateCategory, Body(...)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
 ):
     """Создание категории"""
     new_category = await category_service.create_category(db, category, current_user)
@@ -43,7 +43,7 @@ async def create_category(
 )
 async def get_categories(
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
     skip: int = Query(0, ge=0),
     limit: int = Query(10, le=100),
 ):
@@ -68,7 +68,7 @@ async def get_categories(
 async def get_category_by_id(
     category_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
 ):
     """Получаем категорию юзера по id"""
 
@@ -87,7 +87,7 @@ async def update_category(
     db: Annotated[AsyncSession, Depends(get_db)],
     category_id: int,
     category: CategoryUpdate,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
 ):
     updated_category = await category_service.update_category(
         db, category_id, category, current_user
@@ -103,7 +103,7 @@ async def update_category(
 async def delete_category(
     db: Annotated[AsyncSession, Depends(get_db)],
     category_id: int,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
 ):
     """Удаляет категорию пользователя по id"""
     await category_service.delete_category(db, category_id, current_user)
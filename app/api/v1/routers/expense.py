@@ -1,6 +1,6 @@
+from dataclasses import asdict
 from datetime import datetime, timedelta
-from typing import Annotated
-import re
+from typing import Annotated, List
 from fastapi import (
     APIRouter,
     Depends,
@@ -12,17 +12,31 @@ from fastapi import (
     Form,
     HTTPException,
 )
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.s3.service import upload_file, generate_download_url
-from app.db import User
+from app.core.pagination import next_cursor
+from app.core.s3.service import upload_file, get_download_url
 from app.db.database import get_db
+from app.schemas.currency import Currency
+from app.schemas.dataclasses.user import UserPrincipalDTO
 from app.schemas.expense import ExpenseCreate, ExpenseUpdate, ExpenseOut, ExpenseGet
+from app.schemas.files import ImageUrlsOut
+from app.schemas.imports import ImportResultOut
 from app.service.auth.dependencies import get_current_user
+from app.service.budget.service import BudgetService
 from app.service.expense.service import ExpenseService
+from app.service.exports.service import ExportService, ExportFormat, MEDIA_TYPES
+from app.service.imports.service import ImportService
+from app.service.stats import buckets
 
 router = APIRouter(prefix="/spending", tags=["Spending"])
 expense_service = ExpenseService()
+import_service = ImportService()
+export_service = ExportService()
+budget_service = BudgetService()
+
+MAX_IMAGE_BATCH = 100  # id на один запрос ссылок
 
 
 @router.post(
@@ -33,11 +47,12 @@ expense_service = ExpenseService()
 )
 async def create_spending(
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
     expense_date: datetime = Form(...),
     category_id: int = Form(...),
     cost: float = Form(...),
     comment: str | None = Form(None),
+    currency: Currency = Form(Currency.RUB),
     image: UploadFile | None = File(None),
 ):
     """Создать новую запись расхода."""
@@ -51,13 +66,37 @@ async def create_spending(
         category_id=category_id,
         cost=cost,
         comment=comment,
+        currency=currency,
     )
 
     new_expense = await expense_service.create_expense(
-        db, spending, current_user.id, image_key
+        db, spending, current_user.id, image_key, current_user.timezone
+    )
+    # день бюджета — локальный день траты, как и ключ rollup
+    budget = await budget_service.get_day_budget(
+        db,
+        current_user,
+        buckets.local_day(new_expense.expense_date, current_user.timezone),
     )
 
-    return new_expense
+    return {**asdict(new_expense), "budget": budget}
+
+
+@router.post(
+    "/import",
+    summary="Массовый импорт трат из CSV/XLSX",
+    response_model=ImportResultOut,
+)
+async def import_spendings(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
+    file: UploadFile = File(...),
+):
+    """Импорт трат: колонки date, category_id, amount, comment. Ошибки — по строкам."""
+
+    return await import_service.import_expenses(
+        db, file, current_user.id, current_user.timezone
+    )
 
 
 @router.get(
@@ -67,7 +106,7 @@ async def create_spending(
 )
 async def get_all_user_spendings(
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
     # базовый фильтр
     from_date: datetime = Query(
         default_factory=lambda: datetime.now() - timedelta(days=1)
@@ -81,9 +120,11 @@ async def get_all_user_spendings(
     # сортировка
     sort_by: str = Query("expense_date", regex="^(expense_date|value)$"),
     sort_order: str = Query("desc", regex="^(asc|desc)$"),
-    # пагинация
+    # пагинация: skip/limit или курсор из next_cursor предыдущей страницы
     skip: int = Query(0, ge=0),
     limit: int = Query(10, le=100),
+    cursor: str | None = Query(None),
+    include_total: bool = Query(True),
 ):
     expenses, total = await expense_service.get_expenses(
         db=db,
@@ -98,6 +139,9 @@ async def get_all_user_spendings(
         search=search,
         sort_by=sort_by,
         sort_order=sort_order,
+        cursor=cursor,
+        with_total=include_total,
+        base_currency=current_user.base_currency,
     )
 
     return {
@@ -105,11 +149,53 @@ async def get_all_user_spendings(
             "expenses": expenses,
             "skip": skip,
             "limit": limit,
+            "next_cursor": next_cursor(expenses, sort_by, limit),
         },
         "total": total,
     }
 
 
+@router.get(
+    "/export",
+    summary="Потоковая выгрузка трат в CSV/NDJSON",
+    response_class=StreamingResponse,
+)
+async def export_spendings(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
+    from_date: datetime = Query(datetime.min),
+    to_date: datetime = Query(default_factory=datetime.now),
+    format: ExportFormat = Query(ExportFormat.csv),
+):
+    """Выгрузка без загрузки всей истории в память: строки кодируются по мере чтения."""
+
+    stream = export_service.export_expenses(
+        db, current_user.id, from_date, to_date, format
+    )
+    filename = f"spending.{format.value}"
+    return StreamingResponse(
+        stream,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get(
+    "/images",
+    summary="Ссылки на картинки пачки трат",
+    response_model=ImageUrlsOut,
+)
+async def get_spending_images(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
+    ids: List[int] = Query(..., max_length=MAX_IMAGE_BATCH),
+):
+    """Ссылки для всей страницы списка за один запрос вместо запроса на каждую трату."""
+
+    urls = await expense_service.get_image_urls(db, ids, current_user.id)
+    return {"urls": urls}
+
+
 # --- READ (one) ---
 @router.get(
     "/{spending_id}",
@@ -118,7 +204,7 @@ async def get_all_user_spendings(
 )
 async def get_spending_by_id(
     spending_id: int,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     """Получить одну трату по ID."""
@@ -136,7 +222,7 @@ async def update_spending(
     spending_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
     spending_update: Annotated[ExpenseUpdate, Body(...)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
 ):
     """Обновить трату по ID."""
     updated_expense = await expense_service.update_expense(
@@ -144,6 +230,7 @@ async def update_spending(
         spending_id,
         spending_update,
         current_user.id,
+        current_user.timezone,
     )
     return updated_expense
 
@@ -158,11 +245,11 @@ async def update_spending(
 async def delete_spending(
     spending_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
 ):
     """Удалить трату по ID."""
     deleted_expense = await expense_service.delete_expense(
-        db, spending_id, current_user.id
+        db, spending_id, current_user.id, current_user.timezone
     )
 
     return deleted_expense
@@ -172,14 +259,11 @@ async def delete_spending(
 async def get_income_image(
     spending_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
 ):
     expense = await expense_service.get_expense_by_id(db, spending_id, current_user.id)
 
     if not expense.image_key:
         raise HTTPException(404, "No image")
 
-    url = generate_download_url(expense.image_key)
-
-    external_url = re.sub(r"^https?://minio:\d+", "http://localhost:9000", url)
-    return external_url
+    return await get_download_url(expense.image_key)
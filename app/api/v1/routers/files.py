@@ -1,28 +1,23 @@
 import uuid
-import boto3
-from botocore.exceptions import ClientError
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
-from sqlalchemy import Transaction
-from sqlalchemy.orm import Session
-
-from app.core.settings import settings
-from app.db import User
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.s3.service import (
+    PRESIGN_EXPIRES_SECONDS,
+    delete_file as delete_object,
+    get_download_url as presign_download_url,
+    upload_stream,
+)
+from app.db import Expense
 from app.db.database import get_db
 from app.db.models import AttachedFile
+from app.schemas.dataclasses.user import UserPrincipalDTO
 from app.schemas.files import AttachedFileOut
 from app.service.auth.dependencies import get_current_user
 
 router = APIRouter(prefix="/files", tags=["files"])
 
-# ─── S3 клиент (boto3 работает с MinIO через endpoint_url) ────────────────────
-s3 = boto3.client(
-    "s3",
-    endpoint_url=settings.S3_ENDPOINT_URL,  # "http://minio:9000" для MinIO
-    aws_access_key_id=settings.S3_ACCESS_KEY,
-    aws_secret_access_key=settings.S3_SECRET_KEY,
-    region_name=settings.S3_REGION,
-)
-
 # ─── Ограничения ─────────────────────────────────────────────────────────────
 ALLOWED_CONTENT_TYPES = {
     "image/jpeg",
@@ -46,25 +41,16 @@ def _s3_key(user_id: int, filename: str) -> str:
     "/upload",
     response_model=AttachedFileOut,
     status_code=status.HTTP_201_CREATED,
-    summary="Загрузить файл и привязать к транзакции",
+    summary="Загрузить файл и привязать к трате",
 )
 async def upload_file(
     transaction_id: int = Form(...),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipalDTO = Depends(get_current_user),
 ):
     # 1. Проверка владения транзакцией
-    tx = (
-        db.query(Transaction)
-        .filter(
-            Transaction.id == transaction_id,
-            Transaction.user_id == current_user.id,
-        )
-        .first()
-    )
-    if not tx:
-        raise HTTPException(status_code=404, detail="Transaction not found")
+    await _check_own_expense(db, transaction_id, current_user.id)
 
     # 2. Валидация типа файла
     if file.content_type not in ALLOWED_CONTENT_TYPES:
@@ -76,28 +62,17 @@ async def upload_file(
             ),
         )
 
-    # 3. Читаем и проверяем размер
-    contents = await file.read()
-    if len(contents) > MAX_FILE_SIZE_BYTES:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"Файл слишком большой. Максимум: {MAX_FILE_SIZE_BYTES // (1024 * 1024)} MB",
-        )
-
-    # 4. Загружаем в S3/MinIO
+    # 3. Стримим в S3/MinIO частями; размер проверяется по мере чтения
     key = _s3_key(current_user.id, file.filename)
     try:
-        s3.put_object(
-            Bucket=settings.S3_BUCKET,
-            Key=key,
-            Body=contents,
-            ContentType=file.content_type,
-        )
-    except ClientError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=f"Ошибка хранилища: {exc.response['Error']['Message']}",
-        )
+        stored = await upload_stream(file, key, file.content_type, MAX_FILE_SIZE_BYTES)
+    except HTTPException as exc:
+        if exc.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Файл слишком большой. Максимум: {MAX_FILE_SIZE_BYTES // (1024 * 1024)} MB",
+            )
+        raise
 
     # 5. Сохраняем метаданные в БД
     attached = AttachedFile(
@@ -106,11 +81,11 @@ async def upload_file(
         original_name=file.filename,
         s3_key=key,
         content_type=file.content_type,
-        size_bytes=len(contents),
+        size_bytes=stored.size,
     )
     db.add(attached)
-    db.commit()
-    db.refresh(attached)
+    await db.flush()
+    await db.refresh(attached)
     return attached
 
 
@@ -118,33 +93,23 @@ async def upload_file(
 @router.get(
     "/transaction/{transaction_id}",
     response_model=list[AttachedFileOut],
-    summary="Список файлов транзакции",
+    summary="Список файлов траты",
 )
-def list_files(
+async def list_files(
     transaction_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipalDTO = Depends(get_current_user),
 ):
     # Проверяем право доступа
-    tx = (
-        db.query(Transaction)
-        .filter(
-            Transaction.id == transaction_id,
-            Transaction.user_id == current_user.id,
-        )
-        .first()
-    )
-    if not tx:
-        raise HTTPException(status_code=404, detail="Transaction not found")
+    await _check_own_expense(db, transaction_id, current_user.id)
 
-    return (
-        db.query(AttachedFile)
-        .filter(
+    files = await db.scalars(
+        select(AttachedFile).where(
             AttachedFile.transaction_id == transaction_id,
             AttachedFile.user_id == current_user.id,
         )
-        .all()
     )
+    return files.all()
 
 
 # ─── GET /files/{id}/download-url ────────────────────────────────────────────
@@ -152,30 +117,20 @@ def list_files(
     "/{file_id}/download-url",
     summary="Pre-signed URL для скачивания (15 мин)",
 )
-def get_download_url(
+async def get_download_url(
     file_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipalDTO = Depends(get_current_user),
 ):
-    file = _get_own_file(db, file_id, current_user.id)
+    file = await _get_own_file(db, file_id, current_user.id)
 
-    try:
-        url = s3.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": settings.S3_BUCKET, "Key": file.s3_key},
-            ExpiresIn=900,  # 15 минут
-        )
-    except ClientError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=f"Не удалось создать ссылку: {exc.response['Error']['Message']}",
-        )
+    url = await presign_download_url(file.s3_key)
 
     return {
         "url": url,
         "filename": file.original_name,
         "content_type": file.content_type,
-        "expires_in": 900,
+        "expires_in": PRESIGN_EXPIRES_SECONDS,
     }
 
 
@@ -185,33 +140,37 @@ def get_download_url(
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Удалить файл из S3 и очистить метаданные",
 )
-def delete_file(
+async def delete_file(
     file_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipalDTO = Depends(get_current_user),
 ):
-    file = _get_own_file(db, file_id, current_user.id)
+    file = await _get_own_file(db, file_id, current_user.id)
 
     # Удаляем из S3 (не блокируем если S3 недоступен)
-    try:
-        s3.delete_object(Bucket=settings.S3_BUCKET, Key=file.s3_key)
-    except ClientError:
-        pass  # в production — логировать
+    await delete_object(file.s3_key)
 
     # Удаляем метаданные из БД
-    db.delete(file)
-    db.commit()
+    await db.delete(file)
 
 
 # ─── helper ──────────────────────────────────────────────────────────────────
-def _get_own_file(db: Session, file_id: int, user_id: int) -> AttachedFile:
-    f = (
-        db.query(AttachedFile)
-        .filter(
+async def _check_own_expense(db: AsyncSession, expense_id: int, user_id: int) -> None:
+    """Файлы привязываются к тратам (transaction_id — id траты пользователя)"""
+
+    owned = await db.scalar(
+        select(Expense.id).where(Expense.id == expense_id, Expense.user_id == user_id)
+    )
+    if owned is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+
+
+async def _get_own_file(db: AsyncSession, file_id: int, user_id: int) -> AttachedFile:
+    f = await db.scalar(
+        select(AttachedFile).where(
             AttachedFile.id == file_id,
             AttachedFile.user_id == user_id,
         )
-        .first()
     )
     if not f:
         raise HTTPException(status_code=404, detail="File not found")
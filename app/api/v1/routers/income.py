@@ -1,18 +1,28 @@
-import re
 from datetime import datetime, timedelta
-from typing import Annotated
+from typing import Annotated, List
 from fastapi import APIRouter, Depends, Body, Query, status, UploadFile, File, Form, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.s3.service import upload_file, generate_download_url
-from app.db import User
+from app.core.pagination import next_cursor
+from app.core.s3.service import upload_file, get_download_url
 from app.db.database import get_db
+from app.schemas.currency import Currency
+from app.schemas.dataclasses.user import UserPrincipalDTO
+from app.schemas.files import ImageUrlsOut
+from app.schemas.imports import ImportResultOut
 from app.schemas.income import IncomeCreate, IncomeUpdate, IncomeOut, Income
 from app.service.auth.dependencies import get_current_user
+from app.service.exports.service import ExportService, ExportFormat, MEDIA_TYPES
+from app.service.imports.service import ImportService
 from app.service.income.service import IncomeService
 
 router = APIRouter(prefix="/income", tags=["Income"])
 income_service = IncomeService()
+import_service = ImportService()
+export_service = ExportService()
+
+MAX_IMAGE_BATCH = 100  # id на один запрос ссылок
 
 
 @router.post(
@@ -24,11 +34,12 @@ income_service = IncomeService()
 async def create_income(
     db: Annotated[AsyncSession, Depends(get_db)],
     # income: Annotated[IncomeCreate, Body(...)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
     income_date: datetime = Form(...),
     category_id: int = Form(...),
     value: float = Form(...),
     comment: str | None = Form(None),
+    currency: Currency = Form(Currency.RUB),
     image: UploadFile | None = File(None),
 ):
     """Создать новую запись дохода."""
@@ -42,12 +53,28 @@ async def create_income(
         category_id=category_id,
         value=value,
         comment=comment,
+        currency=currency,
     )
     new_income = await income_service.create_income(db, current_user, income, image_key)
 
     return new_income
 
 
+@router.post(
+    "/import",
+    summary="Массовый импорт доходов из CSV/XLSX",
+    response_model=ImportResultOut,
+)
+async def import_incomes(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
+    file: UploadFile = File(...),
+):
+    """Импорт доходов: колонки date, category_id, amount, comment. Ошибки — по строкам."""
+
+    return await import_service.import_incomes(db, file, current_user.id)
+
+
 @router.get(
     "",
     summary="Получаем доходы за период (с фильтрацией, сортировкой, пагинацией)",
@@ -55,7 +82,7 @@ async def create_income(
 )
 async def get_incomes_by_period(
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
     from_date: datetime = Query(
         default_factory=lambda: datetime.now() - timedelta(days=1)
     ),
@@ -68,9 +95,11 @@ async def get_incomes_by_period(
     # сортировка
     sort_by: str = Query("income_date", regex="^(income_date|value)$"),
     sort_order: str = Query("desc", regex="^(asc|desc)$"),
-    # пагинация
+    # пагинация: skip/limit или курсор из next_cursor предыдущей страницы
     skip: int = Query(0, ge=0),
     limit: int = Query(10, le=100),
+    cursor: str | None = Query(None),
+    include_total: bool = Query(True),
 ):
     incomes, total = await income_service.get_incomes_by_period(
         db=db,
@@ -85,6 +114,8 @@ async def get_incomes_by_period(
         search=search,
         sort_by=sort_by,
         sort_order=sort_order,
+        cursor=cursor,
+        with_total=include_total,
     )
 
     return {
@@ -92,11 +123,53 @@ async def get_incomes_by_period(
             "incomes": incomes,
             "skip": skip,
             "limit": limit,
+            "next_cursor": next_cursor(incomes, sort_by, limit),
         },
         "total": total,
     }
 
 
+@router.get(
+    "/export",
+    summary="Потоковая выгрузка доходов в CSV/NDJSON",
+    response_class=StreamingResponse,
+)
+async def export_incomes(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
+    from_date: datetime = Query(datetime.min),
+    to_date: datetime = Query(default_factory=datetime.now),
+    format: ExportFormat = Query(ExportFormat.csv),
+):
+    """Выгрузка без загрузки всей истории в память: строки кодируются по мере чтения."""
+
+    stream = export_service.export_incomes(
+        db, current_user.id, from_date, to_date, format
+    )
+    filename = f"income.{format.value}"
+    return StreamingResponse(
+        stream,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get(
+    "/images",
+    summary="Ссылки на картинки пачки доходов",
+    response_model=ImageUrlsOut,
+)
+async def get_income_images(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
+    ids: List[int] = Query(..., max_length=MAX_IMAGE_BATCH),
+):
+    """Ссылки для всей страницы списка за один запрос вместо запроса на каждый доход."""
+
+    urls = await income_service.get_image_urls(db, ids, current_user)
+    return {"urls": urls}
+
+
 @router.get(
     "/{income_id}",
     summary="Получаем доход по его id",
@@ -105,7 +178,7 @@ async def get_incomes_by_period(
 async def get_income_by_id(
     income_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
 ):
     """Получить запись дохода по ID."""
 
@@ -120,7 +193,7 @@ async def get_income_by_id(
 )
 async def update_income(
     income_id: int,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
     income_update: Annotated[IncomeUpdate, Body(...)],
 ):
@@ -138,7 +211,7 @@ async def update_income(
 )
 async def delete_income(
     income_id: int,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     """Удалить запись дохода."""
@@ -149,14 +222,11 @@ async def delete_income(
 async def get_income_image(
     income_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
 ):
     income = await income_service.get_income_by_id(db, income_id, current_user)
 
     if not income.image_key:
         raise HTTPException(404, "No image")
 
-    url = generate_download_url(income.image_key)
-
-    external_url = re.sub(r"^https?://minio:\d+", "http://localhost:9000", url)
-    return external_url
+    return await get_download_url(income.image_key)
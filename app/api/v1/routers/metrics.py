@@ -0,0 +1,22 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+
+from app.db.database import async_engine
+from app.db.pool import pool_snapshot
+from app.schemas.dataclasses.user import UserPrincipalDTO
+from app.service.auth.dependencies import get_admin_user
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get(
+    "/db-pool",
+    summary="Состояние пула соединений к БД",
+)
+async def get_db_pool_metrics(
+    admin_user: Annotated[UserPrincipalDTO, Depends(get_admin_user)],
+):
+    """Занятые соединения, overflow и время ожидания соединения из пула."""
+
+    return pool_snapshot(async_engine)
@@ -1,11 +1,17 @@
-from typing import Annotated
+from typing import Annotated, List
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import User
 from app.db.database import get_db
-from app.schemas.dataclasses.stats import CategoryExpenseStatDTO
-from app.schemas.stats import Period, CategoriesStatOut
+from app.schemas.dataclasses.user import UserPrincipalDTO
+from app.schemas.dataclasses.stats import (
+    BalanceBucketDTO,
+    CashflowBucketDTO,
+    CategoryExpenseStatDTO,
+    IncomeDynamicDTO,
+    MonthlyTotalDTO,
+)
+from app.schemas.stats import Period, PeriodEnum, CategoriesStatOut
 from app.service.auth.dependencies import get_current_user
 from app.service.stats.service import StatsService
 
@@ -15,17 +21,21 @@ stats_service = StatsService()
 
 @router.get(
     "/expenses",
-    summary="Получаем статистику трату по 10 самым крупным категориями",
+    summary="Получаем статистику трат по самым крупным категориям",
     response_model=CategoriesStatOut,
 )
 async def get_expense_stats(
     db: Annotated[AsyncSession, Depends(get_db)],
-    period: Annotated[Period, Query(..., description="Период today/week/month/year")],
-    current_user: Annotated[User, Depends(get_current_user)],
+    period: Annotated[
+        PeriodEnum, Query(..., description="Период today/week/month/year")
+    ],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
+    top: int = Query(10, ge=1, le=50, description="Сколько категорий вернуть"),
+    compare: bool = Query(False, description="Сравнить с предыдущим периодом"),
 ):
     """Получить статистику расходов по категориям за период."""
     result: CategoryExpenseStatDTO = await stats_service.get_category_expenses_stats(
-        db, period, current_user
+        db, Period(period=period), current_user, top_n=top, compare=compare
     )
     return result
 
@@ -36,10 +46,80 @@ async def get_expense_stats(
 )
 async def get_balance(
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
     period: Annotated[Period, Query(..., description="Период today/week/month/year")],
 ):
     """Получаем статистику по расходам в единицу времени(час/день/день/месяц)"""
 
     dynamic_stat = await stats_service.get_dynamic_stats(db, period, current_user)
     return dynamic_stat
+
+
+@router.get(
+    "/income",
+    summary="Возвращает динамику доходов",
+    response_model=List[IncomeDynamicDTO],
+)
+async def get_income_stats(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
+    period: Annotated[
+        PeriodEnum, Query(..., description="Период today/week/month/year")
+    ],
+):
+    """Доходы в единицу времени (час/день) за период."""
+
+    return await stats_service.get_income_stats(db, Period(period=period), current_user)
+
+
+@router.get(
+    "/cashflow",
+    summary="Доходы, траты и чистый поток по бакетам",
+    response_model=List[CashflowBucketDTO],
+)
+async def get_cashflow_stats(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
+    period: Annotated[
+        PeriodEnum, Query(..., description="Период today/week/month/year")
+    ],
+):
+    """Доходы, траты и их разница в единицу времени (час/день) одним запросом."""
+
+    return await stats_service.get_cashflow_stats(
+        db, Period(period=period), current_user
+    )
+
+
+@router.get(
+    "/balance",
+    summary="Баланс на конец каждого бакета",
+    response_model=List[BalanceBucketDTO],
+)
+async def get_balance_stats(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
+    period: Annotated[
+        PeriodEnum, Query(..., description="Период today/week/month/year")
+    ],
+):
+    """Нарастающий баланс (все доходы минус все траты) по бакетам периода."""
+
+    return await stats_service.get_balance_stats(
+        db, Period(period=period), current_user
+    )
+
+
+@router.get(
+    "/monthly",
+    summary="Доходы и траты по месяцам",
+    response_model=List[MonthlyTotalDTO],
+)
+async def get_monthly_stats(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
+    months: int = Query(12, ge=1, le=120, description="Сколько последних месяцев"),
+):
+    """Ряд по месяцам для сравнения год к году и многолетних графиков."""
+
+    return await stats_service.get_monthly_stats(db, current_user, months)
@@ -1,14 +1,18 @@
+from datetime import date
 from typing import Annotated, List
 from fastapi import APIRouter, Depends, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import User
 from app.db.database import get_db
-from app.schemas.user import UserOut, NewUserRole
+from app.schemas.budget import DayBudgetOut
+from app.schemas.dataclasses.user import UserPrincipalDTO
+from app.schemas.user import UserOut, NewUserCurrency, NewUserRole, NewUserTimezone
 from app.service.auth.dependencies import get_current_user, get_admin_user, get_user
+from app.service.budget.service import BudgetService
 from app.service.user.service import UserService
 
 router = APIRouter(prefix="/users", tags=["Users"])
+budget_service = BudgetService()
 
 
 @router.get(
@@ -17,27 +21,49 @@ router = APIRouter(prefix="/users", tags=["Users"])
     response_model=UserOut,
 )
 async def get_current_user_profile(
-    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
 ):
     """Получить профиль текущего пользователя."""
 
+    # principal из кеша не содержит username/email — профиль читаем из БД
+    user_service = UserService(session=session)
+    user = await user_service.get_user(current_user.id)
+
     user_out = UserOut(
-        id=current_user.id,
-        email=current_user.email,
-        username=current_user.username,
-        day_expense_limit=current_user.day_expense_limit,
-        role=current_user.role,
+        id=user.id,
+        email=user.email,
+        username=user.username,
+        day_expense_limit=user.day_expense_limit,
+        role=user.role,
+        timezone=user.timezone,
+        base_currency=user.base_currency,
     )
     return user_out
 
 
+@router.get(
+    "/me/budget",
+    summary="Дневной лимит трат: потрачено и остаток",
+    response_model=DayBudgetOut,
+)
+async def get_current_user_budget(
+    session: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_current_user)],
+    day: date | None = Query(None, description="День, по умолчанию сегодня"),
+):
+    """Остаток дневного лимита: один запрос к rollup, лимит берётся из principal."""
+
+    return await budget_service.get_day_budget(session, current_user, day)
+
+
 @router.patch(
     "/change_limit", response_model=UserOut, summary="Изменяет лимит трат пользователя"
 )
 async def change_limit(
     session: Annotated[AsyncSession, Depends(get_db)],
     new_limit: float,
-    current_user: Annotated[User, Depends(get_user)],
+    current_user: Annotated[UserPrincipalDTO, Depends(get_user)],
 ):
     user_service = UserService(session=session)
 
@@ -45,13 +71,47 @@ async def change_limit(
     return changed_user
 
 
+@router.patch(
+    "/change_timezone",
+    response_model=UserOut,
+    summary="Изменяет часовой пояс пользователя",
+)
+async def change_timezone(
+    session: Annotated[AsyncSession, Depends(get_db)],
+    new_timezone: NewUserTimezone,
+    current_user: Annotated[UserPrincipalDTO, Depends(get_user)],
+):
+    user_service = UserService(session=session)
+
+    return await user_service.change_user_timezone(
+        current_user.id, new_timezone.timezone
+    )
+
+
+@router.patch(
+    "/change_base_currency",
+    response_model=UserOut,
+    summary="Изменяет базовую валюту пользователя",
+)
+async def change_base_currency(
+    session: Annotated[AsyncSession, Depends(get_db)],
+    new_currency: NewUserCurrency,
+    current_user: Annotated[UserPrincipalDTO, Depends(get_user)],
+):
+    user_service = UserService(session=session)
+
+    return await user_service.change_user_base_currency(
+        current_user.id, new_currency.base_currency
+    )
+
+
 @router.patch(
     "/admin/{user_id}",
     summary="Изменяет роль пользователя на переданную",
     status_code=status.HTTP_204_NO_CONTENT,
 )
 async def change_user(
-    current_admin: Annotated[User, Depends(get_admin_user)],
+    current_admin: Annotated[UserPrincipalDTO, Depends(get_admin_user)],
     user_id: int,
     new_user_role: NewUserRole,
     session: Annotated[AsyncSession, Depends(get_db)],
@@ -68,7 +128,7 @@ async def change_user(
     response_model=List[UserOut],
 )
 async def get_all_users(
-    admin_user: Annotated[User, Depends(get_admin_user)],
+    admin_user: Annotated[UserPrincipalDTO, Depends(get_admin_user)],
     session: Annotated[AsyncSession, Depends(get_db)],
     skip: int = Query(0, ge=0),
     limit: int = Query(10, le=100),
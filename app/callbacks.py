@@ -4,20 +4,44 @@ from inspect import iscoroutinefunction
 
 from fastapi import FastAPI
 
+from app.core.security import password_hasher
+from app.service.currency.callbacks import (
+    shutdown_callbacks as currency_shutdown_callbacks,
+    startup_callbacks as currency_startup_callbacks,
+)
+from app.service.summary.callbacks import startup_callbacks as summary_startup_callbacks
 from app.service.user.callbacks import startup_callbacks as user_startup_callbacks
 
-
 startup_callbacks = list()
 startup_callbacks.extend(user_startup_callbacks)
+startup_callbacks.extend(summary_startup_callbacks)
+startup_callbacks.extend(currency_startup_callbacks)
+
+shutdown_callbacks = list()
+shutdown_callbacks.extend(currency_shutdown_callbacks)
+shutdown_callbacks.append(password_hasher.shutdown)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
 
+    # ссылки на задачи держим сами: event loop хранит только слабые,
+    # а долгоживущие воркеры нужно остановить при завершении
+    tasks = set()
     for startup_callback in startup_callbacks:
         if not iscoroutinefunction(startup_callback):
             startup_callback()
         else:
-            asyncio.create_task(startup_callback())
+            tasks.add(asyncio.create_task(startup_callback()))
 
     yield
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    for shutdown_callback in shutdown_callbacks:
+        if not iscoroutinefunction(shutdown_callback):
+            shutdown_callback()
+        else:
+            await shutdown_callback()
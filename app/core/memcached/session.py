@@ -60,11 +60,15 @@ class AsyncMemcached:
         except aiomcache.exceptions.ClientException:
             return False
 
-    async def incr(self, key: str | bytes, delta: int = 1) -> int:
+    async def incr(self, key: str | bytes, delta: int = 1) -> int | None:
         """
         INCR: атомарно увеличивает счётчик.
+        None — если ключа нет (memcached не создаёт его сам).
         """
-        return await self._client.incr(_to_bytes(key), delta)
+        try:
+            return await self._client.incr(_to_bytes(key), delta)
+        except aiomcache.exceptions.ClientException:
+            return None
 
 
 memcached_session = AsyncMemcached(
@@ -0,0 +1,226 @@
+"""
+Метрики HTTP в формате Prometheus без внешних зависимостей.
+
+Чистый ASGI-middleware: на запрос — perf_counter, bisect по бакетам и
+инкремент пары счётчиков в event loop, без блокировок и аллокаций строк.
+Метка route — шаблон пути из scope["route"] (``/api/v1/spending/{spending_id}``),
+а не сырой URL, чтобы число рядов не росло с количеством id.
+"""
+
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.routing import BaseRoute
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.query_stats import track_queries
+
+try:
+    from fastapi.routing import iter_route_contexts
+except ImportError:  # старые FastAPI сами разворачивают префиксы в route.path
+    iter_route_contexts = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = "<unmatched>"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Кумулятивная гистограмма с фиксированными бакетами"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # последний элемент — бакет +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class HttpMetrics:
+    """Хранилище метрик процесса"""
+
+    def __init__(self):
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.responses: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self.in_flight = 0
+        # дополнительные gauge-источники: имя -> функция, возвращающая {метрика: значение}
+        self.collectors: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram()
+        histogram.observe(seconds)
+        self.responses[(method, route, status)] += 1
+
+    def reset(self) -> None:
+        self.latency.clear()
+        self.responses.clear()
+        self.in_flight = 0
+
+    def render(self) -> str:
+        """Текстовый формат экспозиции Prometheus"""
+
+        lines: List[str] = [
+            "# HELP http_request_duration_seconds Request latency by route template.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(self.latency.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(
+                    f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}'
+            )
+            lines.append(
+                f"http_request_duration_seconds_sum{{{labels}}} {histogram.sum}"
+            )
+            lines.append(
+                f"http_request_duration_seconds_count{{{labels}}} {histogram.count}"
+            )
+
+        lines += [
+            "# HELP http_responses_total Responses by route template and status code.",
+            "# TYPE http_responses_total counter",
+        ]
+        for (method, route, status), count in sorted(self.responses.items()):
+            lines.append(
+                f'http_responses_total{{method="{method}",route="{_escape(route)}",'
+                f'status="{status}"}} {count}'
+            )
+
+        lines += [
+            "# HELP http_requests_in_flight Requests currently being processed.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+
+        for prefix, collect in self.collectors.items():
+            lines += _render_gauges(prefix, collect().items())
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _render_gauges(prefix: str, values: Iterable[Tuple[str, object]]) -> List[str]:
+    lines = []
+    for name, value in values:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        metric = f"{prefix}_{name}"
+        lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+    return lines
+
+
+http_metrics = HttpMetrics()
+
+
+def _route_templates(routes: List[BaseRoute]) -> Dict[int, str]:
+    """Полные шаблоны путей с учётом префиксов вложенных роутеров.
+
+    Ключ — id объекта роута: роуты живут столько же, сколько приложение,
+    а сами Route нехэшируемы (определяют __eq__).
+    """
+
+    if iter_route_contexts is None:
+        return {}
+    return {
+        id(context.original_route): context.path_format
+        for context in iter_route_contexts(routes)
+        if context.path_format
+    }
+
+
+class MetricsMiddleware:
+    """Замеряет латентность и статусы HTTP-запросов"""
+
+    def __init__(self, app: ASGIApp, metrics: HttpMetrics = http_metrics):
+        self.app = app
+        self.metrics = metrics
+        self._templates: Dict[int, str] | None = None
+
+    def _route_label(self, scope: Scope) -> str:
+        route = scope.get("route")
+        if route is None:
+            return UNMATCHED_ROUTE
+        if self._templates is None:
+            self._templates = _route_templates(scope["app"].routes)
+        return self._templates.get(id(route)) or getattr(route, "path", UNMATCHED_ROUTE)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.in_flight -= 1
+            route = self._route_label(scope)
+            if route != "/metrics":
+                metrics.observe(scope["method"], route, status, elapsed)
+
+
+class ServerTimingMiddleware:
+    """Добавляет в ответ Server-Timing с числом SQL-запросов и временем БД.
+
+    Заголовок формируется на http.response.start: у потоковых ответов
+    в него попадают только запросы, выполненные до начала отдачи тела.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={stats.seconds * 1000:.2f};desc="{stats.count} queries"',
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(http_metrics.render(), media_type=CONTENT_TYPE)
@@ -1,7 +1,13 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
 from math import ceil
-from typing import Type, Any, Sequence
+from typing import Type, Any, Sequence, Tuple
+
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, tuple_
 
 
 async def paginate(
@@ -40,3 +46,46 @@ async def paginate(
         "pages": ceil(total / limit) if total else 1,
         "data": items,
     }
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """Кодирует позицию keyset-пагинации (значение сортировки, id) в непрозрачную строку"""
+
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    else:
+        sort_value = str(sort_value)
+    raw = json.dumps([sort_value, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str) -> Tuple[Any, int]:
+    """Раскодирует курсор; значения *_date возвращаются как datetime, остальные — Decimal"""
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        if sort_by.endswith("_date"):
+            return datetime.fromisoformat(sort_value), int(row_id)
+        return Decimal(sort_value), int(row_id)
+    except (ValueError, TypeError, InvalidOperation):
+        raise HTTPException(400, "Invalid cursor")
+
+
+def keyset_filter(column, id_column, cursor: str, sort_by: str, sort_order: str):
+    """Условие «строки после курсора» для сортировки (column, id)"""
+
+    sort_value, row_id = decode_cursor(cursor, sort_by)
+    position = tuple_(column, id_column)
+    if sort_order == "desc":
+        return position < tuple_(sort_value, row_id)
+    return position > tuple_(sort_value, row_id)
+
+
+def next_cursor(items: Sequence[Any], sort_by: str, limit: int) -> str | None:
+    """Курсор следующей страницы; None — если страница неполная (дальше пусто)"""
+
+    if len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(getattr(last, sort_by), last.id)
@@ -1,9 +1,19 @@
+import asyncio
+import base64
+import hashlib
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Dict, Iterable, List
+
 import boto3
 from botocore.exceptions import ClientError
 from fastapi import HTTPException
 
 from app.core.settings import settings
+from app.core.utils import LocalTTLCache
+from app.schemas.dataclasses.files import UploadedObjectDTO
 
 s3 = boto3.client(
     "s3",
@@ -13,6 +23,16 @@ s3 = boto3.client(
     region_name=settings.S3_REGION,
 )
 
+# клиент для подписи ссылок собирается один раз при старте: хост входит
+# в подпись SigV4, поэтому переписывать его в готовой ссылке нельзя
+s3_public = boto3.client(
+    "s3",
+    endpoint_url=settings.S3_PUBLIC_ENDPOINT_URL or settings.S3_ENDPOINT_URL,
+    aws_access_key_id=settings.S3_ACCESS_KEY,
+    aws_secret_access_key=settings.S3_SECRET_KEY,
+    region_name=settings.S3_REGION,
+)
+
 ALLOWED_TYPES = {
     "image/jpeg",
     "image/png",
@@ -21,48 +41,216 @@ ALLOWED_TYPES = {
 
 MAX_SIZE = 5 * 1024 * 1024  # 5MB
 
+READ_CHUNK_SIZE = 1024 * 1024  # 1MB — столько читаем из UploadFile за раз
+PART_SIZE = 5 * 1024 * 1024  # минимальный размер части multipart upload в S3
+
+PRESIGN_EXPIRES_SECONDS = 900
+# ссылка отдаётся из кеша, пока до её истечения остаётся больше этого запаса
+PRESIGN_REFRESH_MARGIN_SECONDS = 120
+
+# boto3 синхронный: все вызовы S3 идут в отдельный пул, а не в event loop
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="s3")
+
+# слоты загрузок: ограничивают память, занятую буферами частей, под всплеском
+_upload_slots = asyncio.Semaphore(settings.S3_MAX_CONCURRENT_UPLOADS)
+
+# подписанные ссылки по ключу объекта
+_presigned_urls = LocalTTLCache(
+    maxsize=10_000, ttl=PRESIGN_EXPIRES_SECONDS - PRESIGN_REFRESH_MARGIN_SECONDS
+)
+
+
+async def _run(func, **kwargs):
+    """Выполняет блокирующий вызов boto3 в пуле потоков S3"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, **kwargs))
+
 
 def generate_key(user_id: int, filename: str) -> str:
     return f"users/{user_id}/{uuid.uuid4()}_{filename}"
 
 
-async def upload_file(file, user_id: int) -> str:
-    if file.content_type not in ALLOWED_TYPES:
-        raise HTTPException(415, "Invalid file type")
+@asynccontextmanager
+async def _upload_slot():
+    """Слот загрузки; не дождались за S3_UPLOAD_QUEUE_TIMEOUT — 503"""
 
-    content = await file.read()
+    try:
+        async with asyncio.timeout(settings.S3_UPLOAD_QUEUE_TIMEOUT):
+            await _upload_slots.acquire()
+    except TimeoutError:
+        raise HTTPException(503, "Too many uploads, try again later")
+    try:
+        yield
+    finally:
+        _upload_slots.release()
 
-    if len(content) > MAX_SIZE:
-        raise HTTPException(413, "File too large")
 
-    key = generate_key(user_id, file.filename)
+async def upload_stream(
+    file, key: str, content_type: str, max_size: int
+) -> UploadedObjectDTO:
+    """
+    Стримит UploadFile в S3 кусками по READ_CHUNK_SIZE; возвращает размер
+    и SHA-256, посчитанный по тем же кускам без повторного чтения.
 
-    try:
-        s3.put_object(
+    Файл меньше PART_SIZE уходит одним put_object (S3 сверяет его с хешем),
+    больше — multipart upload частями по PART_SIZE. Лимит max_size
+    проверяется по мере чтения: при превышении загрузка прерывается с 413,
+    начатый multipart отменяется. Одновременно на воркере идёт не больше
+    S3_MAX_CONCURRENT_UPLOADS загрузок.
+    """
+
+    async with _upload_slot():
+        return await _stream(file, key, content_type, max_size)
+
+
+async def _stream(
+    file, key: str, content_type: str, max_size: int
+) -> UploadedObjectDTO:
+    buffer = bytearray()
+    digest = hashlib.sha256()
+    size = 0
+    upload_id = None
+    parts = []
+
+    async def flush_part(data: bytes) -> None:
+        nonlocal upload_id
+        if upload_id is None:
+            created = await _run(
+                s3.create_multipart_upload,
+                Bucket=settings.S3_BUCKET,
+                Key=key,
+                ContentType=content_type,
+            )
+            upload_id = created["UploadId"]
+        number = len(parts) + 1
+        uploaded = await _run(
+            s3.upload_part,
             Bucket=settings.S3_BUCKET,
             Key=key,
-            Body=content,
-            ContentType=file.content_type,
+            UploadId=upload_id,
+            PartNumber=number,
+            Body=data,
         )
+        parts.append({"ETag": uploaded["ETag"], "PartNumber": number})
+
+    try:
+        while chunk := await file.read(READ_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_size:
+                raise HTTPException(413, "File too large")
+
+            digest.update(chunk)
+            buffer += chunk
+            while len(buffer) >= PART_SIZE:
+                await flush_part(bytes(buffer[:PART_SIZE]))
+                del buffer[:PART_SIZE]
+
+        if upload_id is None:
+            await _run(
+                s3.put_object,
+                Bucket=settings.S3_BUCKET,
+                Key=key,
+                Body=bytes(buffer),
+                ContentType=content_type,
+                ChecksumSHA256=base64.b64encode(digest.digest()).decode(),
+            )
+        else:
+            if buffer:
+                await flush_part(bytes(buffer))
+            await _run(
+                s3.complete_multipart_upload,
+                Bucket=settings.S3_BUCKET,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
     except ClientError:
+        await _abort_multipart(key, upload_id)
         raise HTTPException(502, "S3 error")
+    except BaseException:
+        await _abort_multipart(key, upload_id)
+        raise
 
-    return key
+    return UploadedObjectDTO(size=size, sha256=digest.hexdigest())
 
 
-def generate_download_url(key: str) -> str:
+async def _abort_multipart(key: str, upload_id: str | None) -> None:
+    if upload_id is None:
+        return
     try:
-        return s3.generate_presigned_url(
+        await _run(
+            s3.abort_multipart_upload,
+            Bucket=settings.S3_BUCKET,
+            Key=key,
+            UploadId=upload_id,
+        )
+    except ClientError:
+        pass
+
+
+async def upload_file(file, user_id: int) -> str:
+    if file.content_type not in ALLOWED_TYPES:
+        raise HTTPException(415, "Invalid file type")
+
+    # размер из заголовка части формы (если есть) — отказываем до чтения
+    if file.size and file.size > MAX_SIZE:
+        raise HTTPException(413, "File too large")
+
+    key = generate_key(user_id, file.filename)
+    await upload_stream(file, key, file.content_type, MAX_SIZE)
+    return key
+
+
+def _sign(keys: List[str]) -> Dict[str, str]:
+    """Подписывает ссылки на скачивание пачкой — за один переход в пул потоков"""
+
+    return {
+        key: s3_public.generate_presigned_url(
             "get_object",
             Params={"Bucket": settings.S3_BUCKET, "Key": key},
-            ExpiresIn=900,
+            ExpiresIn=PRESIGN_EXPIRES_SECONDS,
         )
-    except ClientError:
-        raise HTTPException(502, "Failed to generate URL")
+        for key in keys
+    }
+
+
+async def get_download_urls(keys: Iterable[str]) -> Dict[str, str]:
+    """
+    Подписанные ссылки на скачивание по ключам объектов. Ссылки кешируются
+    до PRESIGN_REFRESH_MARGIN_SECONDS до истечения; промахи подписываются
+    вне event loop одним вызовом.
+    """
+
+    urls = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        url = _presigned_urls.get(key)
+        if url is None:
+            missing.append(key)
+        else:
+            urls[key] = url
+
+    if missing:
+        try:
+            signed = await _run(_sign, keys=missing)
+        except ClientError:
+            raise HTTPException(502, "Failed to generate URL")
+        for key, url in signed.items():
+            _presigned_urls.set(key, url)
+        urls.update(signed)
+
+    return urls
+
+
+async def get_download_url(key: str) -> str:
+    return (await get_download_urls([key]))[key]
+
 
+async def delete_file(key: str):
+    """Удаляет объект вне event loop; недоступность S3 удаление не ломает"""
 
-def delete_file(key: str):
+    _presigned_urls.delete(key)
     try:
-        s3.delete_object(Bucket=settings.S3_BUCKET, Key=key)
+        await _run(s3.delete_object, Bucket=settings.S3_BUCKET, Key=key)
     except ClientError:
         pass
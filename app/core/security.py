@@ -1,7 +1,32 @@
+"""
+Хеширование паролей.
+
+sha256_crypt намеренно тяжёлый (сотни миллисекунд на хеш) и держит GIL всё
+время вычисления, поэтому и в event loop, и в пуле потоков он останавливает
+обработку остальных запросов. Асинхронные hash_password/verify_password
+считают хеш в пуле процессов; семафор ограничивает число одновременных задач
+размером пула, остальные ждут в очереди, время ожидания попадает в метрики.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
+from app.core.settings import settings
+
+pwd_context = CryptContext(
+    schemes=["sha256_crypt"],
+    deprecated="auto",
+    sha256_crypt__default_rounds=settings.PASSWORD_HASH_ROUNDS,
+    sha256_crypt__min_rounds=settings.PASSWORD_HASH_ROUNDS,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
 
 
@@ -11,3 +36,106 @@ def encode_password(password: str) -> str:
 
 def validate_password(password_from_user: str, hashed_password_from_db: str) -> bool:
     return pwd_context.verify(password_from_user, hashed_password_from_db)
+
+
+def _verify_and_update(password: str, hashed: str) -> Tuple[bool, str | None]:
+    return pwd_context.verify_and_update(password, hashed)
+
+
+@dataclass
+class HasherStats:
+    """Накопительные счётчики пула хеширования"""
+
+    jobs: int = 0
+    in_flight: int = 0
+    waiting: int = 0
+    rehashed: int = 0
+    queue_seconds_sum: float = 0.0
+    queue_seconds_max: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def observe_queue(self, seconds: float) -> None:
+        with self._lock:
+            self.jobs += 1
+            self.queue_seconds_sum += seconds
+            self.queue_seconds_max = max(self.queue_seconds_max, seconds)
+
+
+class PasswordHasher:
+    """Хеширование и проверка паролей в ограниченном пуле процессов"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.stats = HasherStats()
+        self._semaphore = asyncio.Semaphore(workers)
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # процессы поднимаются при первой задаче; spawn, а не fork —
+        # к этому моменту в процессе уже работают потоки пулов БД и S3
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _submit(self, func, *args):
+        start = time.perf_counter()
+        self.stats.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.stats.waiting -= 1
+
+        try:
+            self.stats.observe_queue(time.perf_counter() - start)
+            self.stats.in_flight += 1
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool(), func, *args)
+        finally:
+            self.stats.in_flight -= 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(encode_password, password)
+
+    async def verify_and_update(
+        self, password: str, hashed: str
+    ) -> Tuple[bool, str | None]:
+        """
+        Проверяет пароль; вторым элементом возвращает новый хеш, если текущий
+        посчитан с устаревшими параметрами (схема или число раундов)
+        """
+
+        valid, new_hash = await self._submit(_verify_and_update, password, hashed)
+        if new_hash:
+            self.stats.rehashed += 1
+        return valid, new_hash
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "workers": self.workers,
+            "jobs_total": self.stats.jobs,
+            "in_flight": self.stats.in_flight,
+            "waiting": self.stats.waiting,
+            "rehashed_total": self.stats.rehashed,
+            "queue_seconds_sum": self.stats.queue_seconds_sum,
+            "queue_seconds_max": self.stats.queue_seconds_max,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS)
+
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
+
+
+async def verify_password(password: str, hashed: str) -> Tuple[bool, str | None]:
+    return await password_hasher.verify_and_update(password, hashed)
@@ -1,4 +1,3 @@
-
 from dotenv import load_dotenv
 from pydantic import Field
 from pydantic_settings import BaseSettings
@@ -17,6 +16,27 @@ class Settings(BaseSettings):
     memcached_addr: str = Field("127.0.0.1", alias="MEMCACHE_ADDR")
     memcached_port: str = Field("11211", alias="MEMCACHE_PORT")
 
+    # пул соединений к БД; размер пула + overflow на воркер, умноженные на
+    # число воркеров, должны укладываться в max_connections Postgres
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # кэш подготовленных выражений asyncpg; 0 — выключить (нужно за pgbouncer)
+    DB_STATEMENT_CACHE_SIZE: int | None = None
+    # запросы дольше порога пишутся в лог вместе с формой параметров
+    DB_SLOW_QUERY_SECONDS: float = 0.5
+    # период фоновой сборки месячных итогов; 0 — воркер не запускается
+    SUMMARY_REFRESH_SECONDS: float = 600
+    # период записи текущих курсов в историю currency_rates; 0 — не писать
+    CURRENCY_RATES_SNAPSHOT_SECONDS: float = 3600
+
+    # хеширование паролей: процессов в пуле и раунды sha256_crypt; хеши с
+    # меньшим числом раундов пересчитываются при следующем входе
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_ROUNDS: int = 535000
+
     S3_ENDPOINT_URL: str | None = (
         "http://minio:9000"  # None = real AWS; "http://minio:9000" for MinIO
     )
@@ -24,6 +44,14 @@ class Settings(BaseSettings):
     S3_SECRET_KEY: str = "minioadmin"
     S3_REGION: str = "us-east-1"
     S3_BUCKET: str = "financetrack"
+    # адрес S3, по которому ходят клиенты; ссылки подписываются сразу на него
+    # (None — тот же S3_ENDPOINT_URL)
+    S3_PUBLIC_ENDPOINT_URL: str | None = "http://localhost:9000"
+    # одновременных загрузок в S3 на воркер; в памяти каждой — не больше
+    # части multipart (5 MB) и одного прочитанного куска. Остальные ждут
+    # слот до S3_UPLOAD_QUEUE_TIMEOUT секунд, затем получают 503
+    S3_MAX_CONCURRENT_UPLOADS: int = 4
+    S3_UPLOAD_QUEUE_TIMEOUT: float = 10
 
     class Config:
         env_file = ".env"
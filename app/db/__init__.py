@@ -2,11 +2,17 @@ from .models.income import Income
 from .models.user import User
 from .models.expense import Expense
 from .models.category import Category
-
+from .models.expense_rollup import ExpenseDailyRollup
+from .models.currency_rate import CurrencyRate
+from .models.monthly_summary import MonthlySummary, MonthlySummaryState
 
 __all__ = [
     "Category",
     "Income",
     "User",
     "Expense",
+    "ExpenseDailyRollup",
+    "CurrencyRate",
+    "MonthlySummary",
+    "MonthlySummaryState",
 ]
@@ -1,13 +1,45 @@
+import logging
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Awaitable, Callable
 
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 
 from app.core.settings import settings
+from app.db.pool import create_engine
 
-async_engine = create_async_engine(url=settings.DB_URL, echo=False)
-_async_session = async_sessionmaker(async_engine, class_=AsyncSession)
+logger = logging.getLogger(__name__)
+
+_AFTER_COMMIT = "after_commit"
+
+
+class CommitHookSession(AsyncSession):
+    """
+    AsyncSession с отложенными действиями после commit: внешние кеши
+    (Memcached) сбрасываются только когда изменения уже видны другим
+    запросам, иначе параллельный запрос успеет закешировать старые данные.
+    """
+
+    def after_commit(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """Выполнить callback после успешного commit; rollback его отменяет"""
+
+        self.info.setdefault(_AFTER_COMMIT, []).append(callback)
+
+    async def commit(self) -> None:
+        await super().commit()
+        for callback in self.info.pop(_AFTER_COMMIT, []):
+            try:
+                await callback()
+            except Exception as e:
+                logger.warning("After-commit callback error: %s", e)
+
+    async def rollback(self) -> None:
+        self.info.pop(_AFTER_COMMIT, None)
+        await super().rollback()
+
+
+async_engine = create_engine(settings.DB_URL, settings)
+_async_session = async_sessionmaker(async_engine, class_=CommitHookSession)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
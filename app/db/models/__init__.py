@@ -3,6 +3,9 @@ from .user import User
 from .income import Income
 from .expense import Expense
 from .category import Category
+from .expense_rollup import ExpenseDailyRollup
+from .currency_rate import CurrencyRate
+from .monthly_summary import MonthlySummary, MonthlySummaryState
 
 __all__ = [
     "AttachedFile",
@@ -10,4 +13,8 @@ __all__ = [
     "Income",
     "Expense",
     "Category",
+    "ExpenseDailyRollup",
+    "CurrencyRate",
+    "MonthlySummary",
+    "MonthlySummaryState",
 ]
@@ -24,6 +24,13 @@ class AttachedFile(Base):
         nullable=False,
         index=True,
     )
+    # трата, к которой приложен файл
+    transaction_id = Column(
+        Integer,
+        ForeignKey("expenses.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
     original_name = Column(String, nullable=False)
     s3_key = Column(String, nullable=False, unique=True)  # путь внутри бакета
     content_type = Column(String, nullable=False)
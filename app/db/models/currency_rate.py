@@ -0,0 +1,24 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import Date, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.models.base import Base
+
+# валюта, в которой хранятся курсы; её курс всегда 1
+RATES_BASE_CURRENCY = "RUB"
+
+
+class CurrencyRate(Base):
+    """Курс валюты на день: сколько рублей стоит одна единица валюты.
+
+    Пишется фоновым воркером раз в день; для дня без курса берётся
+    ближайший предыдущий (а до начала истории — самый ранний).
+    """
+
+    __tablename__ = "currency_rates"
+
+    currency: Mapped[str] = mapped_column(String(3), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    rate: Mapped[Decimal] = mapped_column(Numeric(18, 6), nullable=False)
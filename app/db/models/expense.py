@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, DateTime, Numeric, String
+from sqlalchemy import ForeignKey, DateTime, Index, Numeric, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.models.base import Base
@@ -8,6 +8,16 @@ from app.db.models.base import Base
 
 class Expense(Base):
     __tablename__ = "expenses"
+    __table_args__ = (
+        # все горячие запросы: user_id = ? AND expense_date BETWEEN ...;
+        # INCLUDE делает индекс покрывающим для агрегатов (index-only scan)
+        Index(
+            "ix_expenses_user_id_expense_date",
+            "user_id",
+            "expense_date",
+            postgresql_include=["value", "category_id"],
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
@@ -18,6 +28,10 @@ class Expense(Base):
         ForeignKey("categories.id"), nullable=False
     )
     value: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False)
+    # ISO 4217; value хранится в этой валюте
+    currency: Mapped[str] = mapped_column(
+        String(3), nullable=False, default="RUB", server_default="RUB"
+    )
     comment: Mapped[str] = mapped_column(String(100), nullable=True)
 
     image_key: Mapped[str | None] = mapped_column(String(255), nullable=True)
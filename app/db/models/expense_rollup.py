@@ -0,0 +1,39 @@
+from datetime import date
+
+from sqlalchemy import Date, ForeignKey, Index, Integer, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.models.base import Base
+
+
+class ExpenseDailyRollup(Base):
+    """Суммы трат пользователя по категории и валюте за день.
+
+    Поддерживается транзакционно при создании/изменении/удалении траты,
+    статистика читает её вместо сырых строк expenses.
+    """
+
+    __tablename__ = "expense_daily_rollup"
+    __table_args__ = (
+        # дневной итог пользователя по всем категориям (проверка лимита)
+        Index(
+            "ix_expense_daily_rollup_user_id_day",
+            "user_id",
+            "day",
+            postgresql_include=["total"],
+        ),
+    )
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    category_id: Mapped[int] = mapped_column(
+        ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    # суммы в разных валютах не складываются: конвертирует запрос статистики
+    currency: Mapped[str] = mapped_column(
+        String(3), primary_key=True, default="RUB", server_default="RUB"
+    )
+    total: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Numeric, String
+from sqlalchemy import DateTime, ForeignKey, Index, Numeric, String
 from sqlalchemy.orm import Mapped, relationship
 from sqlalchemy.orm import mapped_column
 
@@ -9,6 +9,14 @@ from app.db.models.base import Base
 
 class Income(Base):
     __tablename__ = "incomes"
+    __table_args__ = (
+        Index(
+            "ix_incomes_user_id_income_date",
+            "user_id",
+            "income_date",
+            postgresql_include=["value", "category_id"],
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(
@@ -21,10 +29,13 @@ class Income(Base):
         ForeignKey("categories.id"), nullable=False, index=True
     )
     value: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False)
+    # ISO 4217; value хранится в этой валюте
+    currency: Mapped[str] = mapped_column(
+        String(3), nullable=False, default="RUB", server_default="RUB"
+    )
     comment: Mapped[str] = mapped_column(String(100), nullable=True)
 
     image_key: Mapped[str | None] = mapped_column(String(255), nullable=True)
 
-
     category: Mapped["Category"] = relationship("Category", back_populates="incomes")
     user: Mapped["User"] = relationship("User", back_populates="incomes")
@@ -0,0 +1,48 @@
+from datetime import date
+
+from sqlalchemy import Date, Enum as sqlalchemy_enum, ForeignKey, Integer, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.models.base import Base
+from app.db.models.category import TypesOfCat
+
+
+class MonthlySummary(Base):
+    """Итоги пользователя по категории за закрытый месяц (траты и доходы).
+
+    Заполняется фоновым воркером только для месяцев раньше
+    MonthlySummaryState.built_until; открытый месяц читается из сырых строк.
+    Суммы — в базовой валюте пользователя на момент сборки.
+    """
+
+    __tablename__ = "monthly_summaries"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    month: Mapped[date] = mapped_column(Date, primary_key=True)
+    category_id: Mapped[int] = mapped_column(
+        ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    # тип категории денормализован: доходы против трат без join с categories
+    kind: Mapped[TypesOfCat] = mapped_column(
+        sqlalchemy_enum(TypesOfCat), nullable=False
+    )
+    total: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class MonthlySummaryState(Base):
+    """Докуда построены месячные итоги пользователя.
+
+    Месяцы [..., built_until) лежат в monthly_summaries; запись задним числом
+    сдвигает built_until назад, и воркер пересобирает месяцы начиная с него.
+    """
+
+    __tablename__ = "monthly_summary_state"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    # None — итоги ещё не строились
+    built_until: Mapped[date | None] = mapped_column(Date, nullable=True)
@@ -25,6 +25,14 @@ class User(Base):
     day_expense_limit: Mapped[float] = mapped_column(
         Numeric(10, 2), default=500, nullable=True
     )
+    # IANA-зона: по ней выравниваются периоды статистики и "сегодня" для лимита
+    timezone: Mapped[str] = mapped_column(
+        String(64), nullable=False, default="UTC", server_default="UTC"
+    )
+    # валюта, в которую пересчитываются статистика и лимит трат
+    base_currency: Mapped[str] = mapped_column(
+        String(3), nullable=False, default="RUB", server_default="RUB"
+    )
 
     incomes: Mapped[List["Income"]] = relationship(
         "Income", back_populates="user", uselist=True, cascade="all, delete-orphan"
@@ -0,0 +1,159 @@
+"""
+Настройка пула соединений и метрики его загрузки.
+
+Метрики собираются событиями пула и таймингом ожидания в ``_do_get``,
+снимок отдаётся админским эндпоинтом для подбора числа воркеров.
+"""
+
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+@dataclass
+class PoolStats:
+    """Накопительные счётчики пула"""
+
+    connects: int = 0
+    checkouts: int = 0
+    overflow_checkouts: int = 0
+    timeouts: int = 0
+    invalidations: int = 0
+    wait_count: int = 0
+    wait_seconds_sum: float = 0.0
+    wait_seconds_max: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_seconds_sum += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+_engine_stats: "weakref.WeakKeyDictionary[Engine, PoolStats]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Пул, замеряющий время ожидания свободного соединения"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.stats.incr("timeouts")
+            raise
+        finally:
+            self.stats.observe_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def _pool_kwargs(url: str, settings) -> Dict[str, Any]:
+    parsed = make_url(url)
+    kwargs: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (
+        None,
+        "",
+        ":memory:",
+    ):
+        # in-memory SQLite живёт на одном соединении, пул не настраивается
+        return kwargs
+
+    kwargs.update(
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    if (
+        parsed.get_driver_name() == "asyncpg"
+        and settings.DB_STATEMENT_CACHE_SIZE is not None
+    ):
+        kwargs["connect_args"] = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+        }
+    return kwargs
+
+
+def _install_listeners(engine: AsyncEngine, stats: PoolStats) -> None:
+    pool = engine.sync_engine.pool
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        stats.incr("connects")
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.incr("checkouts")
+        if isinstance(pool, QueuePool) and pool.overflow() > 0:
+            stats.incr("overflow_checkouts")
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        stats.incr("invalidations")
+
+
+def create_engine(url: str, settings) -> AsyncEngine:
+    """Движок с пулом из настроек и подключёнными метриками"""
+
+    engine = create_async_engine(url=url, echo=False, **_pool_kwargs(url, settings))
+    pool = engine.sync_engine.pool
+    stats = pool.stats if isinstance(pool, TimedQueuePool) else PoolStats()
+    _engine_stats[engine.sync_engine] = stats
+    _install_listeners(engine, stats)
+    return engine
+
+
+def pool_snapshot(engine: AsyncEngine) -> Dict[str, Any]:
+    """Текущее состояние пула и накопленные счётчики"""
+
+    pool = engine.sync_engine.pool
+    stats = _engine_stats[engine.sync_engine]
+    snapshot: Dict[str, Any] = {"pool_class": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        snapshot.update(
+            pool_size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+
+    with stats._lock:
+        snapshot.update(
+            connects_total=stats.connects,
+            checkouts_total=stats.checkouts,
+            overflow_checkouts_total=stats.overflow_checkouts,
+            timeouts_total=stats.timeouts,
+            invalidations_total=stats.invalidations,
+            wait_count=stats.wait_count,
+            wait_seconds_sum=round(stats.wait_seconds_sum, 6),
+            wait_seconds_max=round(stats.wait_seconds_max, 6),
+        )
+    return snapshot
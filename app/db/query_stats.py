@@ -0,0 +1,80 @@
+"""
+Счётчик SQL-запросов и времени БД на запрос + лог медленных запросов.
+
+Хуки вешаются на класс Engine, поэтому покрывают любой движок приложения.
+Статистика копится в объекте из ContextVar: SQLAlchemy выполняет sync-часть
+в greenlet с контекстом вызывающей корутины, так что запросы попадают
+в счётчик своего HTTP-запроса.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_STATEMENT_LIMIT = 500
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Считает запросы, выполненные внутри блока"""
+
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def parameters_shape(parameters: Any) -> Any:
+    """Форма параметров без значений: имена/позиции и типы, для executemany — размер"""
+
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return {"rows": len(parameters), "row": parameters_shape(parameters[0])}
+        return [type(value).__name__ for value in parameters]
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    return type(parameters).__name__
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_start
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+    if elapsed >= settings.DB_SLOW_QUERY_SECONDS:
+        logger.warning(
+            "Slow query %.3fs: %s; params=%s",
+            elapsed,
+            " ".join(statement.split())[:SLOW_QUERY_STATEMENT_LIMIT],
+            parameters_shape(parameters),
+        )
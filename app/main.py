@@ -4,6 +4,15 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.router import router as api_router
 from app.callbacks import lifespan
+from app.core.metrics import (
+    MetricsMiddleware,
+    ServerTimingMiddleware,
+    http_metrics,
+    metrics_endpoint,
+)
+from app.core.security import password_hasher
+from app.db.database import async_engine
+from app.db.pool import pool_snapshot
 from app.exceptions import ExceptionHandler
 
 app = FastAPI(title="FinanceTrack", version="0.0.1", lifespan=lifespan)
@@ -21,7 +30,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# снаружи CORS, чтобы в латентность попадала вся обработка запроса
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router)
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+http_metrics.collectors["db_pool"] = lambda: pool_snapshot(async_engine)
+http_metrics.collectors["password_hash"] = password_hasher.snapshot
 handler = ExceptionHandler()
 handler.register(app)
 
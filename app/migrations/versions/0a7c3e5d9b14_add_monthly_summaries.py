@@ -0,0 +1,73 @@
+"""Add monthly_summaries and monthly_summary_state tables
+
+Revision ID: 0a7c3e5d9b14
+Revises: e4b8d2f61a90
+Create Date: 2026-10-18 15:40:17.902441
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0a7c3e5d9b14"
+down_revision: Union[str, Sequence[str], None] = "e4b8d2f61a90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps():
+    return [
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default="NOW()",
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default="NOW()",
+            nullable=False,
+        ),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "monthly_summaries",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "kind",
+            # тип уже создан вместе с categories
+            postgresql.ENUM("INCOME", "EXPENSE", name="typesofcat", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("total", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["category_id"], ["categories.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "month", "category_id"),
+    )
+    # итоги строит фоновый воркер при старте приложения, бэкфилл не нужен
+    op.create_table(
+        "monthly_summary_state",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("built_until", sa.Date(), nullable=True),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("monthly_summary_state")
+    op.drop_table("monthly_summaries")
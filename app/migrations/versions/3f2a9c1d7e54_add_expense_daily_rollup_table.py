@@ -0,0 +1,58 @@
+"""Add expense_daily_rollup table
+
+Revision ID: 3f2a9c1d7e54
+Revises: b70032e85960
+Create Date: 2026-10-18 10:12:41.208315
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "3f2a9c1d7e54"
+down_revision: Union[str, Sequence[str], None] = "b70032e85960"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "expense_daily_rollup",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("total", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default="NOW()",
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default="NOW()",
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["category_id"], ["categories.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "category_id", "day"),
+    )
+
+    # заполняем rollup по уже существующим тратам
+    op.execute("""
+        INSERT INTO expense_daily_rollup (user_id, category_id, day, total, count)
+        SELECT user_id, category_id, expense_date::date, SUM(value), COUNT(*)
+        FROM expenses
+        GROUP BY user_id, category_id, expense_date::date
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("expense_daily_rollup")
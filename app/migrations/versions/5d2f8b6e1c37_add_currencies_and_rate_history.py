@@ -0,0 +1,82 @@
+"""Add currency to transactions, base currency to users and currency_rates table
+
+Revision ID: 5d2f8b6e1c37
+Revises: 0a7c3e5d9b14
+Create Date: 2026-10-18 18:05:44.310927
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5d2f8b6e1c37"
+down_revision: Union[str, Sequence[str], None] = "0a7c3e5d9b14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _currency(name: str) -> sa.Column:
+    # все существующие суммы — в рублях
+    return sa.Column(name, sa.String(length=3), nullable=False, server_default="RUB")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("expenses", _currency("currency"))
+    op.add_column("incomes", _currency("currency"))
+    op.add_column("users", _currency("base_currency"))
+
+    # rollup разбивается по валюте: валюта входит в первичный ключ
+    op.add_column("expense_daily_rollup", _currency("currency"))
+    op.drop_constraint(
+        "expense_daily_rollup_pkey", "expense_daily_rollup", type_="primary"
+    )
+    op.create_primary_key(
+        "expense_daily_rollup_pkey",
+        "expense_daily_rollup",
+        ["user_id", "category_id", "day", "currency"],
+    )
+
+    op.create_table(
+        "currency_rates",
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("rate", sa.Numeric(precision=18, scale=6), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default="NOW()",
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default="NOW()",
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("currency", "day"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("currency_rates")
+
+    # без валюты в ключе суммы в других валютах не уместить
+    op.execute("DELETE FROM expense_daily_rollup WHERE currency <> 'RUB'")
+    op.drop_constraint(
+        "expense_daily_rollup_pkey", "expense_daily_rollup", type_="primary"
+    )
+    op.create_primary_key(
+        "expense_daily_rollup_pkey",
+        "expense_daily_rollup",
+        ["user_id", "category_id", "day"],
+    )
+    op.drop_column("expense_daily_rollup", "currency")
+
+    op.drop_column("users", "base_currency")
+    op.drop_column("incomes", "currency")
+    op.drop_column("expenses", "currency")
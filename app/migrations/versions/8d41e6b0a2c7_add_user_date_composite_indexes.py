@@ -0,0 +1,41 @@
+"""Add (user_id, date) composite covering indexes on expenses and incomes
+
+Revision ID: 8d41e6b0a2c7
+Revises: 3f2a9c1d7e54
+Create Date: 2026-10-18 11:40:03.917265
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8d41e6b0a2c7"
+down_revision: Union[str, Sequence[str], None] = "3f2a9c1d7e54"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_expenses_user_id_expense_date",
+        "expenses",
+        ["user_id", "expense_date"],
+        unique=False,
+        postgresql_include=["value", "category_id"],
+    )
+    op.create_index(
+        "ix_incomes_user_id_income_date",
+        "incomes",
+        ["user_id", "income_date"],
+        unique=False,
+        postgresql_include=["value", "category_id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_incomes_user_id_income_date", table_name="incomes")
+    op.drop_index("ix_expenses_user_id_expense_date", table_name="expenses")
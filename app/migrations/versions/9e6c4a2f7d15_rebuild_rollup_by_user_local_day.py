@@ -0,0 +1,40 @@
+"""Rebuild expense daily rollup by the user's local day
+
+Revision ID: 9e6c4a2f7d15
+Revises: 5d2f8b6e1c37
+Create Date: 2026-10-18 20:12:07.518340
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9e6c4a2f7d15"
+down_revision: Union[str, Sequence[str], None] = "5d2f8b6e1c37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _backfill(day: str) -> None:
+    op.execute("DELETE FROM expense_daily_rollup")
+    op.execute(f"""
+        INSERT INTO expense_daily_rollup
+            (user_id, category_id, day, currency, total, count)
+        SELECT e.user_id, e.category_id, {day}, e.currency, SUM(e.value), COUNT(*)
+        FROM expenses e
+        JOIN users u ON u.id = e.user_id
+        GROUP BY e.user_id, e.category_id, {day}, e.currency
+        """)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # дни rollup — локальные дни пользователя, как окна статистики и бюджет
+    _backfill("(timezone(u.timezone, e.expense_date))::date")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _backfill("e.expense_date::date")
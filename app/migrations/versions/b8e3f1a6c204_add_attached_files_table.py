@@ -0,0 +1,73 @@
+"""Add attached_files table linked to expenses
+
+Revision ID: b8e3f1a6c204
+Revises: 9e6c4a2f7d15
+Create Date: 2026-10-18 21:40:12.804512
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b8e3f1a6c204"
+down_revision: Union[str, Sequence[str], None] = "9e6c4a2f7d15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "attached_files",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("transaction_id", sa.Integer(), nullable=False),
+        sa.Column("original_name", sa.String(), nullable=False),
+        sa.Column("s3_key", sa.String(), nullable=False),
+        sa.Column("content_type", sa.String(), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column(
+            "uploaded_at", sa.DateTime(), server_default=sa.text("now()"), nullable=True
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default="NOW()",
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default="NOW()",
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(
+            ["transaction_id"], ["expenses.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("s3_key"),
+    )
+    op.create_index(
+        op.f("ix_attached_files_id"), "attached_files", ["id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_attached_files_user_id"), "attached_files", ["user_id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_attached_files_transaction_id"),
+        "attached_files",
+        ["transaction_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_attached_files_transaction_id"), table_name="attached_files")
+    op.drop_index(op.f("ix_attached_files_user_id"), table_name="attached_files")
+    op.drop_index(op.f("ix_attached_files_id"), table_name="attached_files")
+    op.drop_table("attached_files")
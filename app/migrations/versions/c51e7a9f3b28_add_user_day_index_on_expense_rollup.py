@@ -0,0 +1,35 @@
+"""Add (user_id, day) index on expense_daily_rollup for daily limit checks
+
+Revision ID: c51e7a9f3b28
+Revises: 8d41e6b0a2c7
+Create Date: 2026-10-18 13:05:41.220318
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c51e7a9f3b28"
+down_revision: Union[str, Sequence[str], None] = "8d41e6b0a2c7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_expense_daily_rollup_user_id_day",
+        "expense_daily_rollup",
+        ["user_id", "day"],
+        unique=False,
+        postgresql_include=["total"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_expense_daily_rollup_user_id_day", table_name="expense_daily_rollup"
+    )
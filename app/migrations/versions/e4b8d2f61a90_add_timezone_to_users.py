@@ -0,0 +1,33 @@
+"""Add timezone to users
+
+Revision ID: e4b8d2f61a90
+Revises: c51e7a9f3b28
+Create Date: 2026-10-18 14:22:09.584113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b8d2f61a90"
+down_revision: Union[str, Sequence[str], None] = "c51e7a9f3b28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column(
+            "timezone", sa.String(length=64), nullable=False, server_default="UTC"
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "timezone")
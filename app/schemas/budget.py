@@ -0,0 +1,15 @@
+from datetime import date
+
+from pydantic import BaseModel, ConfigDict
+
+
+class DayBudgetOut(BaseModel):
+    """Дневной лимит трат: потрачено, осталось, превышен ли"""
+
+    day: date
+    limit: float | None
+    spent: float
+    remaining: float | None
+    over_limit: bool
+
+    model_config = ConfigDict(from_attributes=True)
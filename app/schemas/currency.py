@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class Currency(str, Enum):
+    """Поддерживаемые валюты (ISO 4217)"""
+
+    RUB = "RUB"
+    USD = "USD"
+    EUR = "EUR"
+    CNY = "CNY"
@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+
+@dataclass
+class DayBudgetDTO:
+    day: date
+    limit: Decimal | None
+    spent: Decimal
+    remaining: Decimal | None
+    over_limit: bool
@@ -9,3 +9,11 @@ class CategoryDTO:
     title: str
     user_id: int
     type_of_category: TypesOfCat
+
+
+@dataclass(frozen=True)
+class CategoryRefDTO:
+    """Минимум о категории для проверки записи: тип и владелец"""
+
+    type_of_category: TypesOfCat
+    user_id: int
@@ -11,3 +11,5 @@ class ExpenseDTO:
     value: float
     comment: str
     image_key: str | None = None
+    currency: str = "RUB"
+    base_value: float | None = None
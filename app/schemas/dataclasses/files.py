@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class UploadedObjectDTO:
+    """Загруженный в S3 объект: размер и SHA-256 содержимого (hex)"""
+
+    size: int
+    sha256: str
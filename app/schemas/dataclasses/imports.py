@@ -0,0 +1,15 @@
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class ImportRowErrorDTO:
+    row: int
+    error: str
+
+
+@dataclass
+class ImportResultDTO:
+    inserted: int = 0
+    skipped: int = 0
+    errors: List[ImportRowErrorDTO] = field(default_factory=list)
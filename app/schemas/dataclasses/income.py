@@ -11,3 +11,5 @@ class IncomeDTO:
     image_key: str
     value: float
     comment: str
+    currency: str = "RUB"
+    base_value: float | None = None
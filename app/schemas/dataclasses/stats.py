@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from typing import List
 
 
@@ -7,15 +7,59 @@ from typing import List
 class CategoryExpenseDTO:
     title: str
     amount: int
+    previous_amount: int | None = None
 
 
 @dataclass
 class CategoryExpenseStatDTO:
     categories: List[CategoryExpenseDTO]
     total: int
+    previous_total: int | None = None
+
+
+@dataclass(frozen=True)
+class StatsWindowDTO:
+    """Календарное окно периода в часовом поясе пользователя: [start, end)"""
+
+    start: datetime
+    end: datetime
+    previous_start: datetime
+
+    @property
+    def last(self) -> datetime:
+        """Последний момент окна — для BETWEEN"""
+        return self.end - timedelta(microseconds=1)
 
 
 @dataclass
 class ExpenseDynamicDTO:
     date: datetime
     amount: float
+
+
+@dataclass
+class IncomeDynamicDTO:
+    date: datetime
+    amount: float
+
+
+@dataclass
+class CashflowBucketDTO:
+    date: datetime
+    income: float
+    expense: float
+    net: float
+
+
+@dataclass
+class BalanceBucketDTO:
+    date: datetime
+    net: float
+    balance: float
+
+
+@dataclass
+class MonthlyTotalDTO:
+    month: date
+    expense: float
+    income: float
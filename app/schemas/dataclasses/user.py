@@ -11,3 +11,16 @@ class UserDTO:
     hashed_password: str
     role: UserRoles
     day_expense_limit: float
+    timezone: str = "UTC"
+    base_currency: str = "RUB"
+
+
+@dataclass
+class UserPrincipalDTO:
+    """Аутентифицированный пользователь: то, что нужно на каждый запрос"""
+
+    id: int
+    role: UserRoles
+    day_expense_limit: float
+    timezone: str = "UTC"
+    base_currency: str = "RUB"
@@ -3,18 +3,26 @@ from typing import Optional
 
 from pydantic import BaseModel, ConfigDict
 
+from app.schemas.currency import Currency
+
 
 class ExpenseCreate(BaseModel):
     expense_date: datetime
     category_id: int
     cost: float
     comment: str | None = None
+    currency: Currency = Currency.RUB
+
+    model_config = ConfigDict(use_enum_values=True)
 
 class ExpenseUpdate(BaseModel):
     expense_date: datetime | None = datetime.now()   # было datetime (обязательное)
     category_id: int | None = None         # было int
     cost: float | None = None              # было float
     comment: str | None = None
+    currency: Currency | None = None       # None — валюта не меняется
+
+    model_config = ConfigDict(use_enum_values=True)
 
 
 class ExpenseOut(BaseModel):
@@ -25,6 +33,9 @@ class ExpenseOut(BaseModel):
     value: float
     comment: Optional[str]
     image_key: Optional[str] = None   # добавить эту строку
+    currency: str = "RUB"
+    # сумма в базовой валюте пользователя (только в списке)
+    base_value: Optional[float] = None
 
 
     model_config = ConfigDict(from_attributes=True)
@@ -36,7 +47,8 @@ class Expenses(BaseModel):
     expenses: list[ExpenseOut]
     skip: int
     limit: int
+    next_cursor: str | None = None
 
 class ExpenseGet(BaseModel):
     data: Expenses
-    total: float
\ No newline at end of file
+    total: float | None
\ No newline at end of file
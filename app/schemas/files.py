@@ -1,4 +1,5 @@
 import datetime
+from typing import Dict
 
 from pydantic import BaseModel
 
@@ -13,3 +14,8 @@ class AttachedFileOut(BaseModel):
 
     model_config = {"from_attributes": True}
 
+
+class ImageUrlsOut(BaseModel):
+    """Ссылки на картинки по id записи; записи без картинки в ответ не попадают"""
+
+    urls: Dict[int, str]
@@ -0,0 +1,14 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class ImportResultOut(BaseModel):
+    inserted: int
+    skipped: int
+    errors: List[ImportRowError]
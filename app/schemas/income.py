@@ -1,7 +1,9 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.schemas.currency import Currency
 
 
 class IncomeCreate(BaseModel):
@@ -9,6 +11,9 @@ class IncomeCreate(BaseModel):
     category_id: int
     value: float
     comment: str | None = None
+    currency: Currency = Currency.RUB
+
+    model_config = ConfigDict(use_enum_values=True)
 
 
 class IncomeUpdate(BaseModel):
@@ -16,6 +21,9 @@ class IncomeUpdate(BaseModel):
     category_id: int
     value: float = Field(..., ge=0, lt=1000000000)
     comment: str | None = None
+    currency: Currency | None = None  # None — валюта не меняется
+
+    model_config = ConfigDict(use_enum_values=True)
 
 
 class Income(BaseModel):
@@ -27,6 +35,9 @@ class Income(BaseModel):
     value: float = Field(..., ge=0, lt=1000000000)
     comment: Optional[str]
     image_key: Optional[str] = None   # добавить эту строку
+    currency: str = "RUB"
+    # сумма в базовой валюте пользователя (только в списке)
+    base_value: Optional[float] = None
 
 
 
@@ -34,7 +45,8 @@ class IncomeGetPag(BaseModel):
     incomes: list[Income]
     skip: int
     limit: int
+    next_cursor: str | None = None
 
 class IncomeOut(BaseModel):
     data: IncomeGetPag
-    total: float
+    total: float | None
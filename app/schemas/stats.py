@@ -13,10 +13,20 @@ class PeriodEnum(str, Enum):
     year = "year"
 
 
+class BucketWidth(str, Enum):
+    """Ширина бакета временного ряда"""
+
+    hour = "hour"
+    day = "day"
+    week = "week"
+    month = "month"
+
+
 class Period(BaseModel):
     period: PeriodEnum
 
 
 class CategoriesStatOut(BaseModel):
     categories: List[CategoryExpenseDTO]
-    total: int
\ No newline at end of file
+    total: int
+    previous_total: int | None = None
\ No newline at end of file
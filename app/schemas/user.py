@@ -1,8 +1,21 @@
-from typing import Optional
+from typing import Annotated, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from pydantic import BaseModel, EmailStr, ConfigDict, Field
+from pydantic import AfterValidator, BaseModel, EmailStr, ConfigDict, Field
 
 from app.db.models.user import UserRoles
+from app.schemas.currency import Currency
+
+
+def _check_timezone(value: str) -> str:
+    try:
+        ZoneInfo(value)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {value}") from None
+    return value
+
+
+Timezone = Annotated[str, AfterValidator(_check_timezone)]
 
 
 class UserCreate(BaseModel):
@@ -10,19 +23,35 @@ class UserCreate(BaseModel):
     email: EmailStr
     password: str
     day_expense_limit: Optional[float] = Field(1000)
+    timezone: Timezone = "UTC"
+    base_currency: Currency = Currency.RUB
 
+    model_config = ConfigDict(use_enum_values=True)
 
 
 class UserOut(BaseModel):
     """user из БД"""
+
     id: int
     username: str
     email: EmailStr
     day_expense_limit: float
     role: UserRoles = Field()
+    timezone: str = "UTC"
+    base_currency: str = "RUB"
 
     model_config = ConfigDict(from_attributes=True)
 
 
 class NewUserRole(BaseModel):
-    user_role: UserRoles
\ No newline at end of file
+    user_role: UserRoles
+
+
+class NewUserTimezone(BaseModel):
+    timezone: Timezone
+
+
+class NewUserCurrency(BaseModel):
+    base_currency: Currency
+
+    model_config = ConfigDict(use_enum_values=True)
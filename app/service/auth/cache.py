@@ -0,0 +1,156 @@
+"""
+Кеш аутентифицированного пользователя (principal) для get_current_user.
+
+Два слоя: in-process LRU с коротким TTL и Memcached (общий для воркеров).
+Ключи Memcached версионируются поколением пользователя (principal:gen:{user_id}),
+которое растёт после commit смены роли, дневного лимита, часового пояса или
+валюты (app/service/user/crud.py). Запрос, прочитавший пользователя из БД до
+commit, пишет principal под старым поколением — его уже никто не прочитает.
+В других воркерах локальная копия живёт не дольше LOCAL_TTL_SECONDS.
+"""
+
+import json
+import logging
+import time
+from decimal import Decimal
+from functools import partial
+
+from app.core.memcached.session import memcached_session
+from app.core.utils import LocalTTLCache
+from app.db.database import CommitHookSession
+from app.db.models.user import UserRoles
+from app.schemas.dataclasses.user import UserPrincipalDTO
+
+logger = logging.getLogger(__name__)
+
+LOCAL_TTL_SECONDS = 30
+SHARED_TTL_SECONDS = 300
+GENERATION_TTL_SECONDS = 0  # поколение не истекает
+
+local_principals = LocalTTLCache(maxsize=10_000, ttl=LOCAL_TTL_SECONDS)
+
+# растёт при каждом сбросе в этом воркере: загрузка из БД, начатая до сброса,
+# не должна попасть в локальный кеш
+_local_epoch = 0
+
+# (локальная эпоха, поколение в Memcached) на момент перед чтением из БД
+PrincipalSnapshot = tuple[int, str | None]
+
+
+def _generation_key(user_id: int) -> str:
+    return f"principal:gen:{user_id}"
+
+
+def _key(user_id: int, generation: str) -> str:
+    return f"principal:{user_id}:{generation}"
+
+
+def _seed() -> str:
+    # после вытеснения счётчика начинаем не с 1, чтобы не совпасть со старым поколением
+    return str(time.time_ns())
+
+
+async def _get_generation(user_id: int) -> str:
+    key = _generation_key(user_id)
+    generation = await memcached_session.get(key)
+    if generation is None:
+        await memcached_session.add(key, _seed(), exptime=GENERATION_TTL_SECONDS)
+        generation = await memcached_session.get(key)
+    return generation.decode() if generation else "0"
+
+
+async def get_principal(user_id: int) -> UserPrincipalDTO | None:
+    """Principal из локального кеша, затем из Memcached; None — промах"""
+
+    principal = local_principals.get(user_id)
+    if principal is not None:
+        return principal
+
+    try:
+        data = await memcached_session.get(
+            _key(user_id, await _get_generation(user_id))
+        )
+    except Exception as e:
+        logger.warning("Principal cache read error: %s", e)
+        return None
+    if data is None:
+        return None
+
+    raw = json.loads(data)
+    principal = UserPrincipalDTO(
+        id=raw["id"],
+        role=UserRoles[raw["role"]],
+        day_expense_limit=(
+            Decimal(raw["day_expense_limit"])
+            if raw["day_expense_limit"] is not None
+            else None
+        ),
+        timezone=raw.get("timezone", "UTC"),
+        base_currency=raw.get("base_currency", "RUB"),
+    )
+    local_principals.set(user_id, principal)
+    return principal
+
+
+async def snapshot(user_id: int) -> PrincipalSnapshot:
+    """Снимок поколений; берётся до чтения пользователя из БД"""
+
+    try:
+        generation = await _get_generation(user_id)
+    except Exception as e:
+        logger.warning("Principal cache read error: %s", e)
+        generation = None
+    return _local_epoch, generation
+
+
+async def save_principal(principal: UserPrincipalDTO, taken: PrincipalSnapshot) -> None:
+    """
+    Кеширует principal, прочитанный из БД после снимка taken. Если с тех пор
+    пользователя изменили, запись уходит под старое поколение и не читается.
+    """
+
+    epoch, generation = taken
+    if epoch == _local_epoch:
+        local_principals.set(principal.id, principal)
+    if generation is None:
+        return
+    limit = principal.day_expense_limit
+    data = json.dumps(
+        {
+            "id": principal.id,
+            "role": principal.role.name,
+            "day_expense_limit": str(limit) if limit is not None else None,
+            "timezone": principal.timezone,
+            "base_currency": principal.base_currency,
+        }
+    )
+    try:
+        await memcached_session.set(
+            _key(principal.id, generation), data, exptime=SHARED_TTL_SECONDS
+        )
+    except Exception as e:
+        logger.warning("Principal cache write error: %s", e)
+
+
+async def invalidate_principal(user_id: int) -> None:
+    """Сбрасывает principal пользователя: INCR поколения в Memcached"""
+
+    global _local_epoch
+    _local_epoch += 1
+    local_principals.delete(user_id)
+
+    key = _generation_key(user_id)
+    try:
+        if await memcached_session.incr(key) is None:
+            await memcached_session.add(key, _seed(), exptime=GENERATION_TTL_SECONDS)
+    except Exception as e:
+        logger.warning("Principal cache invalidation error: %s", e)
+
+
+def invalidate_principal_on_commit(db: CommitHookSession, user_id: int) -> None:
+    """
+    Сбрасывает principal после commit: до него параллельный запрос прочитал
+    бы из БД старую роль и снова положил её в кеш.
+    """
+
+    db.after_commit(partial(invalidate_principal, user_id))
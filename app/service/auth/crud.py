@@ -1,7 +1,7 @@
-from sqlalchemy import select, or_
+from sqlalchemy import select, or_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import encode_password
+from app.core.security import hash_password
 from app.db import User
 from app.schemas.user import UserCreate
 
@@ -22,8 +22,10 @@ async def create_user(db: AsyncSession, user: UserCreate) -> User:
     new_user = User(
         username=user.username,
         email=user.email,
-        hashed_password=encode_password(user.password),
+        hashed_password=await hash_password(user.password),
         day_expense_limit=user.day_expense_limit,
+        timezone=user.timezone,
+        base_currency=user.base_currency,
     )
     db.add(new_user)
     await db.flush()
@@ -45,3 +47,11 @@ async def get_user_by_id(u_id: int, db: AsyncSession) -> User:
     stmt = select(User).where(User.id == u_id)
     result = await db.scalars(stmt)
     return result.first()
+
+
+async def update_password_hash(db: AsyncSession, user_id: int, hashed: str) -> None:
+    """Сохраняет пересчитанный с новыми параметрами хеш пароля"""
+
+    await db.execute(
+        update(User).where(User.id == user_id).values(hashed_password=hashed)
+    )
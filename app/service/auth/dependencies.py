@@ -7,19 +7,22 @@ from app.core.settings import settings
 from app.db import User
 from app.db.database import get_db
 from app.db.models.user import UserRoles
+from app.schemas.dataclasses.user import UserPrincipalDTO
 from app.service.auth.exceptions import (
     CredentialsException,
     TokenExpiredException,
     NotAdminUserException,
 )
+from app.service.auth import cache as principal_cache
 from app.service.auth import crud as auth_crud
 
 
 async def get_current_user(
     db: AsyncSession = Depends(get_db), token=Depends(oauth2_scheme)
-):
+) -> UserPrincipalDTO:
     """
-    Проверяет JWT и возвращает пользователя из базы.
+    Проверяет JWT и возвращает principal пользователя (id, роль, лимит).
+    Обычно без обращения к БД: principal берётся из кеша (app/service/auth/cache.py).
     """
     try:
         payload = jwt.decode(
@@ -36,19 +39,35 @@ async def get_current_user(
     except jwt.PyJWTError:
         raise CredentialsException("Ошибка при распознавании токена")
 
+    principal = await principal_cache.get_principal(int(u_id))
+    if principal is not None:
+        return principal
+
+    taken = await principal_cache.snapshot(int(u_id))
     user = await auth_crud.get_user_by_id(int(u_id), db)
     if user is None:
         raise CredentialsException("Ошибка при распознавании токена")
-    return user
 
+    principal = UserPrincipalDTO(
+        id=user.id,
+        role=user.role,
+        day_expense_limit=user.day_expense_limit,
+        timezone=user.timezone,
+        base_currency=user.base_currency,
+    )
+    await principal_cache.save_principal(principal, taken)
+    return principal
 
-async def get_admin_user(current_user: User = Depends(get_current_user)):
+
+async def get_admin_user(
+    current_user: UserPrincipalDTO = Depends(get_current_user),
+):
     if current_user.role == UserRoles.ADMIN:
         return current_user
     raise NotAdminUserException("User is not admin")
 
 
-async def get_user(current_user: User = Depends(get_current_user)):
+async def get_user(current_user: UserPrincipalDTO = Depends(get_current_user)):
     if current_user.role in (UserRoles.USER, UserRoles.ADMIN):
         return current_user
     raise NotAdminUserException("User's role is not 'user'")
@@ -8,7 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.memcached.session import memcached_session
 from app.core.settings import settings
-from app.core.security import validate_password
+from app.core.security import verify_password
 from app.db import User
 from app.schemas.user import UserCreate
 from app.service.auth import crud as auth_crud
@@ -51,8 +51,12 @@ class AuthService:
         user_db = await auth_crud.get_user_by_username(db, user.username)
         if not user_db:
             raise UserNotFound("Пользователь не найден")
-        if not validate_password(user.password, user_db.hashed_password):
+        valid, new_hash = await verify_password(user.password, user_db.hashed_password)
+        if not valid:
             raise CredentialsException("Ошибка авторизации")
+        if new_hash:
+            # параметры хеширования поменялись — пересохраняем, пока знаем пароль
+            await auth_crud.update_password_hash(db, user_db.id, new_hash)
 
         jti = self._generate_jti()
         expires_in = settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60
@@ -0,0 +1,29 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.expense_rollup import ExpenseDailyRollup
+from app.service.currency import crud as currency_crud
+
+
+async def get_spent_on_day(
+    db: AsyncSession, user_id: int, day: date, currency: str = "RUB"
+) -> Decimal:
+    """
+    Потрачено пользователем за день в currency: сумма строк rollup по
+    категориям и валютам (их немного), без агрегата по сырым тратам.
+    """
+
+    total = currency_crud.convert(
+        ExpenseDailyRollup.total,
+        ExpenseDailyRollup.currency,
+        ExpenseDailyRollup.day,
+        currency,
+    )
+    stmt = select(func.coalesce(func.sum(total), 0)).where(
+        ExpenseDailyRollup.user_id == user_id,
+        ExpenseDailyRollup.day == day,
+    )
+    return Decimal(str(await db.scalar(stmt)))
@@ -0,0 +1,39 @@
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.dataclasses.budget import DayBudgetDTO
+from app.schemas.dataclasses.user import UserPrincipalDTO
+from app.service.budget import crud as budget_crud
+
+
+class BudgetService:
+    """Сервис дневного лимита трат: сколько потрачено и сколько осталось"""
+
+    async def get_day_budget(
+        self, db: AsyncSession, user: UserPrincipalDTO, day: date | None = None
+    ) -> DayBudgetDTO:
+        """
+        Бюджет на день по текущему итогу из rollup. Итог обновляется
+        в той же транзакции, что и создание/изменение/удаление траты.
+        """
+
+        # "сегодня" — по часовому поясу пользователя
+        day = day or datetime.now(ZoneInfo(user.timezone)).date()
+        spent = await budget_crud.get_spent_on_day(db, user.id, day, user.base_currency)
+
+        if user.day_expense_limit is None:
+            return DayBudgetDTO(
+                day=day, limit=None, spent=spent, remaining=None, over_limit=False
+            )
+
+        limit = Decimal(str(user.day_expense_limit))
+        return DayBudgetDTO(
+            day=day,
+            limit=limit,
+            spent=spent,
+            remaining=limit - spent,
+            over_limit=spent > limit,
+        )
@@ -1,11 +1,11 @@
-from typing import List
+from typing import Dict, List
 
 from sqlalchemy import select, insert, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import Category
 from app.schemas.category import CreateCategory, CategoryUpdate
-from app.schemas.dataclasses.category import CategoryDTO
+from app.schemas.dataclasses.category import CategoryDTO, CategoryRefDTO
 
 
 async def get_category_by_id(db: AsyncSession, category_id: int) -> CategoryDTO | None:
@@ -26,6 +26,21 @@ async def get_category_by_id(db: AsyncSession, category_id: int) -> CategoryDTO
     )
 
 
+async def get_category_refs(
+    db: AsyncSession, user_id: int
+) -> Dict[int, CategoryRefDTO]:
+    """Все категории пользователя одним запросом: id -> (тип, владелец)"""
+
+    stmt = select(Category.id, Category.type_of_category).where(
+        Category.user_id == user_id
+    )
+    result = await db.execute(stmt)
+    return {
+        row.id: CategoryRefDTO(type_of_category=row.type_of_category, user_id=user_id)
+        for row in result
+    }
+
+
 async def create_category(
     db: AsyncSession,
     category: CreateCategory,
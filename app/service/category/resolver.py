@@ -0,0 +1,129 @@
+"""
+Проверка категории при записи трат и доходов без похода в БД на каждую запись.
+
+Категории пользователя загружаются одним запросом в карту id -> (тип, владелец)
+и держатся в памяти воркера. Запросы и пачки импорта одного пользователя
+проверяют категории по этой карте. Промах (категория создана в другом воркере
+или чужая) — один точечный запрос.
+
+Карта помечена поколением пользователя из Memcached (categories:gen:{user_id}),
+которое растёт после commit изменения категорий в любом воркере. Проверка
+поколения — один GET вместо запроса в БД; карта со старым поколением
+перечитывается, поэтому удалённая в другом воркере категория не проходит
+проверку и вставка не падает на внешнем ключе. Без Memcached карта
+устаревает не дольше LOCAL_TTL_SECONDS.
+"""
+
+import logging
+import time
+from functools import partial
+from typing import Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.memcached.session import memcached_session
+from app.core.utils import LocalTTLCache
+from app.db.database import CommitHookSession
+from app.db.models.category import TypesOfCat
+from app.schemas.dataclasses.category import CategoryRefDTO
+from app.service.category import crud as category_crud
+from app.service.category.exception import (
+    CategoryNotFoundException,
+    CategoryPermissionException,
+    CategoryTypeException,
+)
+
+logger = logging.getLogger(__name__)
+
+LOCAL_TTL_SECONDS = 30
+GENERATION_TTL_SECONDS = 0  # поколение не истекает
+
+# user_id -> (поколение, карта категорий)
+local_categories = LocalTTLCache(maxsize=10_000, ttl=LOCAL_TTL_SECONDS)
+
+
+def _generation_key(user_id: int) -> str:
+    return f"categories:gen:{user_id}"
+
+
+def _seed() -> str:
+    # после вытеснения счётчика начинаем не с 1, чтобы не совпасть со старым поколением
+    return str(time.time_ns())
+
+
+async def _get_generation(user_id: int) -> str | None:
+    """Текущее поколение категорий пользователя; None — Memcached недоступен"""
+
+    key = _generation_key(user_id)
+    try:
+        generation = await memcached_session.get(key)
+        if generation is None:
+            await memcached_session.add(key, _seed(), exptime=GENERATION_TTL_SECONDS)
+            generation = await memcached_session.get(key)
+    except Exception as e:
+        logger.warning("Category cache read error: %s", e)
+        return None
+    return generation.decode() if generation else "0"
+
+
+async def get_user_categories(
+    db: AsyncSession, user_id: int, refresh: bool = False
+) -> Dict[int, CategoryRefDTO]:
+    """Карта категорий пользователя; refresh=True — перечитать из БД"""
+
+    # поколение берём до чтения из БД: изменение во время чтения его сменит
+    generation = await _get_generation(user_id)
+    cached = None if refresh else local_categories.get(user_id)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+
+    categories = await category_crud.get_category_refs(db, user_id)
+    local_categories.set(user_id, (generation, categories))
+    return categories
+
+
+async def resolve_category(
+    db: AsyncSession, user_id: int, category_id: int, expected_type: TypesOfCat
+) -> CategoryRefDTO:
+    """Проверяет, что категория существует, принадлежит пользователю и нужного типа"""
+
+    categories = await get_user_categories(db, user_id)
+    category = categories.get(category_id)
+
+    if category is None:
+        found = await category_crud.get_category_by_id(db, category_id)
+        if found is None:
+            raise CategoryNotFoundException("Категория не найдена")
+        if found.user_id != user_id:
+            raise CategoryPermissionException("Категория не принадлежит пользователю")
+        category = CategoryRefDTO(
+            type_of_category=found.type_of_category, user_id=found.user_id
+        )
+        categories[category_id] = category
+
+    if category.type_of_category != expected_type:
+        raise CategoryTypeException("Тип категории не подходит для операции")
+
+    return category
+
+
+async def invalidate(user_id: int) -> None:
+    """Сбрасывает карту категорий пользователя во всех воркерах: INCR поколения"""
+
+    local_categories.delete(user_id)
+
+    key = _generation_key(user_id)
+    try:
+        if await memcached_session.incr(key) is None:
+            await memcached_session.add(key, _seed(), exptime=GENERATION_TTL_SECONDS)
+    except Exception as e:
+        logger.warning("Category cache invalidation error: %s", e)
+
+
+def invalidate_on_commit(db: CommitHookSession, user_id: int) -> None:
+    """
+    Сбрасывает карту после commit: до него параллельный запрос прочитал бы
+    из БД старые категории под новым поколением.
+    """
+
+    db.after_commit(partial(invalidate, user_id))
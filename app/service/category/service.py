@@ -2,10 +2,12 @@ from typing import List
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import User
 from app.schemas.category import CreateCategory, CategoryUpdate
 from app.schemas.dataclasses.category import CategoryDTO
+from app.schemas.dataclasses.user import UserPrincipalDTO
 from app.service.category import crud as category_crud
+from app.service.category import resolver as category_resolver
+from app.service.stats import cache as stats_cache
 from app.service.category.exception import (
     CategoryNotFoundException,
     CategoryPermissionException,
@@ -16,16 +18,18 @@ class CategoryService:
     """Сервис категорий: создание, изменение, удаление"""
 
     async def create_category(
-        self, db: AsyncSession, category: CreateCategory, current_user: User
+        self, db: AsyncSession, category: CreateCategory, current_user: UserPrincipalDTO
     ) -> CategoryDTO:
         """Создание категории"""
         new_category: CategoryDTO = await category_crud.create_category(
             db, category, current_user.id
         )
+        category_resolver.invalidate_on_commit(db, current_user.id)
+        stats_cache.invalidate_on_commit(db, current_user.id)
         return new_category
 
     async def get_categories(
-        self, db: AsyncSession, current_user: User, skip: int, limit: int
+        self, db: AsyncSession, current_user: UserPrincipalDTO, skip: int, limit: int
     ) -> List[CategoryDTO]:
         """Получение категорий пользователя"""
         categories: List[CategoryDTO] = await category_crud.get_categories(
@@ -34,7 +38,7 @@ class CategoryService:
         return categories
 
     async def get_category(
-        self, db: AsyncSession, category_id: int, current_user: User
+        self, db: AsyncSession, category_id: int, current_user: UserPrincipalDTO
     ) -> CategoryDTO:
         """Получение категории пользователя по id"""
 
@@ -53,7 +57,7 @@ class CategoryService:
         db: AsyncSession,
         category_id: int,
         category: CategoryUpdate,
-        current_user: User,
+        current_user: UserPrincipalDTO,
     ) -> CategoryDTO:
         """Обновляет категорию по id и возвращает ее"""
 
@@ -70,11 +74,13 @@ class CategoryService:
         updated_category: CategoryDTO = await category_crud.update_category(
             db, category_id, category
         )
+        category_resolver.invalidate_on_commit(db, current_user.id)
+        stats_cache.invalidate_on_commit(db, current_user.id)
 
         return updated_category
 
     async def delete_category(
-        self, db: AsyncSession, category_id: int, current_user: User
+        self, db: AsyncSession, category_id: int, current_user: UserPrincipalDTO
     ) -> None:
         """Удаляет категорию и ничего не возвращает"""
         category = await category_crud.get_category_by_id(db, category_id)
@@ -85,3 +91,5 @@ class CategoryService:
             raise CategoryPermissionException("Категория не принадлежит пользователю")
 
         await category_crud.delete_category(db, category_id)
+        category_resolver.invalidate_on_commit(db, current_user.id)
+        stats_cache.invalidate_on_commit(db, current_user.id)
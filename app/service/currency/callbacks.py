@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from app.core.settings import settings
+from app.db.database import async_session
+from app.service.currency import crud as currency_crud
+from app.service.currency.service import currency_service
+
+logger = logging.getLogger(__name__)
+
+
+async def run_rates_worker():
+    """
+    История курсов: раз в CURRENCY_RATES_SNAPSHOT_SECONDS записывает текущие
+    курсы в currency_rates на сегодняшний день (UTC), перезаписывая прежние
+    за этот день. Курсы берутся из общего кеша, внешний API не дёргается.
+    """
+    if settings.CURRENCY_RATES_SNAPSHOT_SECONDS <= 0:
+        return
+
+    while True:
+        try:
+            rates = await currency_service.get_rates()
+            if rates is not None:
+                async with async_session() as session:
+                    await currency_crud.save_rates(
+                        session,
+                        datetime.now(timezone.utc).date(),
+                        {
+                            code.upper(): rates[code]
+                            for code in ("usd", "eur", "cny")
+                            if rates.get(code)
+                        },
+                    )
+                    await session.commit()
+        except Exception:
+            logger.exception("Currency rates snapshot failed")
+        await asyncio.sleep(settings.CURRENCY_RATES_SNAPSHOT_SECONDS)
+
+
+async def close_currency_client():
+    """Закрывает общий HTTP-клиент провайдера курсов"""
+    await currency_service.aclose()
+
+
+startup_callbacks = [
+    run_rates_worker,
+]
+
+shutdown_callbacks = [
+    close_currency_client,
+]
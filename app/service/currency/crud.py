@@ -0,0 +1,139 @@
+"""
+История курсов и пересчёт сумм в SQL.
+
+Суммы конвертируются прямо в агрегирующих запросах: к каждой строке
+(или строке rollup) подставляется курс её валюты на её день коррелированным
+подзапросом по первичному ключу currency_rates, и SUM считается уже по
+пересчитанным значениям — построчной работы в Python нет. Для длинной
+истории (сальдо баланса) суммы сначала группируются по дню и валюте и
+соединяются с интервалами курсов одним JOIN (sum_converted).
+
+Сумма, для валюты которой курса нет вовсе, пересчитывается в NULL и в SUM
+не попадает: считать её рублями было бы хуже, чем не считать.
+"""
+
+from datetime import date
+from typing import Dict
+
+from sqlalchemy import (
+    ColumnElement,
+    ScalarSelect,
+    Subquery,
+    and_,
+    case,
+    func,
+    literal,
+    or_,
+    select,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.utils import dialect_insert
+from app.db import CurrencyRate
+from app.db.models.currency_rate import RATES_BASE_CURRENCY
+
+
+async def save_rates(db: AsyncSession, day: date, rates: Dict[str, float]) -> None:
+    """Записывает курсы на день (рублей за единицу валюты), перезаписывая прежние"""
+
+    if not rates:
+        return
+
+    upsert = dialect_insert(db)
+    stmt = upsert(CurrencyRate).values(
+        [
+            {"currency": currency, "day": day, "rate": rate}
+            for currency, rate in rates.items()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CurrencyRate.currency, CurrencyRate.day],
+        set_={"rate": stmt.excluded.rate, "updated_at": func.now()},
+    )
+    await db.execute(stmt)
+
+
+def rate_on(currency, day) -> ColumnElement:
+    """
+    Курс валюты на день: последний известный не позже day, а для дней до
+    начала истории — самый ранний. Рубль всегда 1, валюта без истории — NULL.
+    """
+
+    def nearest(*conditions, order):
+        return (
+            select(CurrencyRate.rate)
+            .where(CurrencyRate.currency == currency, *conditions)
+            .order_by(order)
+            .limit(1)
+            .scalar_subquery()
+        )
+
+    return case(
+        (currency == RATES_BASE_CURRENCY, 1),
+        else_=func.coalesce(
+            nearest(CurrencyRate.day <= day, order=CurrencyRate.day.desc()),
+            nearest(order=CurrencyRate.day.asc()),
+        ),
+    )
+
+
+def convert(value, currency, day, target: str) -> ColumnElement:
+    """
+    Сумма value в валюте currency, пересчитанная в target по курсам дня day.
+    Без известного курса — NULL: сумма не попадает в SUM.
+    """
+
+    converted = value * rate_on(currency, day)
+    if target != RATES_BASE_CURRENCY:
+        converted = converted / rate_on(literal(target), day)
+    return case((currency == target, value), else_=converted)
+
+
+def rate_ranges() -> Subquery:
+    """
+    Курсы интервалами [valid_from, valid_to): курс действует со своего дня до
+    следующего известного. У самого раннего курса valid_from — NULL (он же
+    действует до начала истории), у последнего valid_to — NULL.
+    """
+
+    window = dict(partition_by=CurrencyRate.currency, order_by=CurrencyRate.day)
+    previous = func.lag(CurrencyRate.day).over(**window)
+    return select(
+        CurrencyRate.currency,
+        case((previous.is_(None), None), else_=CurrencyRate.day).label("valid_from"),
+        func.lead(CurrencyRate.day).over(**window).label("valid_to"),
+        CurrencyRate.rate,
+    ).subquery()
+
+
+def _covers(ranges: Subquery, currency, day) -> ColumnElement:
+    return and_(
+        ranges.c.currency == currency,
+        or_(ranges.c.valid_from.is_(None), ranges.c.valid_from <= day),
+        or_(ranges.c.valid_to.is_(None), ranges.c.valid_to > day),
+    )
+
+
+def sum_converted(rows: Subquery, target: str) -> ScalarSelect:
+    """
+    SUM(rows.c.amount) в target. rows — суммы, сгруппированные по колонкам
+    currency и day: курс подставляется одним JOIN с интервалами курсов на
+    группу, а не коррелированным подзапросом на каждую строку.
+    """
+
+    source = rate_ranges()
+    joined = rows.outerjoin(source, _covers(source, rows.c.currency, rows.c.day))
+    rate = case((rows.c.currency == RATES_BASE_CURRENCY, 1), else_=source.c.rate)
+    converted = rows.c.amount * rate
+
+    if target != RATES_BASE_CURRENCY:
+        destination = rate_ranges()
+        joined = joined.outerjoin(
+            destination, _covers(destination, literal(target), rows.c.day)
+        )
+        converted = converted / destination.c.rate
+
+    amount = case((rows.c.currency == target, rows.c.amount), else_=converted)
+    return (
+        select(func.coalesce(func.sum(amount), 0)).select_from(joined).scalar_subquery()
+    )
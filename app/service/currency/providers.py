@@ -0,0 +1,65 @@
+"""
+Источники курсов валют для CurrencyRatesService.
+
+Провайдер возвращает сырые курсы {"USD": ..., ...} относительно рубля
+(сколько единиц валюты за 1 RUB) или бросает исключение.
+"""
+
+from typing import Dict
+
+import httpx
+
+EXTERNAL_API_URL = "https://open.er-api.com/v6/latest/RUB"
+TIMEOUT_SECONDS = 5
+
+
+class RatesProvider:
+    """Базовый провайдер курсов"""
+
+    async def fetch(self) -> Dict[str, float]:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        pass
+
+
+class HttpRatesProvider(RatesProvider):
+    """
+    Курсы из open.er-api.com через один httpx.AsyncClient на всё время жизни
+    приложения: соединение и TLS-сессия переиспользуются между обновлениями
+    """
+
+    def __init__(self, url: str = EXTERNAL_API_URL, timeout: float = TIMEOUT_SECONDS):
+        self.url = url
+        self.timeout = timeout
+        self._client: httpx.AsyncClient | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=2),
+            )
+        return self._client
+
+    async def fetch(self) -> Dict[str, float]:
+        response = await self._get_client().get(self.url)
+        response.raise_for_status()
+        return response.json().get("rates", {})
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class StaticRatesProvider(RatesProvider):
+    """Фиксированные курсы без сети — для тестов и локального запуска"""
+
+    def __init__(self, rates: Dict[str, float]):
+        self.rates = dict(rates)
+        self.calls = 0
+
+    async def fetch(self) -> Dict[str, float]:
+        self.calls += 1
+        return dict(self.rates)
@@ -1,73 +1,210 @@
 """
 Сервис получения курсов валют через сторонний API.
 Используется бесплатный API: https://open.er-api.com (не требует ключа для базового использования).
-Настройка через переменные окружения: CURRENCY_API_KEY (если потребуется).
+
+Снимок курсов общий для всех воркеров и лежит в Memcached; внешний API
+вызывает только воркер, взявший блокировку через ADD, остальные читают его
+снимок. Поверх снимка у каждого процесса локальная копия, живущая до
+истечения снимка, поэтому чтение курсов не выходит из процесса.
+
+Одновременные промахи в процессе ждут одно общее обновление (single-flight),
+а за REFRESH_AHEAD_SECONDS до истечения кеш обновляется в фоне, пока запросы
+получают текущие курсы (stale-while-revalidate). Источник курсов
+подменяется через set_provider.
 """
 
+import asyncio
+import json
 import logging
 import time
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
-import httpx
+from app.core.memcached.session import AsyncMemcached, memcached_session
+from app.service.currency.providers import HttpRatesProvider, RatesProvider
 
 logger = logging.getLogger(__name__)
 
-# Кешируем курсы, чтобы не спамить внешний API
-_cache: dict = {"data": None, "expires_at": 0.0}
-
-EXTERNAL_API_URL = "https://open.er-api.com/v6/latest/RUB"
-TIMEOUT_SECONDS = 5
 CACHE_TTL_SECONDS = 3600  # 1 час
+REFRESH_AHEAD_SECONDS = 300  # фоновое обновление за 5 минут до истечения
 
+SHARED_KEY = "currency:rates"
+LOCK_KEY = "currency:rates:lock"
+# устаревший снимок храним сутки: его отдаём, если внешний API недоступен
+SHARED_EXPTIME_SECONDS = 24 * 3600
+LOCK_TTL_SECONDS = 30  # блокировка освободится сама, если воркер упал
+LOCK_WAIT_SECONDS = 2.0  # холодный старт: сколько ждать снимок другого воркера
+LOCK_POLL_SECONDS = 0.1
+RETRY_SECONDS = 1.0  # пока обновляет другой воркер, перечитываем снимок не чаще
+ERROR_BACKOFF_SECONDS = 60.0  # после ошибки API столько отдаём устаревшие курсы
 
-async def get_currency_rates() -> Optional[dict]:
-    """
-    Возвращает курсы USD, EUR, CNY к рублю.
-    Результат кешируется на 1 час.
-    При ошибке внешнего API возвращает None (graceful degradation).
-    """
-    now = time.monotonic()
-
-    # Отдаём из кеша, если актуально
-    if _cache["data"] is not None and now < _cache["expires_at"]:
-        return _cache["data"]
-
-    try:
-        async with httpx.AsyncClient(timeout=TIMEOUT_SECONDS) as client:
-            response = await client.get(EXTERNAL_API_URL)
-            response.raise_for_status()
-            raw = response.json()
-    except httpx.TimeoutException:
-        logger.warning("Currency API timeout")
-        return _cache["data"]  # вернём старый кеш, если есть
-    except httpx.HTTPStatusError as e:
-        logger.warning("Currency API HTTP error: %s", e)
-        return _cache["data"]
-    except Exception as e:
-        logger.warning("Currency API error: %s", e)
-        return _cache["data"]
-
-    rates = raw.get("rates", {})
-
-    # Курсы в ответе: сколько RUB за 1 USD/EUR/CNY → инвертируем
+
+def _to_result(rates: Dict[str, float]) -> dict:
+    # open.er-api с base=RUB даёт rates[USD] = 0.011... (1 RUB = 0.011 USD)
+    # → нам нужно сколько RUB стоит 1 USD = 1 / rates[USD]
     def safe_rate(code: str) -> Optional[float]:
         r = rates.get(code)
         if r and r != 0:
-            return round(1 / r, 4)  # 1 RUB = 1/r CODE → 1 CODE = r RUB
+            return round(1 / r, 4)
         return None
 
-    # Проверяем структуру: open.er-api с base=RUB уже даёт "сколько RUB за единицу",
-    # но если base=RUB, то rates[USD] = 0.011... (1 RUB = 0.011 USD)
-    # → нам нужно сколько RUB стоит 1 USD = 1 / rates[USD]
-    result = {
+    return {
         "usd": safe_rate("USD"),
         "eur": safe_rate("EUR"),
         "cny": safe_rate("CNY"),
         "updated_at": datetime.utcnow().isoformat(),
     }
 
-    _cache["data"] = result
-    _cache["expires_at"] = now + CACHE_TTL_SECONDS
 
-    return result
+class CurrencyRatesService:
+    """Курсы USD, EUR, CNY к рублю: локальная копия поверх общего снимка"""
+
+    def __init__(
+        self,
+        provider: RatesProvider,
+        cache: AsyncMemcached = memcached_session,
+        ttl: float = CACHE_TTL_SECONDS,
+        refresh_ahead: float = REFRESH_AHEAD_SECONDS,
+    ):
+        self.provider = provider
+        self.cache = cache
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self._data: dict | None = None
+        self._expires_at = 0.0
+        self._retry_at = 0.0
+        self._refresh_task: asyncio.Task | None = None
+
+    async def get_rates(self) -> Optional[dict]:
+        """
+        Актуальные курсы. При ошибке внешнего API возвращает последние
+        полученные курсы (и следующие ERROR_BACKOFF_SECONDS не повторяет
+        запрос) или None, если их ещё не было (graceful degradation).
+        """
+
+        now = time.monotonic()
+        if self._data is not None and now < self._expires_at:
+            if now >= self._expires_at - self.refresh_ahead and now >= self._retry_at:
+                self._refresh()  # обновляем в фоне, отдаём текущие
+            return self._data
+
+        # shield: отмена одного запроса не отменяет общее обновление
+        return await asyncio.shield(self._refresh())
+
+    def _refresh(self) -> asyncio.Task:
+        """Текущее обновление или новое, если его нет (single-flight)"""
+
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._load())
+        return self._refresh_task
+
+    async def _load(self) -> Optional[dict]:
+        snapshot = await self._read_shared()
+        if snapshot is not None and self._age(snapshot) < self.ttl - self.refresh_ahead:
+            return self._adopt(snapshot)
+
+        if not await self._lock():
+            # обновляет другой воркер: отдаём имеющийся снимок,
+            # а при холодном старте ждём его снимок
+            if snapshot is None:
+                snapshot = await self._wait_shared()
+            if snapshot is not None:
+                self._retry_at = time.monotonic() + RETRY_SECONDS
+                return self._adopt(snapshot)
+            return await self._fetch(None)
+
+        try:
+            return await self._fetch(snapshot)
+        finally:
+            await self._unlock()
+
+    async def _fetch(self, fallback: dict | None) -> Optional[dict]:
+        try:
+            rates = await self.provider.fetch()
+        except Exception as e:
+            logger.warning("Currency API error: %s", e)
+            if self._data is None and fallback is not None:
+                self._adopt(fallback)
+            # не ходим в API на каждом запросе, пока он лежит
+            self._retry_at = time.monotonic() + ERROR_BACKOFF_SECONDS
+            if self._data is not None:
+                self._expires_at = max(self._expires_at, self._retry_at)
+            return self._data
+
+        snapshot = {"data": _to_result(rates), "fetched_at": time.time()}
+        await self._write_shared(snapshot)
+        return self._adopt(snapshot)
+
+    @staticmethod
+    def _age(snapshot: dict) -> float:
+        return time.time() - snapshot["fetched_at"]
+
+    def _adopt(self, snapshot: dict) -> dict:
+        """Локальная копия снимка живёт столько же, сколько снимок"""
+
+        self._data = snapshot["data"]
+        self._expires_at = time.monotonic() + max(self.ttl - self._age(snapshot), 0)
+        return self._data
+
+    async def _read_shared(self) -> dict | None:
+        try:
+            data = await self.cache.get(SHARED_KEY)
+        except Exception as e:
+            logger.warning("Currency cache read error: %s", e)
+            return None
+        return json.loads(data) if data else None
+
+    async def _write_shared(self, snapshot: dict) -> None:
+        try:
+            await self.cache.set(
+                SHARED_KEY, json.dumps(snapshot), exptime=SHARED_EXPTIME_SECONDS
+            )
+        except Exception as e:
+            logger.warning("Currency cache write error: %s", e)
+
+    async def _wait_shared(self) -> dict | None:
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_SECONDS)
+            snapshot = await self._read_shared()
+            if snapshot is not None:
+                return snapshot
+        return None
+
+    async def _lock(self) -> bool:
+        """ADD атомарен во всём кластере; без Memcached обновляем сами"""
+
+        try:
+            return await self.cache.add(LOCK_KEY, "1", exptime=LOCK_TTL_SECONDS)
+        except Exception as e:
+            logger.warning("Currency cache lock error: %s", e)
+            return True
+
+    async def _unlock(self) -> None:
+        try:
+            await self.cache.delete(LOCK_KEY)
+        except Exception as e:
+            logger.warning("Currency cache unlock error: %s", e)
+
+    def set_provider(self, provider: RatesProvider) -> None:
+        """Подменяет источник курсов и сбрасывает локальную копию"""
+
+        self.provider = provider
+        self._data = None
+        self._expires_at = 0.0
+        self._retry_at = 0.0
+        self._refresh_task = None
+
+    async def aclose(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        await self.provider.aclose()
+
+
+currency_service = CurrencyRatesService(HttpRatesProvider())
+
+
+async def get_currency_rates() -> Optional[dict]:
+    """Возвращает курсы USD, EUR, CNY к рублю (см. CurrencyRatesService)"""
+
+    return await currency_service.get_rates()
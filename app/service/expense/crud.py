@@ -1,13 +1,77 @@
-import asyncio
-from datetime import datetime
-from typing import List, Optional, Tuple
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-from sqlalchemy import select, update, func, desc, asc
+from sqlalchemy import Row, delete, insert, select, update, func, desc, asc
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import Expense
+from app.core.pagination import keyset_filter
+from app.core.utils import dialect_insert
+from app.db import Expense, ExpenseDailyRollup
 from app.schemas.dataclasses.expense import ExpenseDTO
 from app.schemas.expense import ExpenseCreate, ExpenseUpdate
+from app.service.currency import crud as currency_crud
+from app.service.stats import buckets
+
+STREAM_BATCH_SIZE = 1000
+
+
+async def _apply_rollup_deltas(
+    db: AsyncSession,
+    user_id: int,
+    deltas: Dict[Tuple[int, date, str], Tuple[float, int]],
+) -> None:
+    """
+    Добавляет дельты к дневным суммам трат одним upsert в expense_daily_rollup.
+    deltas: (category_id, day, currency) -> (сумма, количество)
+    """
+
+    if not deltas:
+        return
+
+    upsert = dialect_insert(db)
+    stmt = upsert(ExpenseDailyRollup).values(
+        [
+            {
+                "user_id": user_id,
+                "category_id": category_id,
+                "day": day,
+                "currency": currency,
+                "total": amount,
+                "count": count,
+            }
+            for (category_id, day, currency), (amount, count) in deltas.items()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            ExpenseDailyRollup.user_id,
+            ExpenseDailyRollup.category_id,
+            ExpenseDailyRollup.day,
+            ExpenseDailyRollup.currency,
+        ],
+        set_={
+            "total": ExpenseDailyRollup.total + stmt.excluded.total,
+            "count": ExpenseDailyRollup.count + stmt.excluded.count,
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+async def _apply_rollup_delta(
+    db: AsyncSession,
+    user_id: int,
+    category_id: int,
+    day: date,
+    currency: str,
+    amount: float,
+    count: int,
+) -> None:
+    """Добавляет дельту к дневной сумме трат одной категории в одной валюте"""
+
+    await _apply_rollup_deltas(
+        db, user_id, {(category_id, day, currency): (amount, count)}
+    )
 
 
 async def create_expense(
@@ -15,23 +79,71 @@ async def create_expense(
     new_expense: ExpenseCreate | ExpenseUpdate,
     user_id: int,
     image_key: str,
+    tz: str = "UTC",
 ) -> Expense:
-    """Добавляет трату в БД"""
+    """Добавляет трату в БД; день в rollup — локальный день пользователя (tz)"""
 
     new_expense = Expense(
         user_id=user_id,
-        expense_date=new_expense.expense_date,
+        expense_date=buckets.as_utc(new_expense.expense_date),
         category_id=new_expense.category_id,
         value=new_expense.cost,
+        currency=new_expense.currency,
         image_key=image_key,
         comment=new_expense.comment,
     )
     db.add(new_expense)
     await db.flush()
     await db.refresh(new_expense)
+
+    await _apply_rollup_delta(
+        db,
+        user_id,
+        new_expense.category_id,
+        buckets.local_day(new_expense.expense_date, tz),
+        new_expense.currency,
+        new_expense.value,
+        1,
+    )
     return new_expense
 
 
+async def bulk_create_expenses(
+    db: AsyncSession, user_id: int, expenses: List[ExpenseCreate], tz: str = "UTC"
+) -> int:
+    """
+    Вставляет пачку трат (executemany -> multi-row INSERT) и обновляет rollup
+    одним upsert на пачку. Возвращает количество вставленных строк.
+    """
+
+    if not expenses:
+        return 0
+
+    await db.execute(
+        insert(Expense),
+        [
+            {
+                "user_id": user_id,
+                "expense_date": buckets.as_utc(e.expense_date),
+                "category_id": e.category_id,
+                "value": e.cost,
+                "currency": e.currency,
+                "comment": e.comment,
+            }
+            for e in expenses
+        ],
+    )
+
+    deltas: Dict[Tuple[int, date, str], Tuple[float, int]] = {}
+    for e in expenses:
+        key = (e.category_id, buckets.local_day(e.expense_date, tz), e.currency)
+        amount, count = deltas.get(key, (0, 0))
+        deltas[key] = (amount + e.cost, count + 1)
+    await _apply_rollup_deltas(db, user_id, deltas)
+
+    return len(expenses)
+
+
 async def get_user_expenses(
     db: AsyncSession,
     user_id: int,
@@ -45,9 +157,16 @@ async def get_user_expenses(
     search: Optional[str] = None,
     sort_by: str = "expense_date",
     sort_order: str = "desc",
-) -> Tuple[List[Expense], int]:
+    cursor: Optional[str] = None,
+    with_total: bool = True,
+    base_currency: str = "RUB",
+) -> Tuple[List[ExpenseDTO], int | None]:
     """
-    Возвращает (список расходов, общее количество записей без пагинации)
+    Возвращает (список расходов, общее количество записей без пагинации).
+
+    С cursor страница выбирается по ключу (sort_by, id) вместо OFFSET;
+    with_total=False пропускает count() — total будет None. Сумма в
+    base_currency считается тем же запросом (колонка base_value).
     """
     # Базовый фильтр
     base_filters = [
@@ -65,23 +184,34 @@ async def get_user_expenses(
     if search:
         base_filters.append(Expense.comment.ilike(f"%{search}%"))
 
-    # 1. Запрос для получения total
-    total_query = select(func.count()).select_from(Expense).where(*base_filters)
+    # 1. total — только если он нужен клиенту
+    total = None
+    if with_total:
+        total_query = select(func.count()).select_from(Expense).where(*base_filters)
+        total = (await db.execute(total_query)).scalar_one()
 
     # 2. Запрос для получения данных с пагинацией и сортировкой
-    data_query = select(Expense).where(*base_filters)
-
-    # сортировка
     column = getattr(Expense, sort_by)
-    order = desc(column) if sort_order == "desc" else asc(column)
-    data_query = data_query.order_by(order).offset(skip).limit(limit)
-
-    # выполняем оба запроса параллельно
-    total_result, data_result = await asyncio.gather(
-        db.execute(total_query), db.execute(data_query)
+    base_value = currency_crud.convert(
+        Expense.value,
+        Expense.currency,
+        buckets.day_of(db, Expense.expense_date),
+        base_currency,
     )
+    data_query = select(Expense, base_value.label("base_value")).where(*base_filters)
 
-    total = total_result.scalar_one()
+    if cursor:
+        data_query = data_query.where(
+            keyset_filter(column, Expense.id, cursor, sort_by, sort_order)
+        )
+    else:
+        data_query = data_query.offset(skip)
+
+    # сортировка: id — однозначный порядок при равных значениях
+    order = desc if sort_order == "desc" else asc
+    data_query = data_query.order_by(order(column), order(Expense.id)).limit(limit)
+
+    data_result = await db.execute(data_query)
     expenses = [
         ExpenseDTO(
             id=e.id,
@@ -91,13 +221,42 @@ async def get_user_expenses(
             value=e.value,
             comment=e.comment,
             image_key=e.image_key,
+            currency=e.currency,
+            base_value=float(base) if base is not None else None,
         )
-        for e in data_result.scalars().all()
+        for e, base in data_result.all()
     ]
 
     return expenses, total
 
 
+async def stream_user_expenses(
+    db: AsyncSession, user_id: int, from_date: datetime, to_date: datetime
+) -> AsyncIterator[Row]:
+    """Траты за период через серверный курсор: строки приходят пачками по yield_per"""
+
+    stmt = (
+        select(
+            Expense.id,
+            Expense.expense_date.label("date"),
+            Expense.category_id,
+            Expense.value.label("amount"),
+            Expense.comment,
+            Expense.currency,
+        )
+        .where(
+            Expense.user_id == user_id,
+            Expense.expense_date >= from_date,
+            Expense.expense_date <= to_date,
+        )
+        .order_by(Expense.expense_date, Expense.id)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+    result = await db.stream(stmt)
+    async for row in result:
+        yield row
+
+
 async def get_expense_by_id(db: AsyncSession, spending_id: int) -> Expense:
     """возвращает трату по id"""
 
@@ -108,26 +267,102 @@ async def get_expense_by_id(db: AsyncSession, spending_id: int) -> Expense:
 
 
 async def update_expense(
-    db: AsyncSession, expense_id: int, new_expense: ExpenseUpdate, user_id: int
+    db: AsyncSession, expense: Expense, new_expense: ExpenseUpdate, tz: str = "UTC"
 ) -> None:
-    """Обновляет трату"""
+    """Обновляет трату и переносит её сумму в дневной rollup"""
+
+    # старые значения запоминаем до UPDATE: ORM синхронизирует объект после него
+    old_category_id = expense.category_id
+    old_day = buckets.local_day(expense.expense_date, tz)
+    old_currency = expense.currency
+    old_value = expense.value
 
     stmt = (
         update(Expense)
-        .where(Expense.id == expense_id)
+        .where(Expense.id == expense.id)
         .values(
-            expense_date=new_expense.expense_date,
+            expense_date=buckets.as_utc(new_expense.expense_date),
             category_id=new_expense.category_id,
             value=new_expense.cost,
+            currency=new_expense.currency or old_currency,
             comment=new_expense.comment,
         )
+        .returning(
+            Expense.expense_date, Expense.category_id, Expense.currency, Expense.value
+        )
+    )
+    res = await db.execute(stmt)
+    row = res.one()
+
+    await _apply_rollup_delta(
+        db, expense.user_id, old_category_id, old_day, old_currency, -old_value, -1
+    )
+    await _apply_rollup_delta(
+        db,
+        expense.user_id,
+        row.category_id,
+        buckets.local_day(row.expense_date, tz),
+        row.currency,
+        row.value,
+        1,
     )
-    await db.execute(stmt)
     await db.flush()
 
 
-async def delete_expense(db: AsyncSession, expense: Expense) -> None:
-    """Удаляет трату"""
+async def delete_expense(db: AsyncSession, expense: Expense, tz: str = "UTC") -> None:
+    """Удаляет трату и вычитает её из дневного rollup"""
 
+    await _apply_rollup_delta(
+        db,
+        expense.user_id,
+        expense.category_id,
+        buckets.local_day(expense.expense_date, tz),
+        expense.currency,
+        -expense.value,
+        -1,
+    )
     await db.delete(expense)
     await db.flush()
+
+
+async def rebuild_rollup(db: AsyncSession, user_id: int, tz: str) -> None:
+    """
+    Пересобирает дневной rollup пользователя из сырых трат по локальным
+    дням пояса tz — после смены часового пояса прежние дни неверны
+    """
+
+    await db.execute(
+        delete(ExpenseDailyRollup).where(ExpenseDailyRollup.user_id == user_id)
+    )
+
+    day = buckets.day_of(db, Expense.expense_date, tz)
+    rows = (
+        select(
+            Expense.user_id,
+            Expense.category_id,
+            day,
+            Expense.currency,
+            func.sum(Expense.value),
+            func.count(),
+        )
+        .where(Expense.user_id == user_id)
+        .group_by(Expense.user_id, Expense.category_id, day, Expense.currency)
+    )
+    await db.execute(
+        insert(ExpenseDailyRollup).from_select(
+            ["user_id", "category_id", "day", "currency", "total", "count"], rows
+        )
+    )
+
+
+async def get_image_keys(
+    db: AsyncSession, user_id: int, expense_ids: List[int]
+) -> Dict[int, str]:
+    """Ключи картинок записей пользователя из списка id одним запросом"""
+
+    stmt = select(Expense.id, Expense.image_key).where(
+        Expense.user_id == user_id,
+        Expense.id.in_(expense_ids),
+        Expense.image_key.is_not(None),
+    )
+    return {row.id: row.image_key for row in await db.execute(stmt)}
@@ -1,58 +1,49 @@
 from datetime import datetime
-from typing import Tuple
+from typing import Dict, List, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.s3.service import delete_file
+from app.core.s3.service import delete_file, get_download_urls
 from app.db.models.category import TypesOfCat
-from app.schemas.dataclasses.category import CategoryDTO
 from app.schemas.dataclasses.expense import ExpenseDTO
 from app.schemas.expense import ExpenseCreate, ExpenseUpdate
-from app.service.category.crud import get_category_by_id
-from app.service.category.exception import (
-    CategoryNotFoundException,
-    CategoryTypeException,
-)
+from app.service.category.resolver import resolve_category
 from app.service.expense import crud as expense_crud
 from app.service.expense.exception import (
     ExpenseNotFoundException,
     ExpenseUserPermissionDeniedException,
 )
+from app.service.stats import cache as stats_cache
+from app.service.summary import crud as summary_crud
 
 
 class ExpenseService:
     """Сервис трат: создание, удаление, изменение, получение"""
 
-    @staticmethod
-    async def _validate_category(db: AsyncSession, category_id: int) -> CategoryDTO:
-        category_exists = await get_category_by_id(db, category_id)
-        if not category_exists:
-            raise CategoryNotFoundException("Категория не найдена")
-        return category_exists
-
     async def create_expense(
         self,
         db: AsyncSession,
         spending: ExpenseCreate,
         user_id: int,
         image_key: str | None = None,
+        tz: str = "UTC",
     ) -> ExpenseDTO:
-        """Создание траты в БД"""
-
-        category = await self._validate_category(db, spending.category_id)
+        """Создание траты в БД; tz — часовой пояс пользователя для rollup"""
 
-        if not category.type_of_category == TypesOfCat.EXPENSE:
-            raise CategoryTypeException("Тип категории не трата")
+        await resolve_category(db, user_id, spending.category_id, TypesOfCat.EXPENSE)
 
         new_expense = await expense_crud.create_expense(
-            db, spending, user_id, image_key
+            db, spending, user_id, image_key, tz
         )
+        await summary_crud.invalidate_from(db, user_id, spending.expense_date)
+        stats_cache.invalidate_on_commit(db, user_id)
         return ExpenseDTO(
             id=new_expense.id,
             expense_date=new_expense.expense_date,
             user_id=new_expense.user_id,
             category_id=new_expense.category_id,
             value=new_expense.value,
+            currency=new_expense.currency,
             image_key=image_key,
             comment=new_expense.comment,
         )
@@ -71,7 +62,10 @@ class ExpenseService:
         search: str | None = None,
         sort_by: str = "expense_date",
         sort_order: str = "desc",
-    ) -> Tuple[list[ExpenseDTO], float]:
+        cursor: str | None = None,
+        with_total: bool = True,
+        base_currency: str = "RUB",
+    ) -> Tuple[list[ExpenseDTO], float | None]:
 
         expenses, total = await expense_crud.get_user_expenses(
             db=db,
@@ -86,6 +80,9 @@ class ExpenseService:
             search=search,
             sort_by=sort_by,
             sort_order=sort_order,
+            cursor=cursor,
+            with_total=with_total,
+            base_currency=base_currency,
         )
 
         return expenses, total
@@ -110,6 +107,7 @@ class ExpenseService:
             user_id=expense.user_id,
             category_id=expense.category_id,
             value=expense.value,
+            currency=expense.currency,
             image_key=expense.image_key,
             comment=expense.comment,
         )
@@ -120,12 +118,13 @@ class ExpenseService:
         expense_id: int,
         new_expense: ExpenseUpdate,
         user_id: int,
+        tz: str = "UTC",
     ) -> ExpenseDTO:
         """Обновляет трату и возвращает обновленную трату пользователю | идемпотентен: создаст трату если ее нет"""
 
-        category = await self._validate_category(
-            db, new_expense.category_id
-        )  # Валидация категории траты
+        await resolve_category(
+            db, user_id, new_expense.category_id, TypesOfCat.EXPENSE
+        )  # Валидация категории траты: своя и типа "трата"
         expense = await expense_crud.get_expense_by_id(db, expense_id)
 
         if not expense:
@@ -136,9 +135,14 @@ class ExpenseService:
                 "Трата не принадлежит пользователю"
             )
 
+        old_date = expense.expense_date
         await expense_crud.update_expense(
-            db, expense_id, new_expense, user_id
+            db, expense, new_expense, tz
         )  # обновляем трату
+        await summary_crud.invalidate_from(
+            db, user_id, old_date, new_expense.expense_date
+        )
+        stats_cache.invalidate_on_commit(db, user_id)
 
         return ExpenseDTO(
             id=expense.id,
@@ -146,11 +150,12 @@ class ExpenseService:
             user_id=expense.user_id,
             category_id=expense.category_id,
             value=expense.value,
+            currency=expense.currency,
             image_key=expense.image_key,
             comment=expense.comment,
         )
 
-    async def delete_expense(self, db, expense_id, user_id):
+    async def delete_expense(self, db, expense_id, user_id, tz: str = "UTC"):
         """Удаляет трату пользователя"""
 
         expense = await expense_crud.get_expense_by_id(db, expense_id)
@@ -163,10 +168,12 @@ class ExpenseService:
                 "Трата не принадлежит пользователю"
             )
 
-        await expense_crud.delete_expense(db, expense)
+        await expense_crud.delete_expense(db, expense, tz)
+        await summary_crud.invalidate_from(db, user_id, expense.expense_date)
+        stats_cache.invalidate_on_commit(db, user_id)
 
         if expense.image_key:
-            delete_file(expense.image_key)
+            await delete_file(expense.image_key)
 
         return ExpenseDTO(
             id=expense.id,
@@ -174,6 +181,16 @@ class ExpenseService:
             user_id=expense.user_id,
             category_id=expense.category_id,
             value=expense.value,
+            currency=expense.currency,
             image_key=expense.image_key,
             comment=expense.comment,
         )
+
+    async def get_image_urls(
+        self, db: AsyncSession, expense_ids: List[int], user_id: int
+    ) -> Dict[int, str]:
+        """Ссылки на картинки пачки трат: один запрос к БД и одна пачка подписей"""
+
+        keys = await expense_crud.get_image_keys(db, user_id, expense_ids)
+        urls = await get_download_urls(keys.values())
+        return {expense_id: urls[key] for expense_id, key in keys.items()}
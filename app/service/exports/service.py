@@ -0,0 +1,109 @@
+"""
+Потоковая выгрузка транзакций в CSV/NDJSON.
+
+Строки читаются серверным курсором и кодируются пачками, поэтому память
+не растёт с длиной истории. Колонки CSV совпадают с форматом импорта.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.service.expense import crud as expense_crud
+from app.service.income import crud as income_crud
+
+COLUMNS = ("id", "date", "category_id", "amount", "comment", "currency")
+ROWS_PER_CHUNK = 500
+
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+MEDIA_TYPES = {
+    ExportFormat.csv: "text/csv; charset=utf-8",
+    ExportFormat.ndjson: "application/x-ndjson",
+}
+
+
+def _values(row: Row) -> list:
+    return [
+        row.id,
+        row.date.isoformat(),
+        row.category_id,
+        str(row.amount),
+        row.comment or "",
+        row.currency,
+    ]
+
+
+async def _encode_csv(rows: AsyncIterator[Row]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    count = 0
+
+    async for row in rows:
+        writer.writerow(_values(row))
+        count += 1
+        if count % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode()
+
+
+async def _encode_ndjson(rows: AsyncIterator[Row]) -> AsyncIterator[bytes]:
+    chunk = []
+    async for row in rows:
+        chunk.append(json.dumps(dict(zip(COLUMNS, _values(row))), ensure_ascii=False))
+        if len(chunk) == ROWS_PER_CHUNK:
+            yield ("\n".join(chunk) + "\n").encode()
+            chunk = []
+
+    if chunk:
+        yield ("\n".join(chunk) + "\n").encode()
+
+
+class ExportService:
+    """Сервис выгрузки трат и доходов"""
+
+    @staticmethod
+    def _encode(rows: AsyncIterator[Row], fmt: ExportFormat) -> AsyncIterator[bytes]:
+        if fmt == ExportFormat.ndjson:
+            return _encode_ndjson(rows)
+        return _encode_csv(rows)
+
+    def export_expenses(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        from_date: datetime,
+        to_date: datetime,
+        fmt: ExportFormat,
+    ) -> AsyncIterator[bytes]:
+        """Поток байтов выгрузки трат за период"""
+
+        rows = expense_crud.stream_user_expenses(db, user_id, from_date, to_date)
+        return self._encode(rows, fmt)
+
+    def export_incomes(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        from_date: datetime,
+        to_date: datetime,
+        fmt: ExportFormat,
+    ) -> AsyncIterator[bytes]:
+        """Поток байтов выгрузки доходов за период"""
+
+        rows = income_crud.stream_incomes(db, user_id, from_date, to_date)
+        return self._encode(rows, fmt)
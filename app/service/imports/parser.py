@@ -0,0 +1,85 @@
+"""
+Потоковый разбор файлов импорта транзакций (CSV/XLSX).
+
+Ожидаемые колонки (первая строка — заголовок): date, category_id, amount,
+необязательные comment и currency (по умолчанию RUB).
+Строки отдаются по одной вместе с номером строки в файле — целиком файл
+в память не читается.
+"""
+
+import codecs
+import csv
+from itertools import islice
+from typing import Any, BinaryIO, Iterator, List, Tuple
+
+import openpyxl
+from fastapi import HTTPException
+
+COLUMNS = ("date", "category_id", "amount", "comment", "currency")
+
+Row = dict[str, Any]
+
+
+def _normalize_header(header) -> list[str]:
+    return [str(h or "").strip().lower() for h in header]
+
+
+def _check_header(header: list[str]) -> None:
+    missing = [c for c in COLUMNS[:3] if c not in header]
+    if missing:
+        raise HTTPException(400, f"Missing columns: {', '.join(missing)}")
+
+
+def _iter_csv(file: BinaryIO) -> Iterator[Tuple[int, Row]]:
+    text = codecs.getreader("utf-8-sig")(file)
+    reader = csv.reader(text)
+    try:
+        header = _normalize_header(next(reader, []))
+        _check_header(header)
+
+        for line_no, values in enumerate(reader, start=2):
+            if not any(values):
+                continue
+            yield line_no, dict(zip(header, values))
+    except UnicodeDecodeError:
+        # файл декодируется по мере чтения — ошибка может прийти с любой строки
+        raise HTTPException(400, "CSV file must be UTF-8 encoded")
+
+
+def _iter_xlsx(file: BinaryIO) -> Iterator[Tuple[int, Row]]:
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _normalize_header(next(rows, []))
+        _check_header(header)
+
+        for line_no, values in enumerate(rows, start=2):
+            if not any(v is not None for v in values):
+                continue
+            yield line_no, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_rows(file: BinaryIO, filename: str | None) -> Iterator[Tuple[int, Row]]:
+    """Итератор (номер строки, {колонка: значение}) по CSV или XLSX"""
+
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return _iter_csv(file)
+    if name.endswith(".xlsx"):
+        return _iter_xlsx(file)
+    raise HTTPException(415, "Only .csv and .xlsx files are supported")
+
+
+def iter_chunks(
+    file: BinaryIO, filename: str | None, size: int
+) -> Iterator[List[Tuple[int, Row]]]:
+    """
+    Строки пачками по size. Разбор синхронный и нагружает CPU, поэтому
+    вызывающий код гоняет этот итератор в threadpool — по переходу на пачку.
+    """
+
+    rows = iter_rows(file, filename)
+    while chunk := list(islice(rows, size)):
+        yield chunk
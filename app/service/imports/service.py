@@ -0,0 +1,150 @@
+from datetime import date
+from functools import partial
+from typing import Awaitable, Callable, List
+
+from fastapi import UploadFile
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import iterate_in_threadpool
+
+from app.db.models.category import TypesOfCat
+from app.schemas.currency import Currency
+from app.schemas.dataclasses.imports import ImportResultDTO, ImportRowErrorDTO
+from app.schemas.expense import ExpenseCreate
+from app.schemas.income import IncomeCreate
+from app.service.category.resolver import get_user_categories
+from app.service.expense import crud as expense_crud
+from app.service.imports.parser import Row, iter_chunks
+from app.service.income import crud as income_crud
+from app.service.stats import cache as stats_cache
+from app.service.summary import crud as summary_crud
+
+
+def _currency(row: Row) -> str:
+    value = row.get("currency")
+    return str(value).strip().upper() if value else Currency.RUB
+
+
+def _build_expense(row: Row) -> ExpenseCreate:
+    return ExpenseCreate(
+        expense_date=row.get("date"),
+        category_id=row.get("category_id"),
+        cost=row.get("amount"),
+        currency=_currency(row),
+        comment=row.get("comment") or None,
+    )
+
+
+def _build_income(row: Row) -> IncomeCreate:
+    return IncomeCreate(
+        income_date=row.get("date"),
+        category_id=row.get("category_id"),
+        value=row.get("amount"),
+        currency=_currency(row),
+        comment=row.get("comment") or None,
+    )
+
+
+def _amount(item: ExpenseCreate | IncomeCreate) -> float:
+    return item.cost if isinstance(item, ExpenseCreate) else item.value
+
+
+def _day(item: ExpenseCreate | IncomeCreate) -> date:
+    moment = item.expense_date if isinstance(item, ExpenseCreate) else item.income_date
+    return moment.date()
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+    )
+
+
+class ImportService:
+    """Массовый импорт трат и доходов из CSV/XLSX"""
+
+    BATCH_SIZE = 1000  # строк на один INSERT
+    MAX_ERRORS = 100  # больше ошибок в ответ не кладём, только считаем
+    MAX_COMMENT_LENGTH = 100
+
+    async def import_expenses(
+        self, db: AsyncSession, file: UploadFile, user_id: int, tz: str = "UTC"
+    ) -> ImportResultDTO:
+        """Импорт трат: строки с ошибками пропускаются и попадают в отчёт"""
+
+        return await self._import(
+            db,
+            file,
+            user_id,
+            TypesOfCat.EXPENSE,
+            _build_expense,
+            partial(expense_crud.bulk_create_expenses, tz=tz),
+        )
+
+    async def import_incomes(
+        self, db: AsyncSession, file: UploadFile, user_id: int
+    ) -> ImportResultDTO:
+        """Импорт доходов: строки с ошибками пропускаются и попадают в отчёт"""
+
+        return await self._import(
+            db,
+            file,
+            user_id,
+            TypesOfCat.INCOME,
+            _build_income,
+            income_crud.bulk_create_incomes,
+        )
+
+    async def _import(
+        self,
+        db: AsyncSession,
+        file: UploadFile,
+        user_id: int,
+        type_of_category: TypesOfCat,
+        build: Callable[[Row], BaseModel],
+        bulk_create: Callable[[AsyncSession, int, List], Awaitable[int]],
+    ) -> ImportResultDTO:
+        result = ImportResultDTO()
+
+        def reject(line_no: int, error: str) -> None:
+            result.skipped += 1
+            if len(result.errors) < self.MAX_ERRORS:
+                result.errors.append(ImportRowErrorDTO(row=line_no, error=error))
+
+        # все категории пользователя — одним запросом на весь файл;
+        # перечитываем, чтобы видеть категории, созданные в других воркерах
+        categories = await get_user_categories(db, user_id, refresh=True)
+
+        batch = []
+        earliest = None
+        # CSV/XLSX разбирается в threadpool, чтобы не блокировать event loop
+        chunks = iter_chunks(file.file, file.filename, self.BATCH_SIZE)
+        async for chunk in iterate_in_threadpool(chunks):
+            for line_no, row in chunk:
+                try:
+                    item = build(row)
+                except ValidationError as e:
+                    reject(line_no, _validation_message(e))
+                    continue
+
+                category = categories.get(item.category_id)
+                if category is None or category.type_of_category != type_of_category:
+                    reject(line_no, "Категория не найдена или другого типа")
+                elif _amount(item) <= 0:
+                    reject(line_no, "Сумма должна быть больше нуля")
+                elif item.comment and len(item.comment) > self.MAX_COMMENT_LENGTH:
+                    reject(line_no, "Комментарий длиннее 100 символов")
+                else:
+                    batch.append(item)
+                    earliest = min(earliest or _day(item), _day(item))
+
+                if len(batch) >= self.BATCH_SIZE:
+                    result.inserted += await bulk_create(db, user_id, batch)
+                    batch = []
+
+        result.inserted += await bulk_create(db, user_id, batch)
+
+        if result.inserted:
+            await summary_crud.invalidate_from(db, user_id, earliest)
+            stats_cache.invalidate_on_commit(db, user_id)
+        return result
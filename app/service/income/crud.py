@@ -1,13 +1,17 @@
-import asyncio
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-from sqlalchemy import insert, select, update, delete, desc, asc, func
+from sqlalchemy import Row, insert, select, update, delete, desc, asc, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.pagination import keyset_filter
 from app.db import Income
 from app.schemas.dataclasses.income import IncomeDTO
 from app.schemas.income import IncomeCreate, IncomeUpdate
+from app.service.currency import crud as currency_crud
+from app.service.stats import buckets
+
+STREAM_BATCH_SIZE = 1000
 
 
 async def create_category(
@@ -24,6 +28,7 @@ async def create_category(
             Income.income_date,
             Income.category_id,
             Income.value,
+            Income.currency,
             Income.image_key,
             Income.comment,
         )
@@ -41,11 +46,27 @@ async def create_category(
         income_date=row.income_date,
         category_id=row.category_id,
         value=row.value,
+        currency=row.currency,
         image_key=row.image_key,
         comment=row.comment,
     )
 
 
+async def bulk_create_incomes(
+    db: AsyncSession, user_id: int, incomes: List[IncomeCreate]
+) -> int:
+    """Вставляет пачку доходов (executemany -> multi-row INSERT)"""
+
+    if not incomes:
+        return 0
+
+    await db.execute(
+        insert(Income),
+        [{"user_id": user_id, **income.model_dump()} for income in incomes],
+    )
+    return len(incomes)
+
+
 async def get_incomes_by_period(
     db: AsyncSession,
     user_id: int,
@@ -59,7 +80,17 @@ async def get_incomes_by_period(
     search: Optional[str] = None,
     sort_by: str = "income_date",
     sort_order: str = "desc",
-) -> Tuple[List[IncomeDTO], int]:
+    cursor: Optional[str] = None,
+    with_total: bool = True,
+    base_currency: str = "RUB",
+) -> Tuple[List[IncomeDTO], int | None]:
+    """
+    Возвращает (доходы за период, общее количество записей без пагинации).
+
+    С cursor страница выбирается по ключу (sort_by, id) вместо OFFSET;
+    with_total=False пропускает count() — total будет None. Сумма в
+    base_currency считается тем же запросом (колонка base_value).
+    """
 
     base_filters = [
         Income.user_id == user_id,
@@ -80,22 +111,32 @@ async def get_incomes_by_period(
         base_filters.append(Income.comment.ilike(f"%{search}%"))
 
     # total
-    total_query = select(func.count()).select_from(Income).where(*base_filters)
+    total = None
+    if with_total:
+        total_query = select(func.count()).select_from(Income).where(*base_filters)
+        total = (await db.execute(total_query)).scalar_one()
 
     # data
-    data_query = select(Income).where(*base_filters)
-
     column = getattr(Income, sort_by)
-    order = desc(column) if sort_order == "desc" else asc(column)
+    base_value = currency_crud.convert(
+        Income.value,
+        Income.currency,
+        buckets.day_of(db, Income.income_date),
+        base_currency,
+    )
+    data_query = select(Income, base_value.label("base_value")).where(*base_filters)
 
-    data_query = data_query.order_by(order).offset(skip).limit(limit)
+    if cursor:
+        data_query = data_query.where(
+            keyset_filter(column, Income.id, cursor, sort_by, sort_order)
+        )
+    else:
+        data_query = data_query.offset(skip)
 
-    total_result, data_result = await asyncio.gather(
-        db.execute(total_query),
-        db.execute(data_query),
-    )
+    order = desc if sort_order == "desc" else asc
+    data_query = data_query.order_by(order(column), order(Income.id)).limit(limit)
 
-    total = total_result.scalar_one()
+    data_result = await db.execute(data_query)
 
     incomes = [
         IncomeDTO(
@@ -104,15 +145,44 @@ async def get_incomes_by_period(
             category_id=i.category_id,
             income_date=i.income_date,
             value=i.value,
+            currency=i.currency,
+            base_value=float(base) if base is not None else None,
             image_key=i.image_key,
             comment=i.comment,
         )
-        for i in data_result.scalars().all()
+        for i, base in data_result.all()
     ]
 
     return incomes, total
 
 
+async def stream_incomes(
+    db: AsyncSession, user_id: int, from_date: datetime, to_date: datetime
+) -> AsyncIterator[Row]:
+    """Доходы за период через серверный курсор: строки приходят пачками по yield_per"""
+
+    stmt = (
+        select(
+            Income.id,
+            Income.income_date.label("date"),
+            Income.category_id,
+            Income.value.label("amount"),
+            Income.comment,
+            Income.currency,
+        )
+        .where(
+            Income.user_id == user_id,
+            Income.income_date >= from_date,
+            Income.income_date <= to_date,
+        )
+        .order_by(Income.income_date, Income.id)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+    result = await db.stream(stmt)
+    async for row in result:
+        yield row
+
+
 async def get_income_by_id(db: AsyncSession, income_id: int) -> IncomeDTO | None:
     """Получаем трату по id из БД"""
 
@@ -129,6 +199,7 @@ async def get_income_by_id(db: AsyncSession, income_id: int) -> IncomeDTO | None
         category_id=income.category_id,
         income_date=income.income_date,
         value=income.value,
+        currency=income.currency,
         image_key=income.image_key,
         comment=income.comment,
     )
@@ -138,16 +209,21 @@ async def update_income(
     db: AsyncSession, income_id: int, income_update: IncomeUpdate
 ) -> IncomeDTO | None:
     """Обновляет трату в БД"""
+    values = income_update.model_dump()
+    if values["currency"] is None:
+        del values["currency"]  # валюту не передали — остаётся прежняя
+
     stmt = (
         update(Income)
         .where(Income.id == income_id)
-        .values(**income_update.model_dump())
+        .values(**values)
         .returning(
             Income.id,
             Income.user_id,
             Income.income_date,
             Income.category_id,
             Income.value,
+            Income.currency,
             Income.image_key,
             Income.comment,
         )
@@ -165,6 +241,7 @@ async def update_income(
         income_date=row.income_date,
         category_id=row.category_id,
         value=row.value,
+        currency=row.currency,
         image_key=row.image_key,
         comment=row.comment,
     )
@@ -175,3 +252,16 @@ async def delete_income(db: AsyncSession, income_id: int) -> None:
 
     stmt = delete(Income).where(Income.id == income_id)
     await db.execute(stmt)
+
+
+async def get_image_keys(
+    db: AsyncSession, user_id: int, income_ids: List[int]
+) -> Dict[int, str]:
+    """Ключи картинок записей пользователя из списка id одним запросом"""
+
+    stmt = select(Income.id, Income.image_key).where(
+        Income.user_id == user_id,
+        Income.id.in_(income_ids),
+        Income.image_key.is_not(None),
+    )
+    return {row.id: row.image_key for row in await db.execute(stmt)}
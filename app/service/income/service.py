@@ -1,18 +1,17 @@
 from datetime import datetime
+from typing import Dict, List
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.s3.service import delete_file
-from app.db import User
+from app.core.s3.service import delete_file, get_download_urls
 from app.db.models.category import TypesOfCat
 from app.schemas.dataclasses.income import IncomeDTO
+from app.schemas.dataclasses.user import UserPrincipalDTO
 from app.schemas.income import IncomeCreate, IncomeUpdate
-from app.service.category import crud as category_crud
+from app.service.category.resolver import resolve_category
 from app.service.income import crud as income_crud
-from app.service.category.exception import (
-    CategoryNotFoundException,
-    CategoryTypeException,
-)
+from app.service.stats import cache as stats_cache
+from app.service.summary import crud as summary_crud
 from app.service.income.exceptions import (
     IncomePeriodException,
     IncomeNotFoundException,
@@ -26,19 +25,16 @@ class IncomeService:
     async def create_income(
         self,
         db: AsyncSession,
-        current_user: User,
+        current_user: UserPrincipalDTO,
         income: IncomeCreate,
         image_key: str,
     ):
         """Создает новую трату в БД"""
 
-        # проверка категории на наличие
-        category_exists = await category_crud.get_category_by_id(db, income.category_id)
-        if not category_exists:
-            raise CategoryNotFoundException("Категория не найдена") from None
-
-        if not category_exists.type_of_category == TypesOfCat.INCOME:
-            raise CategoryTypeException("Тип категории не трата!") from None
+        # категория существует, принадлежит пользователю и типа "доход"
+        await resolve_category(
+            db, current_user.id, income.category_id, TypesOfCat.INCOME
+        )
 
         new_income: IncomeDTO = await income_crud.create_category(
             db,
@@ -46,6 +42,8 @@ class IncomeService:
             income,
             image_key,
         )
+        await summary_crud.invalidate_from(db, current_user.id, income.income_date)
+        stats_cache.invalidate_on_commit(db, current_user.id)
         return new_income
 
     async def get_incomes_by_period(
@@ -55,13 +53,15 @@ class IncomeService:
         to_date: datetime,
         skip: int,
         limit: int,
-        current_user: User,
+        current_user: UserPrincipalDTO,
         category_id: int | None = None,
         min_value: float | None = None,
         max_value: float | None = None,
         search: str | None = None,
         sort_by: str = "income_date",
         sort_order: str = "desc",
+        cursor: str | None = None,
+        with_total: bool = True,
     ):
         if from_date > to_date:
             raise IncomePeriodException("Период неправильный")
@@ -79,12 +79,15 @@ class IncomeService:
             search=search,
             sort_by=sort_by,
             sort_order=sort_order,
+            cursor=cursor,
+            with_total=with_total,
+            base_currency=current_user.base_currency,
         )
 
         return incomes, total
 
     async def get_income_by_id(
-        self, db: AsyncSession, income_id: int, current_user: User
+        self, db: AsyncSession, income_id: int, current_user: UserPrincipalDTO
     ) -> IncomeDTO:
         """Получаем трату по id"""
 
@@ -103,9 +106,12 @@ class IncomeService:
         db: AsyncSession,
         income_id: int,
         income_update: IncomeUpdate,
-        current_user: User,
+        current_user: UserPrincipalDTO,
     ) -> IncomeDTO:
         """Обновляет доход согласно переданным данным(IncomeUpdate)"""
+        await resolve_category(
+            db, current_user.id, income_update.category_id, TypesOfCat.INCOME
+        )
         income = await income_crud.get_income_by_id(db, income_id)
 
         if not income:
@@ -119,10 +125,14 @@ class IncomeService:
         updated_income: IncomeDTO = await income_crud.update_income(
             db, income_id, income_update
         )
+        await summary_crud.invalidate_from(
+            db, current_user.id, income.income_date, income_update.income_date
+        )
+        stats_cache.invalidate_on_commit(db, current_user.id)
         return updated_income
 
     async def delete_income(
-        self, db: AsyncSession, income_id: int, current_user: User
+        self, db: AsyncSession, income_id: int, current_user: UserPrincipalDTO
     ) -> None:
         """Удаляет запись о доходе из БД"""
 
@@ -134,6 +144,17 @@ class IncomeService:
             raise IncomeUserPermissionException("Доход не принадлежит пользователю")
 
         if income.image_key:
-            delete_file(income.image_key)
+            await delete_file(income.image_key)
 
         await income_crud.delete_income(db, income_id)
+        await summary_crud.invalidate_from(db, current_user.id, income.income_date)
+        stats_cache.invalidate_on_commit(db, current_user.id)
+
+    async def get_image_urls(
+        self, db: AsyncSession, income_ids: List[int], current_user: UserPrincipalDTO
+    ) -> Dict[int, str]:
+        """Ссылки на картинки пачки доходов: один запрос к БД и одна пачка подписей"""
+
+        keys = await income_crud.get_image_keys(db, current_user.id, income_ids)
+        urls = await get_download_urls(keys.values())
+        return {income_id: urls[key] for income_id, key in keys.items()}
@@ -0,0 +1,169 @@
+"""
+Движок бакетной агрегации: одна параметризованная выборка возвращает плотный
+временной ряд (без пропусков) прямо из БД.
+
+Postgres: date_trunc по колонке + generate_series по бакетам.
+SQLite (тесты): те же бакеты через datetime()/strftime и рекурсивный CTE.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Sequence
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Select,
+    cast,
+    func,
+    literal,
+    literal_column,
+    select,
+    type_coerce,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.stats import BucketWidth
+
+# модификаторы datetime() в SQLite: усечение и шаг бакета
+_SQLITE_TRUNC = {
+    BucketWidth.day: ("start of day",),
+    BucketWidth.week: ("weekday 0", "-6 days", "start of day"),
+    BucketWidth.month: ("start of month",),
+}
+_SQLITE_STEP = {
+    BucketWidth.hour: "+1 hour",
+    BucketWidth.day: "+1 day",
+    BucketWidth.week: "+7 days",
+    BucketWidth.month: "+1 month",
+}
+_SQLITE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _is_sqlite(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def to_local(moment: datetime, tz: str | None) -> datetime:
+    """Переводит момент в наивное локальное время часового пояса tz"""
+
+    if tz and moment.tzinfo is not None:
+        moment = moment.astimezone(ZoneInfo(tz))
+    return moment.replace(tzinfo=None)
+
+
+def as_utc(moment: datetime) -> datetime:
+    """
+    Момент в UTC — в таком виде дата траты пишется в БД. Наивное время
+    считается UTC: так его интерпретирует timestamptz.
+    """
+
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def local_day(moment: datetime, tz: str | None) -> date:
+    """Календарный день момента в поясе tz — ключ дневного rollup"""
+
+    return to_local(as_utc(moment), tz or "UTC").date()
+
+
+def truncate(moment: datetime, width: BucketWidth) -> datetime:
+    """Начало бакета, в который попадает moment (неделя — ISO, с понедельника)"""
+
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if width == BucketWidth.hour:
+        return moment
+    moment = moment.replace(hour=0)
+    if width == BucketWidth.week:
+        return moment - timedelta(days=moment.weekday())
+    if width == BucketWidth.month:
+        return moment.replace(day=1)
+    return moment
+
+
+def bucket_of(db: AsyncSession, width: BucketWidth, column, tz: str | None = None):
+    """SQL-выражение начала бакета для колонки даты/времени"""
+
+    if _is_sqlite(db):
+        if width == BucketWidth.hour:
+            return func.strftime("%Y-%m-%d %H:00:00", column)
+        return func.datetime(column, *_SQLITE_TRUNC[width])
+
+    if tz:
+        # timestamptz -> локальное время пользователя (timestamp without tz)
+        column = func.timezone(tz, column)
+    else:
+        column = cast(column, DateTime)
+    return func.date_trunc(width.value, column)
+
+
+def day_of(db: AsyncSession, column, tz: str | None = None):
+    """SQL-выражение календарного дня для колонки даты/времени (в поясе tz)"""
+
+    if _is_sqlite(db):
+        return func.date(column)
+    if tz:
+        column = func.timezone(tz, column)
+    return cast(column, Date)
+
+
+def bucket_series(
+    db: AsyncSession, width: BucketWidth, first: datetime, last: datetime
+):
+    """Подзапрос со всеми бакетами от first до last включительно (колонка bucket)"""
+
+    if _is_sqlite(db):
+        start = literal(first.strftime(_SQLITE_FORMAT))
+        series = select(start.label("bucket")).cte("buckets", recursive=True)
+        series = series.union_all(
+            select(func.datetime(series.c.bucket, _SQLITE_STEP[width])).where(
+                series.c.bucket < last.strftime(_SQLITE_FORMAT)
+            )
+        )
+        return series
+
+    step = literal_column(f"interval '1 {width.value}'")
+    return select(
+        func.generate_series(
+            cast(literal(first), DateTime), cast(literal(last), DateTime), step
+        ).label("bucket")
+    ).subquery("buckets")
+
+
+def dense_buckets(
+    db: AsyncSession,
+    width: BucketWidth,
+    first: datetime,
+    last: datetime,
+    values: Select,
+    columns: Sequence[str] = ("amount",),
+) -> Select:
+    """
+    Склеивает ряд бакетов с агрегатами.
+
+    values — выборка с колонкой bucket (результат bucket_of) и колонками сумм
+    columns (по умолчанию одна amount); группировка выполняется здесь,
+    пустые бакеты получают 0.
+    """
+
+    values = values.subquery("bucket_values")
+    sums = (
+        select(
+            values.c.bucket,
+            *(func.sum(values.c[name]).label(name) for name in columns),
+        )
+        .group_by(values.c.bucket)
+        .subquery("bucket_sums")
+    )
+    series = bucket_series(db, width, first, last)
+
+    return (
+        select(
+            type_coerce(series.c.bucket, DateTime).label("bucket"),
+            *(func.coalesce(sums.c[name], 0).label(name) for name in columns),
+        )
+        .select_from(series.outerjoin(sums, sums.c.bucket == series.c.bucket))
+        .order_by(series.c.bucket)
+    )
@@ -0,0 +1,107 @@
+"""
+Кеш ответов /stats в Memcached.
+
+Ключи версионируются поколением пользователя (stats:gen:{user_id}).
+Любое изменение трат, доходов или категорий делает INCR поколения —
+старые ключи перестают читаться и просто вытесняются по TTL, без сканирования.
+"""
+
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.memcached.session import memcached_session
+from app.db.database import CommitHookSession
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL_SECONDS = 300
+MAX_TTL_SECONDS = 24 * 3600
+GENERATION_TTL_SECONDS = 0  # поколение не истекает
+
+
+def _generation_key(user_id: int) -> str:
+    return f"stats:gen:{user_id}"
+
+
+def _seed() -> str:
+    # после вытеснения счётчика начинаем не с 1, чтобы не совпасть со старым поколением
+    return str(time.time_ns())
+
+
+async def _get_generation(user_id: int) -> str:
+    """Текущее поколение кеша статистики пользователя"""
+
+    key = _generation_key(user_id)
+    generation = await memcached_session.get(key)
+    if generation is None:
+        await memcached_session.add(key, _seed(), exptime=GENERATION_TTL_SECONDS)
+        generation = await memcached_session.get(key)
+    return generation.decode() if generation else "0"
+
+
+async def read(user_id: int, name: str) -> tuple[Any | None, str | None]:
+    """
+    Возвращает (значение, ключ). Значение None — промах;
+    ключ None — Memcached недоступен и сохранять результат не нужно.
+    """
+
+    try:
+        key = f"stats:{user_id}:{await _get_generation(user_id)}:{name}"
+        data = await memcached_session.get(key)
+    except Exception as e:
+        logger.warning("Stats cache read error: %s", e)
+        return None, None
+
+    if data is None:
+        return None, key
+    return json.loads(data), key
+
+
+def ttl_until(end: datetime) -> int:
+    """
+    TTL для результата по окну, заканчивающемуся в end. Внутри окна результат
+    меняют только записи, а они сбрасывают поколение, поэтому его можно
+    хранить до конца окна (но не дольше MAX_TTL_SECONDS).
+    """
+
+    seconds = int((end - datetime.now(timezone.utc)).total_seconds())
+    return min(max(seconds, 1), MAX_TTL_SECONDS)
+
+
+async def write(key: str | None, value: Any, ttl: int = CACHE_TTL_SECONDS) -> None:
+    """Сохраняет посчитанный результат под ключом, полученным из get()"""
+
+    if key is None:
+        return
+    try:
+        await memcached_session.set(
+            key, json.dumps(jsonable_encoder(value)), exptime=ttl
+        )
+    except Exception as e:
+        logger.warning("Stats cache write error: %s", e)
+
+
+async def invalidate(user_id: int) -> None:
+    """Сбрасывает весь кеш статистики пользователя за O(1): INCR поколения"""
+
+    key = _generation_key(user_id)
+    try:
+        if await memcached_session.incr(key) is None:
+            await memcached_session.add(key, _seed(), exptime=GENERATION_TTL_SECONDS)
+    except Exception as e:
+        logger.warning("Stats cache invalidation error: %s", e)
+
+
+def invalidate_on_commit(db: CommitHookSession, user_id: int) -> None:
+    """
+    Сбрасывает кеш после commit сессии: до него параллельный запрос ещё
+    читает старые данные и положил бы их под новое поколение.
+    """
+
+    db.after_commit(partial(invalidate, user_id))
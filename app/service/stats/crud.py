@@ -1,50 +1,175 @@
-import calendar
-
-from app.db import Category, Expense
+from app.db import Category, Expense, ExpenseDailyRollup, Income
 from app.db.models.category import TypesOfCat
-from app.schemas.dataclasses.stats import CategoryExpenseDTO, ExpenseDynamicDTO
+from app.schemas.dataclasses.stats import (
+    BalanceBucketDTO,
+    CashflowBucketDTO,
+    CategoryExpenseDTO,
+    CategoryExpenseStatDTO,
+    ExpenseDynamicDTO,
+    IncomeDynamicDTO,
+)
 
 from datetime import datetime, timedelta
-from sqlalchemy import select, func
+from sqlalchemy import Select, case, literal, select, func, true, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from typing import List
+from typing import List, Tuple
+
+from app.schemas.stats import BucketWidth, PeriodEnum
+from app.service.currency import crud as currency_crud
+from app.service.stats import buckets
 
-from app.schemas.stats import PeriodEnum
+OTHER_CATEGORY_TITLE = "Другое"
 
 
 async def get_category_expenses(
-    db: AsyncSession, user_id: int, from_date: datetime, to_date: datetime
-) -> List[CategoryExpenseDTO]:
-    """Получение категорий и трат в категориях за период"""
+    db: AsyncSession,
+    user_id: int,
+    from_date: datetime,
+    to_date: datetime,
+    top_n: int = 10,
+    previous_from: datetime | None = None,
+    currency: str = "RUB",
+    tz: str | None = None,
+) -> CategoryExpenseStatDTO:
+    """
+    Топ-N категорий трат за период и остаток одной строкой "Другое" — одним
+    запросом по rollup: суммы по категориям, ранг оконной функцией, свёртка
+    хвоста группировкой по рангу. Итоги считаются отдельным агрегатом по всем
+    категориям и присоединяются к строкам, поэтому есть и при пустом периоде.
+
+    previous_from задаёт начало предыдущего периода [previous_from, from_date):
+    тогда для каждой строки и для итога считаются суммы за него.
+    Суммы пересчитываются в currency по курсу дня каждой строки rollup.
+    Дни rollup — локальные дни пользователя, границы переводятся в пояс tz.
+    """
+
+    day = ExpenseDailyRollup.day
+    last_day = buckets.to_local(to_date, tz).date()
+    current = day.between(buckets.to_local(from_date, tz).date(), last_day)
+    first_day = buckets.to_local(previous_from or from_date, tz).date()
+    total = _rollup_total(currency)
+
+    amount = func.coalesce(func.sum(case((current, total))), 0).label("amount")
+    previous_amount = func.coalesce(func.sum(case((~current, total))), 0).label(
+        "previous_amount"
+    )
 
-    stmt = (
-        select(
-            Category.id.label("category_id"),
-            Category.title,
-            func.sum(Expense.value).label("total_expense"),
-        )
-        .join(Expense, Expense.category_id == Category.id)
+    per_category = (
+        select(Category.id, Category.title, amount, previous_amount)
+        .join(ExpenseDailyRollup, ExpenseDailyRollup.category_id == Category.id)
         .where(
-            Category.user_id == user_id,
+            ExpenseDailyRollup.user_id == user_id,
             Category.type_of_category == TypesOfCat.EXPENSE,
-            Expense.expense_date.between(from_date, to_date),
+            day.between(first_day, last_day),
         )
         .group_by(Category.id, Category.title)
-        .having(func.sum(Expense.value) > 0)
-        .order_by(func.sum(Expense.value).desc())
+        .cte("per_category")
     )
 
-    res = await db.execute(stmt)
-    rows = res.mappings().all()
+    # итоги — по всем категориям: у категорий без трат в текущем периоде
+    # могли быть траты в предыдущем
+    totals = select(
+        func.coalesce(func.sum(per_category.c.amount), 0).label("grand_total"),
+        func.coalesce(func.sum(per_category.c.previous_amount), 0).label(
+            "previous_total"
+        ),
+    ).subquery()
 
-    return [
-        CategoryExpenseDTO(
-            title=row["title"],
-            amount=int(row["total_expense"]),
+    ranked = (
+        select(
+            per_category,
+            func.row_number()
+            .over(order_by=(per_category.c.amount.desc(), per_category.c.id))
+            .label("rank"),
         )
-        for row in rows
-    ]
+        .where(per_category.c.amount > 0)
+        .subquery()
+    )
+
+    in_top = ranked.c.rank <= top_n
+    slot = case((in_top, ranked.c.rank), else_=top_n + 1)
+    top = (
+        select(
+            func.max(case((in_top, ranked.c.title), else_=OTHER_CATEGORY_TITLE)).label(
+                "title"
+            ),
+            func.sum(ranked.c.amount).label("amount"),
+            func.sum(ranked.c.previous_amount).label("previous_amount"),
+            slot.label("slot"),
+        )
+        .group_by(slot)
+        .subquery()
+    )
+
+    # строка итогов есть всегда; без трат в периоде категорий к ней не находится
+    stmt = (
+        select(
+            top.c.title,
+            top.c.amount,
+            top.c.previous_amount,
+            totals.c.grand_total,
+            totals.c.previous_total,
+        )
+        .select_from(totals.outerjoin(top, true()))
+        .order_by(top.c.slot)
+    )
+
+    rows = (await db.execute(stmt)).all()
+    compare = previous_from is not None
+
+    return CategoryExpenseStatDTO(
+        categories=[
+            CategoryExpenseDTO(
+                title=row.title,
+                amount=int(row.amount),
+                previous_amount=int(row.previous_amount) if compare else None,
+            )
+            for row in rows
+            if row.title is not None
+        ],
+        total=int(rows[0].grand_total),
+        previous_total=int(rows[0].previous_total) if compare else None,
+    )
+
+
+def _rollup_total(currency: str):
+    """Сумма строки rollup в currency"""
+
+    return currency_crud.convert(
+        ExpenseDailyRollup.total,
+        ExpenseDailyRollup.currency,
+        ExpenseDailyRollup.day,
+        currency,
+    )
+
+
+def _expense_value(db: AsyncSession, currency: str):
+    """Сумма траты в currency по курсу дня траты"""
+
+    return currency_crud.convert(
+        Expense.value,
+        Expense.currency,
+        buckets.day_of(db, Expense.expense_date),
+        currency,
+    )
+
+
+def _income_value(db: AsyncSession, currency: str):
+    """Сумма дохода в currency по курсу дня дохода"""
+
+    return currency_crud.convert(
+        Income.value,
+        Income.currency,
+        buckets.day_of(db, Income.income_date),
+        currency,
+    )
+
+
+def bucket_width(period: PeriodEnum) -> BucketWidth:
+    """Ширина бакетов ряда за период: сегодня — по часам, остальное — по дням"""
+
+    return BucketWidth.hour if period == PeriodEnum.today else BucketWidth.day
 
 
 async def get_expenses_dynamic(
@@ -53,165 +178,230 @@ async def get_expenses_dynamic(
     period: PeriodEnum,
     from_date: datetime,
     to_date: datetime,
-) -> List[ExpenseDynamicDTO] | None:
-    """Получаем расходы за период с фиксированным количеством записей"""
+    tz: str | None = None,
+    currency: str = "RUB",
+) -> List[ExpenseDynamicDTO]:
+    """Получаем расходы за период плотным рядом бакетов (час/день)"""
 
     if period == PeriodEnum.today:
-        # Группировка по часам дня (24 записи)
-        return await _get_hourly_stats(db, user_id, from_date, to_date)
-    elif period == PeriodEnum.week:
-        # Группировка по дням недели (7 записей)
-        return await _get_weekly_stats(db, user_id, from_date, to_date)
-    elif period == PeriodEnum.month:
-        # Группировка по дням месяца (28-31 запись)
-        return await _get_monthly_stats(db, user_id, from_date, to_date)
-    elif period == PeriodEnum.year:
-        # Группировка по дням года (365 записей)
-        return await _get_yearly_stats(db, user_id, from_date, to_date)
-
-
-async def _get_hourly_stats(
-    db: AsyncSession, user_id: int, from_date: datetime, to_date: datetime
-):
-    """Статистика по часам - 24 записи"""
-    # Создаем все 24 часа в Python
-    hours = list(range(24))
-
-    # Получаем статистику по существующим часам
-    stmt = (
-        select(
-            func.extract("hour", Expense.expense_date).label("hour"),
-            func.sum(Expense.value).label("amount"),
+        # 24 часовых бакета текущего дня
+        to_date = from_date + timedelta(days=1) - timedelta(microseconds=1)
+        return await get_expense_buckets(
+            db, user_id, BucketWidth.hour, from_date, to_date, tz, currency
         )
-        .where(
+    # неделя/месяц/год — по дням
+    return await get_expense_buckets(
+        db, user_id, BucketWidth.day, from_date, to_date, tz, currency
+    )
+
+
+def _expense_values(
+    db: AsyncSession,
+    user_id: int,
+    width: BucketWidth,
+    from_date: datetime,
+    to_date: datetime,
+    tz: str | None,
+    currency: str,
+) -> Select:
+    """
+    Траты за [from_date, to_date] в currency колонками bucket и amount: бакеты
+    от суток и шире — по дневному rollup, часовые — по сырым тратам
+    """
+
+    if width == BucketWidth.hour:
+        return select(
+            buckets.bucket_of(db, width, Expense.expense_date, tz).label("bucket"),
+            _expense_value(db, currency).label("amount"),
+        ).where(
             Expense.user_id == user_id,
             Expense.expense_date.between(from_date, to_date),
         )
-        .group_by(func.extract("hour", Expense.expense_date))
+    return select(
+        buckets.bucket_of(db, width, ExpenseDailyRollup.day).label("bucket"),
+        _rollup_total(currency).label("amount"),
+    ).where(
+        ExpenseDailyRollup.user_id == user_id,
+        ExpenseDailyRollup.day.between(
+            buckets.to_local(from_date, tz).date(),
+            buckets.to_local(to_date, tz).date(),
+        ),
     )
 
-    res = await db.execute(stmt)
-    existing_hours = {int(row.hour): float(row.amount) for row in res}
-
-    # Создаем результат для всех 24 часов
-    result = []
-    for hour in hours:
-        amount = existing_hours.get(hour, 0.0)
-        result.append(
-            ExpenseDynamicDTO(
-                date=datetime(from_date.year, from_date.month, from_date.day, hour),
-                amount=amount,
-            )
-        )
-
-    return result
 
+def _income_values(
+    db: AsyncSession,
+    user_id: int,
+    width: BucketWidth,
+    from_date: datetime,
+    to_date: datetime,
+    tz: str | None,
+    currency: str,
+) -> Select:
+    """Доходы за [from_date, to_date] в currency колонками bucket и amount"""
+
+    return select(
+        buckets.bucket_of(db, width, Income.income_date, tz).label("bucket"),
+        _income_value(db, currency).label("amount"),
+    ).where(
+        Income.user_id == user_id,
+        Income.income_date.between(from_date, to_date),
+    )
 
-async def _get_weekly_stats(
-    db: AsyncSession, user_id: int, from_date: datetime, to_date: datetime
-):
-    """Статистика по дням недели - 7 записей"""
-    days_of_week = list(range(7))  # 0-6
 
-    # Получаем статистику по существующим дням недели
-    stmt = (
-        select(
-            func.extract("dow", Expense.expense_date).label("day_of_week"),
-            func.sum(Expense.value).label("amount"),
-        )
-        .where(
-            Expense.user_id == user_id,
-            Expense.expense_date.between(from_date, to_date),
-        )
-        .group_by(func.extract("dow", Expense.expense_date))
+def _series_bounds(
+    width: BucketWidth, from_date: datetime, to_date: datetime, tz: str | None
+) -> Tuple[datetime, datetime]:
+    return (
+        buckets.truncate(buckets.to_local(from_date, tz), width),
+        buckets.truncate(buckets.to_local(to_date, tz), width),
     )
 
-    res = await db.execute(stmt)
-    existing_days = {int(row.day_of_week): float(row.amount) for row in res}
-
-    # Создаем результат для всех 7 дней недели
-    result = []
-    for day in days_of_week:
-        amount = existing_days.get(day, 0.0)
-        result.append(
-            ExpenseDynamicDTO(
-                date=from_date + timedelta(days=day),
-                amount=amount,
-            )
-        )
 
-    return result
+async def get_expense_buckets(
+    db: AsyncSession,
+    user_id: int,
+    width: BucketWidth,
+    from_date: datetime,
+    to_date: datetime,
+    tz: str | None = None,
+    currency: str = "RUB",
+) -> List[ExpenseDynamicDTO]:
+    """Суммы трат по бакетам ширины width за [from_date, to_date] одним запросом"""
 
+    first, last = _series_bounds(width, from_date, to_date, tz)
+    values = _expense_values(db, user_id, width, from_date, to_date, tz, currency)
 
-async def _get_monthly_stats(
-    db: AsyncSession, user_id: int, from_date: datetime, to_date: datetime
-):
-    """Статистика по дням месяца - все дни"""
-    days_in_month = calendar.monthrange(from_date.year, from_date.month)[1]
-    days = list(range(1, days_in_month + 1))
+    res = await db.execute(buckets.dense_buckets(db, width, first, last, values))
+    return [ExpenseDynamicDTO(date=row.bucket, amount=float(row.amount)) for row in res]
 
-    # Получаем статистику по существующим дням месяца
-    stmt = (
+
+async def get_income_buckets(
+    db: AsyncSession,
+    user_id: int,
+    width: BucketWidth,
+    from_date: datetime,
+    to_date: datetime,
+    tz: str | None = None,
+    currency: str = "RUB",
+) -> List[IncomeDynamicDTO]:
+    """Суммы доходов по бакетам ширины width за [from_date, to_date] одним запросом"""
+
+    first, last = _series_bounds(width, from_date, to_date, tz)
+    values = _income_values(db, user_id, width, from_date, to_date, tz, currency)
+
+    res = await db.execute(buckets.dense_buckets(db, width, first, last, values))
+    return [IncomeDynamicDTO(date=row.bucket, amount=float(row.amount)) for row in res]
+
+
+def _cashflow(
+    db: AsyncSession,
+    user_id: int,
+    width: BucketWidth,
+    from_date: datetime,
+    to_date: datetime,
+    tz: str | None,
+    currency: str,
+) -> Select:
+    """Плотный ряд бакетов с колонками income и expense: UNION ALL обеих таблиц"""
+
+    args = (db, user_id, width, from_date, to_date, tz, currency)
+    expenses = _expense_values(*args).subquery()
+    incomes = _income_values(*args).subquery()
+    values = union_all(
         select(
-            func.extract("day", Expense.expense_date).label("day"),
-            func.sum(Expense.value).label("amount"),
-        )
-        .where(
-            Expense.user_id == user_id,
-            Expense.expense_date.between(from_date, to_date),
-        )
-        .group_by(func.extract("day", Expense.expense_date))
+            expenses.c.bucket,
+            literal(0).label("income"),
+            expenses.c.amount.label("expense"),
+        ),
+        select(
+            incomes.c.bucket,
+            incomes.c.amount.label("income"),
+            literal(0).label("expense"),
+        ),
     )
 
-    res = await db.execute(stmt)
-    existing_days = {int(row.day): float(row.amount) for row in res}
-
-    # Создаем результат для всех дней месяца
-    result = []
-    for day in days:
-        amount = existing_days.get(day, 0.0)
-        result.append(
-            ExpenseDynamicDTO(
-                date=datetime(from_date.year, from_date.month, day),
-                amount=amount,
-            )
-        )
+    first, last = _series_bounds(width, from_date, to_date, tz)
+    return buckets.dense_buckets(
+        db, width, first, last, select(values.subquery()), ("income", "expense")
+    )
 
-    return result
 
+async def get_cashflow_buckets(
+    db: AsyncSession,
+    user_id: int,
+    width: BucketWidth,
+    from_date: datetime,
+    to_date: datetime,
+    tz: str | None = None,
+    currency: str = "RUB",
+) -> List[CashflowBucketDTO]:
+    """Доходы, траты и их разница по бакетам за [from_date, to_date] одним запросом"""
 
-async def _get_yearly_stats(
-    db: AsyncSession, user_id: int, from_date: datetime, to_date: datetime
-):
-    """Статистика по дням года - 365/366 записей"""
-    days_in_year = 366 if calendar.isleap(from_date.year) else 365
-    days = list(range(1, days_in_year + 1))
+    res = await db.execute(
+        _cashflow(db, user_id, width, from_date, to_date, tz, currency)
+    )
+    return [
+        CashflowBucketDTO(
+            date=row.bucket,
+            income=float(row.income),
+            expense=float(row.expense),
+            net=float(row.income) - float(row.expense),
+        )
+        for row in res
+    ]
 
-    # Получаем статистику по существующим дням года
-    stmt = (
+
+async def get_balance_buckets(
+    db: AsyncSession,
+    user_id: int,
+    width: BucketWidth,
+    from_date: datetime,
+    to_date: datetime,
+    tz: str | None = None,
+    currency: str = "RUB",
+) -> List[BalanceBucketDTO]:
+    """
+    Баланс на конец каждого бакета: сальдо всех операций до from_date плюс
+    нарастающий итог (доходы - траты) оконной функцией — тем же запросом
+    """
+
+    # сальдо истории: суммы по дням и валютам (траты — прямо из rollup),
+    # курсы присоединяются к ним одним JOIN, а не подзапросом на строку
+    income_day = buckets.day_of(db, Income.income_date)
+    history = union_all(
+        select(
+            Income.currency,
+            income_day.label("day"),
+            func.sum(Income.value).label("amount"),
+        )
+        .where(Income.user_id == user_id, Income.income_date < from_date)
+        .group_by(Income.currency, income_day),
         select(
-            func.extract("doy", Expense.expense_date).label("day_of_year"),
-            func.sum(Expense.value).label("amount"),
+            ExpenseDailyRollup.currency,
+            ExpenseDailyRollup.day,
+            (-func.sum(ExpenseDailyRollup.total)).label("amount"),
         )
         .where(
-            Expense.user_id == user_id,
-            Expense.expense_date.between(from_date, to_date),
+            ExpenseDailyRollup.user_id == user_id,
+            ExpenseDailyRollup.day < buckets.to_local(from_date, tz).date(),
         )
-        .group_by(func.extract("doy", Expense.expense_date))
-    )
+        .group_by(ExpenseDailyRollup.currency, ExpenseDailyRollup.day),
+    ).subquery("history")
+    opening = currency_crud.sum_converted(history, currency)
+
+    flow = _cashflow(db, user_id, width, from_date, to_date, tz, currency).subquery()
+    net = flow.c.income - flow.c.expense
+    stmt = select(
+        flow.c.bucket,
+        net.label("net"),
+        (opening + func.sum(net).over(order_by=flow.c.bucket)).label("balance"),
+    ).order_by(flow.c.bucket)
 
     res = await db.execute(stmt)
-    existing_days = {int(row.day_of_year): float(row.amount) for row in res}
-
-    # Создаем результат для всех дней года
-    result = []
-    for day in days:
-        amount = existing_days.get(day, 0.0)
-        result.append(
-            ExpenseDynamicDTO(
-                date=datetime(from_date.year, 1, 1) + timedelta(days=day - 1),
-                amount=amount,
-            )
+    return [
+        BalanceBucketDTO(
+            date=row.bucket, net=float(row.net), balance=float(row.balance)
         )
-
-    return result
+        for row in res
+    ]
@@ -0,0 +1,51 @@
+"""
+Разрешение периода статистики в календарное окно пользователя.
+
+Окна выровнены по границам дня/ISO-недели/месяца/года в часовом поясе
+пользователя, поэтому все запросы внутри периода получают одно и то же
+окно. Это даёт стабильный ключ кеша. Прошлые окна не меняются, пока
+не пришла задним числом запись, а она сбрасывает поколение кеша.
+"""
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from app.schemas.dataclasses.stats import StatsWindowDTO
+from app.schemas.stats import PeriodEnum
+
+
+def add_months(moment: datetime, months: int) -> datetime:
+    index = moment.month - 1 + months
+    return moment.replace(year=moment.year + index // 12, month=index % 12 + 1)
+
+
+def resolve_window(
+    period: PeriodEnum, tz: str = "UTC", now: datetime | None = None
+) -> StatsWindowDTO:
+    """Окно периода, содержащее now (по умолчанию — текущий момент)"""
+
+    zone = ZoneInfo(tz)
+    now = now.astimezone(zone) if now else datetime.now(zone)
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # арифметика aware-datetime в Python идёт по локальному времени,
+    # поэтому границы остаются на полуночи и при переходе на летнее время
+    match period:
+        case PeriodEnum.today:
+            start = day
+            end = day + timedelta(days=1)
+            previous_start = day - timedelta(days=1)
+        case PeriodEnum.week:
+            start = day - timedelta(days=day.weekday())
+            end = start + timedelta(weeks=1)
+            previous_start = start - timedelta(weeks=1)
+        case PeriodEnum.month:
+            start = day.replace(day=1)
+            end = add_months(start, 1)
+            previous_start = add_months(start, -1)
+        case PeriodEnum.year:
+            start = day.replace(month=1, day=1)
+            end = start.replace(year=start.year + 1)
+            previous_start = start.replace(year=start.year - 1)
+
+    return StatsWindowDTO(start=start, end=end, previous_start=previous_start)
@@ -1,72 +1,218 @@
-from datetime import datetime, timedelta
-from typing import Tuple, List
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, List, Type
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import User
 from app.schemas.dataclasses.stats import (
+    BalanceBucketDTO,
+    CashflowBucketDTO,
     CategoryExpenseDTO,
     CategoryExpenseStatDTO,
     ExpenseDynamicDTO,
+    IncomeDynamicDTO,
+    MonthlyTotalDTO,
+    StatsWindowDTO,
 )
+from app.schemas.dataclasses.user import UserPrincipalDTO
 from app.schemas.stats import Period, PeriodEnum
 
+from app.service.stats import cache as stats_cache
 from app.service.stats import crud as stats_crud
+from app.service.stats import periods
+from app.service.summary.service import SummaryService
 
 
 class StatsService:
     """Сервис статистики"""
 
+    summary_service = SummaryService()
+
     @staticmethod
-    def _get_datetime_period(period: Period) -> Tuple[datetime, datetime]:
-        now = datetime.now()
-        match period.period:
-            case PeriodEnum.today:
-                start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-                end = now
-            case PeriodEnum.week:
-                start = now - timedelta(days=7)
-                end = now
-            case PeriodEnum.month:
-                start = now - timedelta(days=30)
-                end = now
-            case PeriodEnum.year:
-                start = now - timedelta(days=365)
-                end = now
-            case _:
-                start = now
-                end = now
-        return start, end
+    def _cache_name(
+        kind: str, period: Period, window: StatsWindowDTO, user: UserPrincipalDTO
+    ) -> str:
+        # окно выровнено по календарю, поэтому ключ стабилен весь период
+        return (
+            f"{kind}:{period.period.value}:{user.timezone}:{user.base_currency}:"
+            f"{window.start:%Y-%m-%d}"
+        )
 
     async def get_category_expenses_stats(
-        self, db: AsyncSession, period: Period, current_user: User
+        self,
+        db: AsyncSession,
+        period: Period,
+        current_user: UserPrincipalDTO,
+        top_n: int = 10,
+        compare: bool = False,
     ) -> CategoryExpenseStatDTO:
-        """Возвращает статистику по 10 самым популярным категориями за период"""
+        """
+        Возвращает top_n самых крупных категорий за период и остаток строкой
+        "Другое"; compare=True добавляет суммы за предыдущий такой же период
+        """
 
-        categories: List[CategoryExpenseDTO] = await stats_crud.get_category_expenses(
-            db, current_user.id, *self._get_datetime_period(period)
+        tz = current_user.timezone
+        window = periods.resolve_window(period.period, tz)
+        cached, cache_key = await stats_cache.read(
+            current_user.id,
+            f"{self._cache_name('categories', period, window, current_user)}"
+            f":{top_n}:{int(compare)}",
         )
-        total = sum(map(lambda x: x.amount, categories))
-
-        # ограничение на количество категорий
-        if len(categories) > 10:
-            other_category = CategoryExpenseDTO(
-                title="Другое", amount=sum(map(lambda x: x.amount, categories[10:]))
+        if cached is not None:
+            return CategoryExpenseStatDTO(
+                total=cached["total"],
+                previous_total=cached["previous_total"],
+                categories=[CategoryExpenseDTO(**c) for c in cached["categories"]],
             )
-            categories = categories[:9] + [other_category]
 
-        return CategoryExpenseStatDTO(total=total, categories=categories)
+        result = await stats_crud.get_category_expenses(
+            db,
+            current_user.id,
+            window.start,
+            window.last,
+            top_n=top_n,
+            previous_from=window.previous_start if compare else None,
+            currency=current_user.base_currency,
+            tz=tz,
+        )
+
+        await stats_cache.write(cache_key, result, stats_cache.ttl_until(window.end))
+        return result
 
     async def get_dynamic_stats(
-        self, db: AsyncSession, period: Period, current_user: User
+        self, db: AsyncSession, period: Period, current_user: UserPrincipalDTO
     ):
         """Возвращаем динамику расходов за период"""
 
+        tz = current_user.timezone
+        window = periods.resolve_window(period.period, tz)
+        cached, cache_key = await stats_cache.read(
+            current_user.id, self._cache_name("dynamic", period, window, current_user)
+        )
+        if cached is not None:
+            return [
+                ExpenseDynamicDTO(
+                    date=datetime.fromisoformat(e["date"]), amount=e["amount"]
+                )
+                for e in cached
+            ]
+
         expenses: List[ExpenseDynamicDTO] = await stats_crud.get_expenses_dynamic(
             db,
             current_user.id,
             period.period,
-            *self._get_datetime_period(period),
+            window.start,
+            window.last,
+            tz,
+            current_user.base_currency,
         )
 
+        await stats_cache.write(cache_key, expenses, stats_cache.ttl_until(window.end))
         return expenses
+
+    async def _get_bucket_series(
+        self,
+        db: AsyncSession,
+        kind: str,
+        period: Period,
+        current_user: UserPrincipalDTO,
+        load: Callable[..., Awaitable[List[Any]]],
+        dto: Type,
+    ) -> List[Any]:
+        """Ряд бакетов за окно периода через crud-функцию load, с кешем по окну"""
+
+        tz = current_user.timezone
+        window = periods.resolve_window(period.period, tz)
+        cached, cache_key = await stats_cache.read(
+            current_user.id, self._cache_name(kind, period, window, current_user)
+        )
+        if cached is not None:
+            return [
+                dto(**{**item, "date": datetime.fromisoformat(item["date"])})
+                for item in cached
+            ]
+
+        result = await load(
+            db,
+            current_user.id,
+            stats_crud.bucket_width(period.period),
+            window.start,
+            window.last,
+            tz,
+            current_user.base_currency,
+        )
+
+        await stats_cache.write(cache_key, result, stats_cache.ttl_until(window.end))
+        return result
+
+    async def get_income_stats(
+        self, db: AsyncSession, period: Period, current_user: UserPrincipalDTO
+    ) -> List[IncomeDynamicDTO]:
+        """Динамика доходов за период (час/день)"""
+
+        return await self._get_bucket_series(
+            db,
+            "income",
+            period,
+            current_user,
+            stats_crud.get_income_buckets,
+            IncomeDynamicDTO,
+        )
+
+    async def get_cashflow_stats(
+        self, db: AsyncSession, period: Period, current_user: UserPrincipalDTO
+    ) -> List[CashflowBucketDTO]:
+        """Доходы, траты и чистый поток по бакетам за период"""
+
+        return await self._get_bucket_series(
+            db,
+            "cashflow",
+            period,
+            current_user,
+            stats_crud.get_cashflow_buckets,
+            CashflowBucketDTO,
+        )
+
+    async def get_balance_stats(
+        self, db: AsyncSession, period: Period, current_user: UserPrincipalDTO
+    ) -> List[BalanceBucketDTO]:
+        """Баланс на конец каждого бакета за период"""
+
+        return await self._get_bucket_series(
+            db,
+            "balance",
+            period,
+            current_user,
+            stats_crud.get_balance_buckets,
+            BalanceBucketDTO,
+        )
+
+    async def get_monthly_stats(
+        self, db: AsyncSession, current_user: UserPrincipalDTO, months: int
+    ) -> List[MonthlyTotalDTO]:
+        """
+        Доходы и траты по месяцам за последние months месяцев: закрытые месяцы
+        берутся из предпосчитанных итогов, из сырых строк — только открытый
+        """
+
+        tz = current_user.timezone
+        window = periods.resolve_window(PeriodEnum.month, tz)
+        cached, cache_key = await stats_cache.read(
+            current_user.id,
+            f"monthly:{tz}:{current_user.base_currency}:{window.start:%Y-%m}:{months}",
+        )
+        if cached is not None:
+            return [
+                MonthlyTotalDTO(
+                    month=date.fromisoformat(m["month"]),
+                    expense=m["expense"],
+                    income=m["income"],
+                )
+                for m in cached
+            ]
+
+        result = await self.summary_service.get_monthly_totals(
+            db, current_user.id, tz, months, currency=current_user.base_currency
+        )
+
+        await stats_cache.write(cache_key, result, stats_cache.ttl_until(window.end))
+        return result
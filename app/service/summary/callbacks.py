@@ -0,0 +1,33 @@
+import asyncio
+import logging
+
+from app.core.settings import settings
+from app.db.database import async_session
+from app.service.summary.service import SummaryService
+
+logger = logging.getLogger(__name__)
+
+
+async def run_summary_worker():
+    """
+    Фоновая сборка месячных итогов: раз в SUMMARY_REFRESH_SECONDS достраивает
+    закрытые месяцы и пересобирает инвалидированные записями задним числом.
+    """
+    if settings.SUMMARY_REFRESH_SECONDS <= 0:
+        return
+
+    service = SummaryService()
+    while True:
+        try:
+            async with async_session() as session:
+                rebuilt = await service.refresh(session)
+            if rebuilt:
+                logger.info("Monthly summaries rebuilt for %d users", rebuilt)
+        except Exception:
+            logger.exception("Monthly summary refresh failed")
+        await asyncio.sleep(settings.SUMMARY_REFRESH_SECONDS)
+
+
+startup_callbacks = [
+    run_summary_worker,
+]
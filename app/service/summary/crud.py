@@ -0,0 +1,253 @@
+from datetime import date, datetime, timedelta
+from typing import Iterable, List
+
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Row,
+    cast,
+    delete,
+    func,
+    literal,
+    or_,
+    select,
+    type_coerce,
+    union_all,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.utils import dialect_insert
+from app.db import (
+    Expense,
+    Income,
+    MonthlySummary,
+    MonthlySummaryState,
+    User,
+)
+from app.db.models.category import TypesOfCat
+from app.schemas.stats import BucketWidth
+from app.service.currency import crud as currency_crud
+from app.service.stats import buckets
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+async def invalidate_from(
+    db: AsyncSession, user_id: int, *moments: datetime | date | None
+) -> None:
+    """
+    Запись задним числом: сдвигает built_until на месяц самой ранней из дат,
+    чтобы воркер пересобрал итоги начиная с него. Запись в открытый месяц
+    не трогает ни одной строки.
+    """
+
+    days = [m.date() if isinstance(m, datetime) else m for m in moments if m]
+    if not days:
+        return
+
+    # день записи взят без учёта пояса пользователя: берём сутки запаса,
+    # иначе запись 1-го числа могла бы относиться к предыдущему месяцу
+    month = month_start(min(days) - timedelta(days=1))
+    await db.execute(
+        update(MonthlySummaryState)
+        .where(
+            MonthlySummaryState.user_id == user_id,
+            MonthlySummaryState.built_until > month,
+        )
+        .values(built_until=month, updated_at=func.now())
+    )
+
+
+async def reset(db: AsyncSession, user_id: int) -> None:
+    """Сбрасывает все итоги пользователя (например, после смены часового пояса)"""
+
+    await db.execute(
+        update(MonthlySummaryState)
+        .where(MonthlySummaryState.user_id == user_id)
+        .values(built_until=None, updated_at=func.now())
+    )
+
+
+async def ensure_states(db: AsyncSession) -> None:
+    """Заводит строку состояния для пользователей, у которых её ещё нет"""
+
+    upsert = dialect_insert(db)
+    stmt = upsert(MonthlySummaryState).from_select(
+        ["user_id"],
+        select(User.id).where(
+            ~select(MonthlySummaryState.user_id)
+            .where(MonthlySummaryState.user_id == User.id)
+            .exists()
+        ),
+    )
+    await db.execute(stmt.on_conflict_do_nothing())
+
+
+def _open_month_start(db: AsyncSession, now: datetime):
+    """SQL-выражение начала открытого месяца пользователя (в его поясе) на now"""
+
+    moment = literal(now, DateTime(timezone=True))
+    if buckets._is_sqlite(db):
+        return func.date(moment, "start of month")
+    return cast(func.date_trunc("month", func.timezone(User.timezone, moment)), Date)
+
+
+async def get_pending(
+    db: AsyncSession, now: datetime, limit: int, after_user_id: int = 0
+) -> List[Row]:
+    """
+    Пользователи (по возрастанию id после after_user_id), у которых итоги
+    построены не до начала их открытого месяца: уже собранные в выборку
+    не попадают, и проход без новых данных ничего не блокирует. Строки
+    состояния блокируются с SKIP LOCKED — несколько воркеров делят работу,
+    а не дублируют её.
+    """
+
+    stmt = (
+        select(
+            MonthlySummaryState.user_id,
+            MonthlySummaryState.built_until,
+            User.timezone,
+            User.base_currency,
+        )
+        .join(User, User.id == MonthlySummaryState.user_id)
+        .where(
+            MonthlySummaryState.user_id > after_user_id,
+            or_(
+                MonthlySummaryState.built_until.is_(None),
+                MonthlySummaryState.built_until < _open_month_start(db, now),
+            ),
+        )
+        .order_by(MonthlySummaryState.user_id)
+        .limit(limit)
+        .with_for_update(of=MonthlySummaryState, skip_locked=True)
+    )
+    return list((await db.execute(stmt)).all())
+
+
+async def get_built_until(db: AsyncSession, user_id: int) -> date | None:
+    stmt = select(MonthlySummaryState.built_until).where(
+        MonthlySummaryState.user_id == user_id
+    )
+    return (await db.execute(stmt)).scalar_one_or_none()
+
+
+async def get_first_activity(db: AsyncSession, user_id: int) -> datetime | None:
+    """Момент самой ранней траты или дохода пользователя"""
+
+    first_expense = (
+        select(func.min(Expense.expense_date))
+        .where(Expense.user_id == user_id)
+        .scalar_subquery()
+    )
+    first_income = (
+        select(func.min(Income.income_date))
+        .where(Income.user_id == user_id)
+        .scalar_subquery()
+    )
+    row = (await db.execute(select(first_expense, first_income))).one()
+    moments = [m for m in row if m is not None]
+    return min(moments) if moments else None
+
+
+async def aggregate_months(
+    db: AsyncSession,
+    user_id: int,
+    from_date: datetime,
+    to_date: datetime,
+    tz: str | None = None,
+    currency: str = "RUB",
+) -> List[Row]:
+    """
+    Итоги по месяцам и категориям из сырых трат и доходов за [from_date, to_date):
+    одна выборка UNION ALL, колонки month, category_id, kind, total, count.
+    Суммы пересчитываются в currency по курсу дня каждой записи.
+    """
+
+    def grouped(table, date_column, kind: TypesOfCat):
+        month = buckets.bucket_of(db, BucketWidth.month, date_column, tz)
+        value = currency_crud.convert(
+            table.value, table.currency, buckets.day_of(db, date_column), currency
+        )
+        return (
+            select(
+                type_coerce(month, DateTime).label("month"),
+                table.category_id,
+                literal(kind.name).label("kind"),
+                func.coalesce(func.sum(value), 0).label("total"),
+                func.count().label("count"),
+            )
+            .where(
+                table.user_id == user_id,
+                date_column >= from_date,
+                date_column < to_date,
+            )
+            .group_by(month, table.category_id)
+        )
+
+    stmt = union_all(
+        grouped(Expense, Expense.expense_date, TypesOfCat.EXPENSE),
+        grouped(Income, Income.income_date, TypesOfCat.INCOME),
+    )
+    return list((await db.execute(stmt)).all())
+
+
+async def replace_months(
+    db: AsyncSession,
+    user_id: int,
+    from_month: date,
+    built_until: date,
+    rows: Iterable[Row],
+) -> None:
+    """Перезаписывает итоги с from_month и отмечает их построенными до built_until"""
+
+    await db.execute(
+        delete(MonthlySummary).where(
+            MonthlySummary.user_id == user_id,
+            MonthlySummary.month >= from_month,
+        )
+    )
+
+    values = [
+        {
+            "user_id": user_id,
+            "month": row.month.date(),
+            "category_id": row.category_id,
+            "kind": TypesOfCat[row.kind],
+            "total": row.total,
+            "count": row.count,
+        }
+        for row in rows
+    ]
+    if values:
+        await db.execute(dialect_insert(db)(MonthlySummary), values)
+
+    await db.execute(
+        update(MonthlySummaryState)
+        .where(MonthlySummaryState.user_id == user_id)
+        .values(built_until=built_until, updated_at=func.now())
+    )
+
+
+async def get_month_totals(
+    db: AsyncSession, user_id: int, from_month: date, to_month: date
+) -> List[Row]:
+    """Итоги доходов и трат по месяцам [from_month, to_month) из monthly_summaries"""
+
+    stmt = (
+        select(
+            MonthlySummary.month,
+            MonthlySummary.kind,
+            func.sum(MonthlySummary.total).label("total"),
+        )
+        .where(
+            MonthlySummary.user_id == user_id,
+            MonthlySummary.month >= from_month,
+            MonthlySummary.month < to_month,
+        )
+        .group_by(MonthlySummary.month, MonthlySummary.kind)
+    )
+    return list((await db.execute(stmt)).all())
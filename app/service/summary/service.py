@@ -0,0 +1,131 @@
+from datetime import date, datetime, time, timezone
+from typing import Dict, List
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.category import TypesOfCat
+from app.schemas.dataclasses.stats import MonthlyTotalDTO
+from app.schemas.stats import PeriodEnum
+from app.service.stats import buckets, periods
+from app.service.summary import crud as summary_crud
+
+
+def _local_midnight(day: date, tz: str) -> datetime:
+    return datetime.combine(day, time(), ZoneInfo(tz))
+
+
+class SummaryService:
+    """
+    Месячные итоги: фоновая сборка закрытых месяцев в monthly_summaries
+    и чтение ряда по месяцам, где из сырых строк считается только открытый месяц
+    """
+
+    BATCH_SIZE = 100  # пользователей на одну транзакцию воркера
+
+    async def refresh(self, db: AsyncSession, now: datetime | None = None) -> int:
+        """
+        Один проход воркера: достраивает итоги пользователей, отставших от
+        начала их текущего месяца (закрылся месяц или была запись задним
+        числом). Коммитит после каждой пачки, чтобы не держать блокировки.
+        Возвращает число пересобранных пользователей.
+        """
+
+        now = now or datetime.now(timezone.utc)
+
+        await summary_crud.ensure_states(db)
+        await db.commit()
+
+        rebuilt = 0
+        after_user_id = 0
+        while True:
+            pending = await summary_crud.get_pending(
+                db, now, self.BATCH_SIZE, after_user_id
+            )
+            if not pending:
+                return rebuilt
+
+            for state in pending:
+                if await self._refresh_user(db, state, now):
+                    rebuilt += 1
+            after_user_id = pending[-1].user_id
+            await db.commit()
+
+    async def _refresh_user(self, db: AsyncSession, state, now: datetime) -> bool:
+        open_month = periods.resolve_window(PeriodEnum.month, state.timezone, now)
+        built_until = open_month.start.date()
+        if state.built_until is not None and state.built_until >= built_until:
+            return False
+
+        start = state.built_until
+        if start is None:
+            first = await summary_crud.get_first_activity(db, state.user_id)
+            start = (
+                summary_crud.month_start(buckets.to_local(first, state.timezone).date())
+                if first
+                else built_until
+            )
+
+        rows = []
+        if start < built_until:
+            rows = await summary_crud.aggregate_months(
+                db,
+                state.user_id,
+                _local_midnight(start, state.timezone),
+                open_month.start,
+                state.timezone,
+                state.base_currency,
+            )
+        await summary_crud.replace_months(db, state.user_id, start, built_until, rows)
+        return True
+
+    async def get_monthly_totals(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        tz: str,
+        months: int,
+        now: datetime | None = None,
+        currency: str = "RUB",
+    ) -> List[MonthlyTotalDTO]:
+        """
+        Доходы и траты по последним months месяцам (включая текущий) плотным
+        рядом. Месяцы до built_until читаются из итогов (они уже в базовой
+        валюте пользователя), остальные — обычно только открытый —
+        агрегируются из сырых строк с пересчётом в currency.
+        """
+
+        window = periods.resolve_window(PeriodEnum.month, tz, now)
+        first = periods.add_months(window.start, 1 - months).date()
+        open_month = window.start.date()
+
+        built_until = await summary_crud.get_built_until(db, user_id)
+        split = min(max(built_until or first, first), open_month)
+
+        totals: Dict[date, Dict[TypesOfCat, float]] = {}
+
+        def add(month: date, kind: TypesOfCat, amount) -> None:
+            by_kind = totals.setdefault(month, {})
+            by_kind[kind] = by_kind.get(kind, 0) + float(amount)
+
+        if split > first:
+            for row in await summary_crud.get_month_totals(db, user_id, first, split):
+                add(row.month, row.kind, row.total)
+
+        for row in await summary_crud.aggregate_months(
+            db, user_id, _local_midnight(split, tz), window.end, tz, currency
+        ):
+            add(row.month.date(), TypesOfCat[row.kind], row.total)
+
+        result = []
+        for offset in range(1 - months, 1):
+            month = periods.add_months(window.start, offset).date()
+            by_kind = totals.get(month, {})
+            result.append(
+                MonthlyTotalDTO(
+                    month=month,
+                    expense=by_kind.get(TypesOfCat.EXPENSE, 0.0),
+                    income=by_kind.get(TypesOfCat.INCOME, 0.0),
+                )
+            )
+        return result
@@ -3,15 +3,16 @@ from typing import List
 from sqlalchemy import update, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import encode_password
+from app.core.security import hash_password
 from app.core.settings import settings
 from app.db import User
 from app.db.models.user import UserRoles
-from app.schemas.dataclasses.user import UserDTO
+from app.schemas.dataclasses.user import UserDTO, UserPrincipalDTO
+from app.service.auth.cache import invalidate_principal_on_commit
 
 
 async def change_expense_limit(
-    db: AsyncSession, user: User, new_limit: float
+    db: AsyncSession, user: UserPrincipalDTO, new_limit: float
 ) -> UserDTO:
     """Обновляет user в БД, меняя его лимит трат"""
 
@@ -25,20 +26,94 @@ async def change_expense_limit(
             User.email,
             User.hashed_password,
             User.day_expense_limit,
+            User.role,
+            User.timezone,
+            User.base_currency,
         )
     )
     res = await db.execute(stmt)
     row = res.first()
+    invalidate_principal_on_commit(db, user.id)
     return UserDTO(
         id=row.id,
         username=row.username,
         day_expense_limit=row.day_expense_limit,
         email=row.email,
         role=row.role,
+        timezone=row.timezone,
+        base_currency=row.base_currency,
         hashed_password=row.hashed_password,
     )
 
 
+async def change_timezone(db: AsyncSession, user_id: int, timezone: str) -> UserDTO:
+    """Обновляет часовой пояс пользователя"""
+
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        .values(timezone=timezone)
+        .returning(
+            User.id,
+            User.username,
+            User.email,
+            User.hashed_password,
+            User.day_expense_limit,
+            User.role,
+            User.timezone,
+            User.base_currency,
+        )
+    )
+    res = await db.execute(stmt)
+    row = res.first()
+    invalidate_principal_on_commit(db, user_id)
+    return UserDTO(
+        id=row.id,
+        username=row.username,
+        day_expense_limit=row.day_expense_limit,
+        email=row.email,
+        role=row.role,
+        hashed_password=row.hashed_password,
+        timezone=row.timezone,
+        base_currency=row.base_currency,
+    )
+
+
+async def change_base_currency(
+    db: AsyncSession, user_id: int, base_currency: str
+) -> UserDTO:
+    """Обновляет базовую валюту пользователя"""
+
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        .values(base_currency=base_currency)
+        .returning(
+            User.id,
+            User.username,
+            User.email,
+            User.hashed_password,
+            User.day_expense_limit,
+            User.role,
+            User.timezone,
+            User.base_currency,
+        )
+    )
+    res = await db.execute(stmt)
+    row = res.first()
+    invalidate_principal_on_commit(db, user_id)
+    return UserDTO(
+        id=row.id,
+        username=row.username,
+        day_expense_limit=row.day_expense_limit,
+        email=row.email,
+        role=row.role,
+        hashed_password=row.hashed_password,
+        timezone=row.timezone,
+        base_currency=row.base_currency,
+    )
+
+
 async def create_admin_user(session: AsyncSession):
 
     exists = await session.get(User, 0)
@@ -49,7 +124,7 @@ async def create_admin_user(session: AsyncSession):
         id=0,
         username=settings.admin_username,
         email="example@example.com",
-        hashed_password=encode_password(settings.admin_password),
+        hashed_password=await hash_password(settings.admin_password),
         role=UserRoles.ADMIN.name,
     )
     await session.execute(stmt)
@@ -71,6 +146,8 @@ async def get_user_by_id(session: AsyncSession, user_id: int) -> UserDTO:
         email=row.email,
         hashed_password=row.hashed_password,
         role=row.role,
+        timezone=row.timezone,
+        base_currency=row.base_currency,
     )
 
 
@@ -87,6 +164,7 @@ async def change_user_role(
     row = result.scalar()
     if not row:
         return None
+    invalidate_principal_on_commit(session, user_id)
 
     return UserDTO(
         id=row.id,
@@ -95,6 +173,8 @@ async def change_user_role(
         email=row.email,
         hashed_password=row.hashed_password,
         role=row.role,
+        timezone=row.timezone,
+        base_currency=row.base_currency,
     )
 
 
@@ -113,6 +193,8 @@ async def get_all_users(session: AsyncSession, skip: int, limit: int) -> List[Us
                 email=row.email,
                 hashed_password=row.hashed_password,
                 role=row.role,
+                timezone=row.timezone,
+                base_currency=row.base_currency,
             )
         )
 
@@ -1,8 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import User
 from app.db.models.user import UserRoles
-from app.schemas.dataclasses.user import UserDTO
+from app.schemas.dataclasses.user import UserDTO, UserPrincipalDTO
+from app.service.expense import crud as expense_crud
+from app.service.stats import cache as stats_cache
+from app.service.summary import crud as summary_crud
 from app.service.user import crud as user_repo
 from app.service.user.exception import UserNotFoundException
 
@@ -13,12 +15,49 @@ class UserService:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def change_user_expense_limit(self, user: User, new_limit: float) -> UserDTO:
+    async def change_user_expense_limit(
+        self, user: UserPrincipalDTO, new_limit: float
+    ) -> UserDTO:
         """Изменяет дневной лимит трат"""
 
-        changed_user = await user_repo.change_expense_limit(db, user, new_limit)
+        changed_user = await user_repo.change_expense_limit(
+            self.session, user, new_limit
+        )
         return changed_user
 
+    async def change_user_timezone(self, user_id: int, timezone: str) -> UserDTO:
+        """Изменяет часовой пояс, по которому выравниваются периоды статистики"""
+
+        user = await user_repo.change_timezone(self.session, user_id, timezone)
+        # дни rollup и месячные итоги выровнены по старому поясу — пересобираем
+        await expense_crud.rebuild_rollup(self.session, user_id, timezone)
+        await summary_crud.reset(self.session, user_id)
+        stats_cache.invalidate_on_commit(self.session, user_id)
+        return user
+
+    async def change_user_base_currency(
+        self, user_id: int, base_currency: str
+    ) -> UserDTO:
+        """Изменяет валюту, в которую пересчитываются статистика и лимит трат"""
+
+        user = await user_repo.change_base_currency(
+            self.session, user_id, base_currency
+        )
+        # месячные итоги посчитаны в прежней валюте — пересобираем с нуля
+        await summary_crud.reset(self.session, user_id)
+        stats_cache.invalidate_on_commit(self.session, user_id)
+        return user
+
+    async def get_user(self, user_id: int) -> UserDTO:
+        """Возвращает пользователя по id"""
+
+        user: UserDTO | None = await user_repo.get_user_by_id(
+            session=self.session, user_id=user_id
+        )
+        if not user:
+            raise UserNotFoundException("Пользователь не найден")
+        return user
+
     async def change_user_role(self, user_id: int, new_user_role: UserRoles) -> None:
         """Меняет роль пользователя на переданную"""
         # проверяем существует ли юзер вообще
@@ -0,0 +1,119 @@
+"""
+Замер сценариев и сравнение с сохранёнными базовыми значениями.
+
+Сценарий — корутина, выполняющая один HTTP-запрос. Она прогоняется
+``iterations`` раз с ``concurrency`` одновременных запросов. Результат —
+пропускная способность и перцентили латентности.
+
+Абсолютные rps и p95 зависят от машины, поэтому базовые значения не
+хранятся в репозитории: каждая машина записывает свои при первом прогоне
+(или с BENCH_UPDATE_BASELINES=1) в локальный файл BENCH_BASELINES
+(по умолчанию baselines.local.json рядом, в .gitignore) по бэкенду БД
+(sqlite/postgresql) и имени сценария, и дальше сравнивается с ними.
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+BASELINES_PATH = Path(
+    os.getenv("BENCH_BASELINES", Path(__file__).with_name("baselines.local.json"))
+)
+
+# допустимая деградация относительно базы: 0.5 — на 50% хуже
+TOLERANCE = float(os.getenv("BENCH_TOLERANCE", "0.5"))
+UPDATE_BASELINES = os.getenv("BENCH_UPDATE_BASELINES") == "1"
+
+
+@dataclass
+class BenchResult:
+    name: str
+    requests: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль методом nearest-rank"""
+
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+async def run_scenario(
+    name: str,
+    request: Callable[[int], Awaitable[None]],
+    iterations: int,
+    concurrency: int,
+) -> BenchResult:
+    """Выполняет ``request(i)`` для i in range(iterations) не более concurrency одновременно"""
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await request(i)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(iterations)))
+    elapsed = time.perf_counter() - start
+
+    return BenchResult(
+        name=name,
+        requests=iterations,
+        rps=round(iterations / elapsed, 1),
+        p50_ms=round(percentile(latencies, 50), 2),
+        p95_ms=round(percentile(latencies, 95), 2),
+        p99_ms=round(percentile(latencies, 99), 2),
+    )
+
+
+def _load() -> Dict[str, Dict[str, dict]]:
+    if BASELINES_PATH.exists():
+        return json.loads(BASELINES_PATH.read_text())
+    return {}
+
+
+def check_baseline(result: BenchResult, backend: str) -> None:
+    """Падает, если p95 или rps хуже локальной базы больше чем на TOLERANCE.
+
+    Если базы для сценария на этой машине ещё нет (или BENCH_UPDATE_BASELINES=1),
+    вместо сравнения записывает результат в базу.
+    """
+
+    baselines = _load()
+    print(f"\n[bench:{backend}] {json.dumps(asdict(result))}")
+
+    baseline = baselines.get(backend, {}).get(result.name)
+    if baseline is None or UPDATE_BASELINES:
+        baselines.setdefault(backend, {})[result.name] = {
+            "rps": result.rps,
+            "p95_ms": result.p95_ms,
+        }
+        BASELINES_PATH.write_text(
+            json.dumps(baselines, indent=2, sort_keys=True, ensure_ascii=False) + "\n"
+        )
+        print(f"[bench:{backend}] база {result.name} записана в {BASELINES_PATH}")
+        return
+
+    max_p95 = baseline["p95_ms"] * (1 + TOLERANCE)
+    min_rps = baseline["rps"] / (1 + TOLERANCE)
+    assert result.p95_ms <= max_p95, (
+        f"{result.name}: p95 {result.p95_ms} ms > {max_p95:.2f} ms "
+        f"(база {baseline['p95_ms']} ms)"
+    )
+    assert result.rps >= min_rps, (
+        f"{result.name}: {result.rps} rps < {min_rps:.1f} rps "
+        f"(база {baseline['rps']} rps)"
+    )
@@ -0,0 +1,102 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from tests.benchmarks.conftest import BENCH_PASSWORD
+from tests.benchmarks.harness import check_baseline, run_scenario
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(
+        os.getenv("BENCHMARK") != "1", reason="нагрузочные тесты: BENCHMARK=1"
+    ),
+    pytest.mark.asyncio(loop_scope="session"),
+]
+
+ITERATIONS = int(os.getenv("BENCH_ITERATIONS", "200"))
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "10"))
+# логин упирается в хеширование sha256_crypt, поэтому гоняем его меньше
+LOGIN_ITERATIONS = int(os.getenv("BENCH_LOGIN_ITERATIONS", "20"))
+
+
+def ok(resp):
+    assert resp.status_code < 300, resp.text
+
+
+async def test_login(bench_client, bench_data):
+    users = bench_data.users
+
+    async def request(i):
+        user = users[i % len(users)]
+        ok(
+            await bench_client.post(
+                "/api/v1/auth/token",
+                data={"username": user.username, "password": BENCH_PASSWORD},
+            )
+        )
+
+    result = await run_scenario("login", request, LOGIN_ITERATIONS, CONCURRENCY)
+    check_baseline(result, bench_data.backend)
+
+
+async def test_create_spending(bench_client, bench_data):
+    users = bench_data.users
+    now = datetime.now().isoformat()
+
+    async def request(i):
+        user = users[i % len(users)]
+        ok(
+            await bench_client.post(
+                "/api/v1/spending",
+                headers=user.headers,
+                data={
+                    "expense_date": now,
+                    "category_id": str(user.category_ids[i % len(user.category_ids)]),
+                    "cost": "1",
+                },
+            )
+        )
+
+    result = await run_scenario("create_spending", request, ITERATIONS, CONCURRENCY)
+    check_baseline(result, bench_data.backend)
+
+
+async def test_list_spending(bench_client, bench_data):
+    users = bench_data.users
+    params = {
+        "from_date": (datetime.now() - timedelta(days=90)).isoformat(),
+        "to_date": datetime.now().isoformat(),
+        "limit": 50,
+    }
+
+    async def request(i):
+        user = users[i % len(users)]
+        ok(
+            await bench_client.get(
+                "/api/v1/spending", headers=user.headers, params=params
+            )
+        )
+
+    result = await run_scenario("list_spending", request, ITERATIONS, CONCURRENCY)
+    check_baseline(result, bench_data.backend)
+
+
+@pytest.mark.parametrize("path", ["/api/v1/stats/dynamic", "/api/v1/stats/expenses"])
+async def test_stats(bench_client, bench_data, path):
+    users = bench_data.users
+    periods = ["week", "month", "year"]
+
+    async def request(i):
+        # разные пользователи и периоды, чтобы большинство запросов шло мимо кэша
+        user = users[i % len(users)]
+        period = periods[(i // len(users)) % len(periods)]
+        ok(
+            await bench_client.get(
+                path, headers=user.headers, params={"period": period}
+            )
+        )
+
+    name = "stats_" + path.rsplit("/", 1)[-1]
+    result = await run_scenario(name, request, ITERATIONS, CONCURRENCY)
+    check_baseline(result, bench_data.backend)
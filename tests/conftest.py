@@ -9,7 +9,7 @@ from httpx import AsyncClient, ASGITransport
 from app.core.security import encode_password
 from app.db.models.base import Base
 from app.db.models import *
-from app.db.database import get_db
+from app.db.database import CommitHookSession, get_db
 from app.main import app
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
@@ -22,7 +22,7 @@ TEST_DATABASE_URL = f"sqlite+aiosqlite:///{temp_db.name}"
 
 test_engine = create_async_engine(TEST_DATABASE_URL, echo=False)
 TestSessionLocal = sessionmaker(
-    bind=test_engine, class_=AsyncSession, expire_on_commit=False
+    bind=test_engine, class_=CommitHookSession, expire_on_commit=False
 )
 
 
@@ -187,6 +187,18 @@ class InMemoryMemcached:
         self._store.pop(key, None)
         return True
 
+    async def add(self, key, value, exptime=0):
+        if key in self._store:
+            return False
+        return await self.set(key, value, exptime)
+
+    async def incr(self, key, delta=1):
+        if key not in self._store:
+            return None
+        value = int(self._store[key]) + delta
+        self._store[key] = str(value).encode()
+        return value
+
 
 @pytest.fixture(autouse=True)
 def mock_memcached():
@@ -196,6 +208,38 @@ def mock_memcached():
     memcached_session.set = fake.set
     memcached_session.get = fake.get
     memcached_session.delete = fake.delete
+    memcached_session.add = fake.add
+    memcached_session.incr = fake.incr
+    yield
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    from app.service.auth.cache import local_principals
+
+    # id пользователей повторяются между тестами (таблицы пересоздаются)
+    local_principals.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def stub_currency_provider():
+    from app.service.currency.providers import StaticRatesProvider
+    from app.service.currency.service import currency_service
+
+    # внешний API курсов в тестах не вызывается
+    provider = StaticRatesProvider({"USD": 0.0125, "EUR": 0.0115, "CNY": 0.09})
+    original = currency_service.provider
+    currency_service.set_provider(provider)
+    yield provider
+    currency_service.set_provider(original)
+
+
+@pytest.fixture(autouse=True)
+def clear_category_cache():
+    from app.service.category.resolver import local_categories
+
+    local_categories.clear()
     yield
 
 
@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+
+import pytest
+
+pytestmark = pytest.mark.integration
+
+
+class TestExport:
+    async def _import(self, client, auth_headers, path, category_id, rows):
+        body = "date,category_id,amount,comment\n" + "".join(
+            f"2025-03-{day:02d}T10:00:00,{category_id},{day * 10},день {day}\n"
+            for day in range(1, rows + 1)
+        )
+        resp = await client.post(
+            path,
+            headers=auth_headers,
+            files={"file": ("data.csv", body.encode(), "text/csv")},
+        )
+        assert resp.json()["inserted"] == rows
+
+    async def test_export_spendings_csv_roundtrip(
+        self, client, auth_headers, expense_category
+    ):
+        await self._import(
+            client, auth_headers, "/api/v1/spending/import", expense_category.id, 5
+        )
+
+        resp = await client.get(
+            "/api/v1/spending/export",
+            headers=auth_headers,
+            params={"from_date": "2025-03-02", "to_date": "2025-03-31"},
+        )
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/csv")
+        assert "spending.csv" in resp.headers["content-disposition"]
+
+        rows = list(csv.DictReader(io.StringIO(resp.text)))
+        assert [float(r["amount"]) for r in rows] == [20, 30, 40, 50]
+        assert rows[0]["comment"] == "день 2"
+        assert rows[0]["currency"] == "RUB"
+
+        # выгрузка снова принимается импортом
+        resp = await client.post(
+            "/api/v1/spending/import",
+            headers=auth_headers,
+            files={"file": ("export.csv", resp.content, "text/csv")},
+        )
+        assert resp.json()["inserted"] == 4
+
+    async def test_export_incomes_ndjson(self, client, auth_headers, income_category):
+        await self._import(
+            client, auth_headers, "/api/v1/income/import", income_category.id, 3
+        )
+
+        resp = await client.get(
+            "/api/v1/income/export",
+            headers=auth_headers,
+            params={"format": "ndjson"},
+        )
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/x-ndjson"
+
+        lines = [json.loads(line) for line in resp.text.splitlines()]
+        assert len(lines) == 3
+        assert set(lines[0]) == {
+            "id",
+            "date",
+            "category_id",
+            "amount",
+            "comment",
+            "currency",
+        }
+        assert lines[-1]["category_id"] == income_category.id
+
+    async def test_export_requires_auth(self, client, auth_headers, expense_category):
+        await self._import(
+            client, auth_headers, "/api/v1/spending/import", expense_category.id, 2
+        )
+        resp = await client.get("/api/v1/spending/export", params={"format": "ndjson"})
+        assert resp.status_code == 401
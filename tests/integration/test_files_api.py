@@ -0,0 +1,82 @@
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+pytestmark = pytest.mark.integration
+
+
+class TestFiles:
+    async def _spend(self, client, auth_headers, expense_category):
+        resp = await client.post(
+            "/api/v1/spending",
+            headers=auth_headers,
+            data={
+                "expense_date": datetime.now().isoformat(),
+                "category_id": expense_category.id,
+                "cost": 10,
+            },
+        )
+        return resp.json()["id"]
+
+    async def test_upload_list_url_delete(self, client, auth_headers, expense_category):
+        from app.core.s3 import service as s3_service
+
+        s3_service._presigned_urls.clear()
+        expense_id = await self._spend(client, auth_headers, expense_category)
+
+        with (
+            patch("app.core.s3.service.s3") as mock_s3,
+            patch("app.core.s3.service.s3_public") as mock_public,
+        ):
+            mock_public.generate_presigned_url.side_effect = (
+                lambda op, Params, ExpiresIn: f"http://public/{Params['Key']}"
+            )
+
+            resp = await client.post(
+                "/api/v1/files/upload",
+                headers=auth_headers,
+                data={"transaction_id": expense_id},
+                files={"file": ("check.pdf", b"%PDF-1.4", "application/pdf")},
+            )
+            assert resp.status_code == 201
+            uploaded = resp.json()
+            assert uploaded["transaction_id"] == expense_id
+            assert uploaded["size_bytes"] == 8
+            mock_s3.put_object.assert_called_once()
+
+            resp = await client.get(
+                f"/api/v1/files/transaction/{expense_id}", headers=auth_headers
+            )
+            assert [f["id"] for f in resp.json()] == [uploaded["id"]]
+
+            resp = await client.get(
+                f"/api/v1/files/{uploaded['id']}/download-url", headers=auth_headers
+            )
+            assert resp.status_code == 200
+            assert resp.json()["url"].startswith("http://public/users/")
+
+            resp = await client.delete(
+                f"/api/v1/files/{uploaded['id']}", headers=auth_headers
+            )
+            assert resp.status_code == 204
+            mock_s3.delete_object.assert_called_once()
+
+        resp = await client.get(
+            f"/api/v1/files/transaction/{expense_id}", headers=auth_headers
+        )
+        assert resp.json() == []
+
+    async def test_upload_to_unknown_expense(self, client, auth_headers):
+        with patch("app.core.s3.service.s3") as mock_s3:
+            resp = await client.post(
+                "/api/v1/files/upload",
+                headers=auth_headers,
+                data={"transaction_id": 999},
+                files={"file": ("check.pdf", b"%PDF-1.4", "application/pdf")},
+            )
+        assert resp.status_code == 404
+        mock_s3.put_object.assert_not_called()
+
+        resp = await client.get("/api/v1/files/transaction/999", headers=auth_headers)
+        assert resp.status_code == 404
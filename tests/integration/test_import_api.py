@@ -0,0 +1,130 @@
+import pytest
+from datetime import date
+
+from sqlalchemy import select
+
+from app.db.models.expense_rollup import ExpenseDailyRollup
+
+pytestmark = pytest.mark.integration
+
+
+class TestImport:
+    async def test_import_spendings_csv(
+        self, client, auth_headers, expense_category, income_category
+    ):
+        csv = (
+            "date,category_id,amount,comment\n"
+            f"2025-01-10T12:00:00,{expense_category.id},100,Обед\n"
+            f"2025-01-10T18:00:00,{expense_category.id},50,\n"
+            f"2025-01-11T09:00:00,{income_category.id},10,не тот тип\n"
+            f"not-a-date,{expense_category.id},10,\n"
+            f"2025-01-12T09:00:00,{expense_category.id},-5,\n"
+        )
+        resp = await client.post(
+            "/api/v1/spending/import",
+            headers=auth_headers,
+            files={"file": ("bank.csv", csv.encode(), "text/csv")},
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["inserted"] == 2
+        assert data["skipped"] == 3
+        assert [e["row"] for e in data["errors"]] == [4, 5, 6]
+
+        resp = await client.get(
+            "/api/v1/spending",
+            headers=auth_headers,
+            params={"from_date": "2025-01-01", "to_date": "2025-02-01"},
+        )
+        assert resp.json()["total"] == 2
+
+    async def test_import_then_delete_keeps_rollup_consistent(
+        self, client, auth_headers, expense_category, db_session
+    ):
+        # 01:30 по +03:00 — это ещё 9 января в UTC
+        csv = (
+            "date,category_id,amount\n"
+            f"2025-01-10T01:30:00+03:00,{expense_category.id},100\n"
+        )
+        resp = await client.post(
+            "/api/v1/spending/import",
+            headers=auth_headers,
+            files={"file": ("bank.csv", csv.encode(), "text/csv")},
+        )
+        assert resp.json()["inserted"] == 1
+
+        rollup = (await db_session.scalars(select(ExpenseDailyRollup))).all()
+        assert [(r.day, r.count) for r in rollup] == [(date(2025, 1, 9), 1)]
+
+        resp = await client.get(
+            "/api/v1/spending",
+            headers=auth_headers,
+            params={"from_date": "2025-01-01", "to_date": "2025-02-01"},
+        )
+        spending_id = resp.json()["data"]["expenses"][0]["id"]
+        resp = await client.delete(
+            f"/api/v1/spending/{spending_id}", headers=auth_headers
+        )
+        assert resp.status_code == 200
+
+        db_session.expire_all()
+        rollup = (await db_session.scalars(select(ExpenseDailyRollup))).all()
+        assert [(r.day, r.count, r.total) for r in rollup] == [(date(2025, 1, 9), 0, 0)]
+
+    async def test_import_currency_column(self, client, auth_headers, expense_category):
+        csv = (
+            "date,category_id,amount,currency\n"
+            f"2025-01-10T12:00:00,{expense_category.id},10,usd\n"
+            f"2025-01-10T13:00:00,{expense_category.id},100,\n"
+            f"2025-01-10T14:00:00,{expense_category.id},100,XYZ\n"
+        )
+        resp = await client.post(
+            "/api/v1/spending/import",
+            headers=auth_headers,
+            files={"file": ("bank.csv", csv.encode(), "text/csv")},
+        )
+        data = resp.json()
+        assert data["inserted"] == 2
+        assert [e["row"] for e in data["errors"]] == [4]
+
+        resp = await client.get(
+            "/api/v1/spending",
+            headers=auth_headers,
+            params={"from_date": "2025-01-01", "to_date": "2025-02-01"},
+        )
+        currencies = {e["currency"] for e in resp.json()["data"]["expenses"]}
+        assert currencies == {"USD", "RUB"}
+
+    async def test_import_incomes_csv(self, client, auth_headers, income_category):
+        csv = "date,category_id,amount\n" + "".join(
+            f"2025-02-{day:02d}T10:00:00,{income_category.id},1000\n"
+            for day in range(1, 11)
+        )
+        resp = await client.post(
+            "/api/v1/income/import",
+            headers=auth_headers,
+            files={"file": ("salary.csv", csv.encode(), "text/csv")},
+        )
+        assert resp.status_code == 200
+        assert resp.json()["inserted"] == 10
+
+    async def test_import_unsupported_format(self, client, auth_headers):
+        resp = await client.post(
+            "/api/v1/spending/import",
+            headers=auth_headers,
+            files={"file": ("bank.pdf", b"%PDF", "application/pdf")},
+        )
+        assert resp.status_code == 415
+
+    async def test_import_non_utf8_csv(self, client, auth_headers, expense_category):
+        csv = (
+            "date,category_id,amount,comment\n"
+            f"2025-03-01T10:00:00,{expense_category.id},100,Продукты\n"
+        )
+        resp = await client.post(
+            "/api/v1/spending/import",
+            headers=auth_headers,
+            files={"file": ("bank.csv", csv.encode("cp1251"), "text/csv")},
+        )
+        assert resp.status_code == 400
+        assert "UTF-8" in resp.json()["detail"]
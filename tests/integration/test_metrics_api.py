@@ -0,0 +1,51 @@
+import pytest
+
+from app.core.metrics import http_metrics
+
+pytestmark = pytest.mark.integration
+
+
+class TestPrometheusMetrics:
+    async def test_routes_labeled_by_template(self, client, auth_headers):
+        http_metrics.reset()
+        for spending_id in (100500, 100501):
+            resp = await client.get(
+                f"/api/v1/spending/{spending_id}", headers=auth_headers
+            )
+            assert resp.status_code == 404
+
+        resp = await client.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+        body = resp.text
+        labels = 'method="GET",route="/api/v1/spending/{spending_id}"'
+        assert f"http_request_duration_seconds_count{{{labels}}} 2" in body
+        assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in body
+        assert f'http_responses_total{{{labels},status="404"}} 2' in body
+        assert "100500" not in body
+        # сам запрос /metrics ещё обрабатывается
+        assert "http_requests_in_flight 1" in body
+        assert "db_pool_checkouts_total" in body
+
+    async def test_unknown_path_collapsed(self, client):
+        http_metrics.reset()
+        await client.get("/no/such/path/1")
+        await client.get("/no/such/path/2")
+
+        body = (await client.get("/metrics")).text
+        assert (
+            'http_responses_total{method="GET",route="<unmatched>",status="404"} 2'
+            in body
+        )
+
+
+class TestDbPoolMetrics:
+    async def test_admin_gets_pool_snapshot(self, client, admin_headers):
+        resp = await client.get("/api/v1/metrics/db-pool", headers=admin_headers)
+        assert resp.status_code == 200
+        assert {"checkouts_total", "wait_seconds_max"} <= set(resp.json())
+
+    async def test_user_forbidden(self, client, auth_headers):
+        resp = await client.get("/api/v1/metrics/db-pool", headers=auth_headers)
+        assert resp.status_code == 403
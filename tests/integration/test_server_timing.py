@@ -0,0 +1,41 @@
+import re
+
+import pytest
+
+pytestmark = pytest.mark.integration
+
+SERVER_TIMING = re.compile(r'db;dur=(?P<dur>[\d.]+);desc="(?P<count>\d+) queries"')
+
+
+def db_timing(resp) -> tuple[float, int]:
+    match = SERVER_TIMING.search(resp.headers["server-timing"])
+    assert match, resp.headers["server-timing"]
+    return float(match["dur"]), int(match["count"])
+
+
+class TestServerTiming:
+    async def test_header_counts_queries(self, client, auth_headers, expense_category):
+        resp = await client.get(
+            "/api/v1/spending",
+            headers=auth_headers,
+            params={"from_date": "2025-01-01", "to_date": "2025-02-01"},
+        )
+        assert resp.status_code == 200
+        duration, count = db_timing(resp)
+        assert duration >= 0
+        # страница + total; принципал уже в кэше после логина
+        assert count == 2
+
+    async def test_keyset_page_without_total_is_one_query(
+        self, client, auth_headers, expense_category
+    ):
+        resp = await client.get(
+            "/api/v1/spending",
+            headers=auth_headers,
+            params={"include_total": False},
+        )
+        assert db_timing(resp)[1] == 1
+
+    async def test_no_queries_outside_db(self, client):
+        resp = await client.get("/metrics")
+        assert db_timing(resp)[1] == 0
@@ -1,5 +1,6 @@
 import pytest
 from datetime import datetime, timedelta
+from unittest.mock import patch
 
 pytestmark = pytest.mark.integration
 
@@ -62,7 +63,7 @@ class TestSpendingCRUD:
                 "category_id": expense_category.id,
                 "cost": 50,
             },
-            files={}
+            files={},
         )
         spend_id = create.json()["id"]
         resp = await client.put(
@@ -88,3 +89,182 @@ class TestSpendingCRUD:
         assert resp.status_code == 200
         get = await client.get(f"/api/v1/spending/{spend_id}", headers=auth_headers)
         assert get.status_code == 404
+
+    async def test_get_spendings_cursor_pagination(
+        self, client, auth_headers, expense_category
+    ):
+        now = datetime.now()
+        for i in range(5):
+            await client.post(
+                "/api/v1/spending",
+                headers=auth_headers,
+                data={
+                    "expense_date": (now - timedelta(minutes=i)).isoformat(),
+                    "category_id": expense_category.id,
+                    "cost": 10 * (i + 1),
+                },
+            )
+
+        seen, cursor = [], None
+        while True:
+            params = {
+                "from_date": (now - timedelta(hours=1)).isoformat(),
+                "to_date": now.isoformat(),
+                "limit": 2,
+                "include_total": False,
+            }
+            if cursor:
+                params["cursor"] = cursor
+            resp = await client.get(
+                "/api/v1/spending", headers=auth_headers, params=params
+            )
+            assert resp.status_code == 200
+            body = resp.json()
+            assert body["total"] is None
+            seen.extend(e["value"] for e in body["data"]["expenses"])
+            cursor = body["data"]["next_cursor"]
+            if not cursor:
+                break
+
+        assert seen == [10, 20, 30, 40, 50]
+
+    async def test_get_spendings_invalid_cursor(self, client, auth_headers):
+        resp = await client.get(
+            "/api/v1/spending", headers=auth_headers, params={"cursor": "!!"}
+        )
+        assert resp.status_code == 400
+
+
+class TestSpendingCategoryOwnership:
+    async def test_foreign_category_rejected(
+        self, client, auth_headers, admin_headers, expense_category
+    ):
+        resp = await client.post(
+            "/api/v1/spending",
+            headers=admin_headers,
+            data={
+                "expense_date": datetime.now().isoformat(),
+                "category_id": expense_category.id,
+                "cost": 10,
+            },
+        )
+        assert resp.status_code == 409
+
+    async def test_new_category_visible_after_cached_map(
+        self, client, auth_headers, expense_category
+    ):
+        data = {"expense_date": datetime.now().isoformat(), "cost": 10}
+        resp = await client.post(
+            "/api/v1/spending",
+            headers=auth_headers,
+            data={**data, "category_id": expense_category.id},
+        )
+        assert resp.status_code == 201
+
+        created = await client.post(
+            "/api/v1/categories/",
+            json={"title": "Такси", "type_of_category": "expense"},
+            headers=auth_headers,
+        )
+        resp = await client.post(
+            "/api/v1/spending",
+            headers=auth_headers,
+            data={**data, "category_id": created.json()["id"]},
+        )
+        assert resp.status_code == 201
+
+
+class TestSpendingImages:
+    async def test_batch_image_urls(self, client, auth_headers, expense_category):
+        from app.core.s3 import service as s3_service
+
+        s3_service._presigned_urls.clear()
+        with (
+            patch("app.core.s3.service.s3"),
+            patch("app.core.s3.service.s3_public") as mock_public,
+        ):
+            mock_public.generate_presigned_url.side_effect = (
+                lambda op, Params, ExpiresIn: f"http://public/{Params['Key']}"
+            )
+
+            ids = []
+            for image in (("a.jpg", b"x", "image/jpeg"), None):
+                resp = await client.post(
+                    "/api/v1/spending",
+                    headers=auth_headers,
+                    data={
+                        "expense_date": datetime.now().isoformat(),
+                        "category_id": expense_category.id,
+                        "cost": 10,
+                    },
+                    files={"image": image} if image else None,
+                )
+                assert resp.status_code == 201
+                ids.append(resp.json()["id"])
+
+            resp = await client.get(
+                "/api/v1/spending/images",
+                headers=auth_headers,
+                params={"ids": ids + [999]},
+            )
+            assert resp.status_code == 200
+            urls = resp.json()["urls"]
+            # трата без картинки и чужой id в ответ не попадают
+            assert list(urls) == [str(ids[0])]
+            assert urls[str(ids[0])].startswith("http://public/users/")
+
+            single = await client.get(
+                f"/api/v1/spending/{ids[0]}/image", headers=auth_headers
+            )
+            assert single.json() == urls[str(ids[0])]
+            assert mock_public.generate_presigned_url.call_count == 1
+        s3_service._presigned_urls.clear()
+
+
+class TestSpendingCurrency:
+    async def test_listing_converts_to_base_currency(
+        self, client, auth_headers, expense_category, db_session
+    ):
+        from app.service.currency import crud as currency_crud
+
+        now = datetime.now()
+        await currency_crud.save_rates(db_session, now.date(), {"USD": 90})
+        await db_session.commit()
+
+        resp = await client.post(
+            "/api/v1/spending",
+            headers=auth_headers,
+            data={
+                "expense_date": now.isoformat(),
+                "category_id": expense_category.id,
+                "cost": 10,
+                "currency": "USD",
+            },
+        )
+        assert resp.status_code == 201
+        assert resp.json()["currency"] == "USD"
+
+        resp = await client.get(
+            "/api/v1/spending",
+            headers=auth_headers,
+            params={"from_date": (now - timedelta(hours=1)).isoformat()},
+        )
+        [expense] = resp.json()["data"]["expenses"]
+        assert expense["value"] == 10
+        assert expense["currency"] == "USD"
+        assert expense["base_value"] == 900
+
+    async def test_unknown_currency_rejected(
+        self, client, auth_headers, expense_category
+    ):
+        resp = await client.post(
+            "/api/v1/spending",
+            headers=auth_headers,
+            data={
+                "expense_date": datetime.now().isoformat(),
+                "category_id": expense_category.id,
+                "cost": 10,
+                "currency": "XYZ",
+            },
+        )
+        assert resp.status_code == 422
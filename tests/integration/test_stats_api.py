@@ -31,3 +31,134 @@ class TestStats:
         )
         assert resp.status_code == 200
         assert isinstance(resp.json(), list)
+
+    async def test_expense_stats_cache_invalidated_on_write(
+        self, client, auth_headers, expense_category
+    ):
+        async def spend(cost):
+            await client.post(
+                "/api/v1/spending",
+                headers=auth_headers,
+                data={
+                    "expense_date": datetime.now().isoformat(),
+                    "category_id": expense_category.id,
+                    "cost": cost,
+                },
+            )
+
+        async def total():
+            resp = await client.get(
+                "/api/v1/stats/expenses",
+                headers=auth_headers,
+                params={"period": "week"},
+            )
+            return resp.json()["total"]
+
+        await spend(100)
+        assert await total() == 100
+        assert await total() == 100  # второй запрос — из кеша
+
+        await spend(50)
+        assert await total() == 150
+
+
+class TestCategoryStatsTopN:
+    async def test_top_and_compare(self, client, auth_headers, expense_category):
+        from datetime import datetime, timedelta
+
+        for when, cost in (
+            (datetime.now(), 300),
+            (datetime.now() - timedelta(days=7), 80),
+        ):
+            await client.post(
+                "/api/v1/spending",
+                headers=auth_headers,
+                data={
+                    "expense_date": when.isoformat(),
+                    "category_id": expense_category.id,
+                    "cost": cost,
+                },
+            )
+
+        resp = await client.get(
+            "/api/v1/stats/expenses",
+            headers=auth_headers,
+            params={"period": "week", "top": 3, "compare": True},
+        )
+        assert resp.status_code == 200
+        assert resp.json() == {
+            "categories": [{"title": "Еда", "amount": 300, "previous_amount": 80}],
+            "total": 300,
+            "previous_total": 80,
+        }
+
+
+class TestMonthlyStats:
+    async def test_monthly_series(self, client, auth_headers, expense_category):
+        await client.post(
+            "/api/v1/spending",
+            headers=auth_headers,
+            data={
+                "expense_date": datetime.now().isoformat(),
+                "category_id": expense_category.id,
+                "cost": 70,
+            },
+        )
+
+        resp = await client.get(
+            "/api/v1/stats/monthly", headers=auth_headers, params={"months": 6}
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert len(data) == 6
+        assert data[-1]["expense"] == 70
+        assert all(m["expense"] == 0 for m in data[:-1])
+
+    async def test_months_bounds(self, client, auth_headers):
+        resp = await client.get(
+            "/api/v1/stats/monthly", headers=auth_headers, params={"months": 0}
+        )
+        assert resp.status_code == 422
+
+
+class TestCashflowStats:
+    async def test_income_cashflow_balance(
+        self, client, auth_headers, expense_category, income_category
+    ):
+        now = datetime.now().isoformat()
+        await client.post(
+            "/api/v1/spending",
+            headers=auth_headers,
+            data={"expense_date": now, "category_id": expense_category.id, "cost": 30},
+        )
+        resp = await client.post(
+            "/api/v1/income",
+            headers=auth_headers,
+            data={"income_date": now, "category_id": income_category.id, "value": 100},
+        )
+        assert resp.status_code in (200, 201)
+
+        params = {"period": "today"}
+        income = await client.get(
+            "/api/v1/stats/income", headers=auth_headers, params=params
+        )
+        assert income.status_code == 200
+        assert len(income.json()) == 24
+        assert sum(b["amount"] for b in income.json()) == 100
+
+        flow = (
+            await client.get(
+                "/api/v1/stats/cashflow", headers=auth_headers, params=params
+            )
+        ).json()
+        assert sum(b["income"] for b in flow) == 100
+        assert sum(b["expense"] for b in flow) == 30
+        assert sum(b["net"] for b in flow) == 70
+
+        balance = (
+            await client.get(
+                "/api/v1/stats/balance", headers=auth_headers, params=params
+            )
+        ).json()
+        assert len(balance) == 24
+        assert balance[-1]["balance"] == 70
@@ -1,3 +1,5 @@
+from datetime import date, datetime, timedelta
+
 import pytest
 
 pytestmark = pytest.mark.integration
@@ -21,3 +23,200 @@ class TestUserAdmin:
             json={"user_role": "ADMIN"},
         )
         assert resp.status_code == 422
+
+
+class TestUserProfile:
+    async def test_me(self, client, auth_headers):
+        resp = await client.get("/api/v1/users/me", headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.json()["username"] == "testuser"
+
+    async def test_change_limit_invalidates_principal(self, client, auth_headers):
+        # principal попадает в кеш
+        resp = await client.get("/api/v1/users/me", headers=auth_headers)
+        assert resp.json()["day_expense_limit"] == 1000
+
+        resp = await client.patch(
+            "/api/v1/users/change_limit",
+            headers=auth_headers,
+            params={"new_limit": 250},
+        )
+        assert resp.status_code == 200
+
+        from app.service.auth.cache import get_principal
+
+        principal = await get_principal(resp.json()["id"])
+        assert principal is None
+
+        resp = await client.get("/api/v1/users/me", headers=auth_headers)
+        assert resp.json()["day_expense_limit"] == 250
+
+
+class TestDayBudget:
+    async def _spend(self, client, auth_headers, category_id, cost, when=None):
+        resp = await client.post(
+            "/api/v1/spending",
+            headers=auth_headers,
+            data={
+                "expense_date": (when or datetime.now()).isoformat(),
+                "category_id": category_id,
+                "cost": cost,
+            },
+        )
+        assert resp.status_code == 201
+        return resp.json()
+
+    async def test_create_returns_budget(self, client, auth_headers, expense_category):
+        first = await self._spend(client, auth_headers, expense_category.id, 600)
+        assert first["budget"]["limit"] == 1000
+        assert first["budget"]["remaining"] == 400
+        assert first["budget"]["over_limit"] is False
+
+        second = await self._spend(client, auth_headers, expense_category.id, 500)
+        assert second["budget"]["spent"] == 1100
+        assert second["budget"]["over_limit"] is True
+
+    async def test_budget_follows_update_and_delete(
+        self, client, auth_headers, expense_category
+    ):
+        first = await self._spend(client, auth_headers, expense_category.id, 300)
+        second = await self._spend(client, auth_headers, expense_category.id, 200)
+        await self._spend(
+            client,
+            auth_headers,
+            expense_category.id,
+            5000,
+            when=datetime.now() - timedelta(days=2),
+        )
+
+        await client.put(
+            f"/api/v1/spending/{first['id']}",
+            headers=auth_headers,
+            json={
+                "category_id": expense_category.id,
+                "cost": 900,
+                "expense_date": datetime.now().isoformat(),
+            },
+        )
+        await client.delete(f"/api/v1/spending/{second['id']}", headers=auth_headers)
+
+        resp = await client.get("/api/v1/users/me/budget", headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.json() == {
+            "day": date.today().isoformat(),
+            "limit": 1000,
+            "spent": 900,
+            "remaining": 100,
+            "over_limit": False,
+        }
+
+    async def test_budget_uses_changed_limit(
+        self, client, auth_headers, expense_category
+    ):
+        await self._spend(client, auth_headers, expense_category.id, 300)
+        await client.patch(
+            "/api/v1/users/change_limit",
+            headers=auth_headers,
+            params={"new_limit": 200},
+        )
+
+        data = (
+            await client.get("/api/v1/users/me/budget", headers=auth_headers)
+        ).json()
+        assert data["limit"] == 200
+        assert data["over_limit"] is True
+
+    async def test_create_returns_budget_of_local_day(
+        self, client, auth_headers, expense_category
+    ):
+        await client.patch(
+            "/api/v1/users/change_timezone",
+            headers=auth_headers,
+            json={"timezone": "Asia/Tokyo"},
+        )
+        # 01:00 по Токио 10 марта — в UTC это ещё 9 марта
+        spent = await self._spend(
+            client,
+            auth_headers,
+            expense_category.id,
+            300,
+            datetime.fromisoformat("2025-03-10T01:00:00+09:00"),
+        )
+        assert spent["budget"]["day"] == "2025-03-10"
+        assert spent["budget"]["spent"] == 300
+
+        resp = await client.get(
+            "/api/v1/users/me/budget",
+            headers=auth_headers,
+            params={"day": "2025-03-10"},
+        )
+        assert resp.json()["spent"] == 300
+
+
+class TestUserTimezone:
+    async def test_change_timezone(self, client, auth_headers):
+        resp = await client.get("/api/v1/users/me", headers=auth_headers)
+        assert resp.json()["timezone"] == "UTC"
+
+        resp = await client.patch(
+            "/api/v1/users/change_timezone",
+            headers=auth_headers,
+            json={"timezone": "Europe/Moscow"},
+        )
+        assert resp.status_code == 200
+        assert resp.json()["timezone"] == "Europe/Moscow"
+
+        resp = await client.get("/api/v1/users/me", headers=auth_headers)
+        assert resp.json()["timezone"] == "Europe/Moscow"
+
+    async def test_unknown_timezone_rejected(self, client, auth_headers):
+        resp = await client.patch(
+            "/api/v1/users/change_timezone",
+            headers=auth_headers,
+            json={"timezone": "Mars/Olympus"},
+        )
+        assert resp.status_code == 422
+
+    async def test_stats_follow_timezone(self, client, auth_headers, expense_category):
+        await client.post(
+            "/api/v1/spending",
+            headers=auth_headers,
+            data={
+                "expense_date": datetime.now().isoformat(),
+                "category_id": expense_category.id,
+                "cost": 100,
+            },
+        )
+        await client.patch(
+            "/api/v1/users/change_timezone",
+            headers=auth_headers,
+            json={"timezone": "Asia/Tokyo"},
+        )
+        resp = await client.get(
+            "/api/v1/stats/dynamic", headers=auth_headers, params={"period": "today"}
+        )
+        assert resp.status_code == 200
+        # 24 часовых бакета от полуночи по Токио
+        assert len(resp.json()) == 24
+
+
+class TestUserBaseCurrency:
+    async def test_change_base_currency(self, client, auth_headers):
+        resp = await client.get("/api/v1/users/me", headers=auth_headers)
+        assert resp.json()["base_currency"] == "RUB"
+
+        resp = await client.patch(
+            "/api/v1/users/change_base_currency",
+            headers=auth_headers,
+            json={"base_currency": "USD"},
+        )
+        assert resp.status_code == 200
+        assert resp.json()["base_currency"] == "USD"
+
+    async def test_unknown_currency_rejected(self, client, auth_headers):
+        resp = await client.patch(
+            "/api/v1/users/change_base_currency",
+            headers=auth_headers,
+            json={"base_currency": "XYZ"},
+        )
+        assert resp.status_code == 422
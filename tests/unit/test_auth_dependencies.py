@@ -0,0 +1,25 @@
+import jwt
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.core.settings import settings
+from app.db.models.user import User, UserRoles
+from app.service.auth.dependencies import get_current_user
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_cached_principal():
+    token = jwt.encode({"sub": "7"}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    user = User(id=7, role=UserRoles.USER, day_expense_limit=300)
+
+    with patch(
+        "app.service.auth.crud.get_user_by_id", AsyncMock(return_value=user)
+    ) as get_user:
+        first = await get_current_user(db=None, token=token)
+        second = await get_current_user(db=None, token=token)
+
+    assert get_user.await_count == 1
+    assert first == second
+    assert second.role == UserRoles.USER
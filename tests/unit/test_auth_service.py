@@ -45,12 +45,38 @@ async def test_get_tokens_success(db_session):
     with patch(
         "app.service.auth.crud.get_user_by_username", AsyncMock(return_value=user_db)
     ):
-        with patch("app.service.auth.service.validate_password", return_value=True):
+        with patch(
+            "app.service.auth.service.verify_password",
+            AsyncMock(return_value=(True, None)),
+        ):
             with patch.object(service, "_save_session", AsyncMock()):
                 access, refresh = await service.get_tokens(db_session, form)
                 assert access and refresh
 
 
+@pytest.mark.asyncio
+async def test_get_tokens_rehashes_outdated_password(db_session):
+    service = AuthService()
+    form = OAuth2PasswordRequestForm(username="test", password="correct")
+    user_db = User(id=1, username="test", hashed_password="old-hash")
+    update_hash = AsyncMock()
+    with (
+        patch(
+            "app.service.auth.crud.get_user_by_username",
+            AsyncMock(return_value=user_db),
+        ),
+        patch(
+            "app.service.auth.service.verify_password",
+            AsyncMock(return_value=(True, "new-hash")),
+        ),
+        patch("app.service.auth.crud.update_password_hash", update_hash),
+        patch.object(service, "_save_session", AsyncMock()),
+    ):
+        await service.get_tokens(db_session, form)
+
+    update_hash.assert_awaited_once_with(db_session, 1, "new-hash")
+
+
 @pytest.mark.asyncio
 async def test_get_tokens_user_not_found(db_session):
     service = AuthService()
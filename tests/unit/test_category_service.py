@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from app.service.category.service import CategoryService
 from app.service.category.exception import (
     CategoryNotFoundException,
@@ -25,7 +25,9 @@ async def test_create_category():
             )
         ),
     ):
-        result = await service.create_category(None, category_in, current_user)
+        result = await service.create_category(
+            MagicMock(), category_in, current_user
+        )
         assert result.id == 10
 
 
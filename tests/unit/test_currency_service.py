@@ -1,6 +1,9 @@
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, patch
-from app.service.currency.service import get_currency_rates
+from app.service.currency.providers import StaticRatesProvider
+from app.service.currency.service import CurrencyRatesService, get_currency_rates
 
 pytestmark = pytest.mark.unit
 
@@ -25,3 +28,93 @@ async def test_get_currency_rates_timeout():
     with patch("httpx.AsyncClient.get", side_effect=TimeoutError):
         result = await get_currency_rates()
         assert result is not None
+
+
+class SlowProvider(StaticRatesProvider):
+    async def fetch(self):
+        await asyncio.sleep(0.01)
+        return await super().fetch()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_refresh():
+    provider = SlowProvider({"USD": 0.0125})
+    service = CurrencyRatesService(provider)
+
+    results = await asyncio.gather(*(service.get_rates() for _ in range(10)))
+
+    assert provider.calls == 1
+    assert all(r["usd"] == 80.0 for r in results)
+
+
+@pytest.mark.asyncio
+async def test_refreshes_in_background_before_expiry():
+    provider = SlowProvider({"USD": 0.0125})
+    service = CurrencyRatesService(provider, ttl=60, refresh_ahead=60)
+    await service.get_rates()
+
+    # окно refresh-ahead: ответ сразу из кеша, обновление идёт в фоне
+    provider.rates["USD"] = 0.01
+    assert (await service.get_rates())["usd"] == 80.0
+    await service._refresh_task
+    assert provider.calls == 2
+    assert (await service.get_rates())["usd"] == 100.0
+
+
+@pytest.mark.asyncio
+async def test_provider_error_keeps_last_rates():
+    provider = StaticRatesProvider({"USD": 0.0125})
+    service = CurrencyRatesService(provider, ttl=0)
+    assert (await service.get_rates())["usd"] == 80.0
+
+    provider.fetch = AsyncMock(side_effect=RuntimeError("down"))
+    assert (await service.get_rates())["usd"] == 80.0
+
+
+@pytest.mark.asyncio
+async def test_provider_error_backs_off():
+    provider = StaticRatesProvider({"USD": 0.0125})
+    service = CurrencyRatesService(provider, ttl=0)
+    await service.get_rates()
+
+    provider.fetch = AsyncMock(side_effect=RuntimeError("down"))
+    for _ in range(5):
+        assert (await service.get_rates())["usd"] == 80.0
+    # до конца backoff устаревшие курсы отдаются без запросов к API
+    assert provider.fetch.await_count == 1
+
+    service._expires_at = service._retry_at = 0.0
+    assert (await service.get_rates())["usd"] == 80.0
+    assert provider.fetch.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_workers_share_one_snapshot():
+    # два сервиса над одним Memcached — как два воркера
+    provider = SlowProvider({"USD": 0.0125})
+    first = CurrencyRatesService(provider)
+    second = CurrencyRatesService(provider)
+
+    results = await asyncio.gather(
+        *(service.get_rates() for service in (first, second) for _ in range(5))
+    )
+
+    assert provider.calls == 1
+    assert all(r["usd"] == 80.0 for r in results)
+    assert (await CurrencyRatesService(provider).get_rates())["usd"] == 80.0
+    assert provider.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_lock_holder_missing_falls_back_to_provider():
+    from app.core.memcached.session import memcached_session
+    from app.service.currency import service as currency_module
+
+    # блокировку держит упавший воркер, снимка нет
+    await memcached_session.add(currency_module.LOCK_KEY, "1")
+    provider = StaticRatesProvider({"USD": 0.0125})
+    service = CurrencyRatesService(provider)
+
+    with patch.object(currency_module, "LOCK_WAIT_SECONDS", 0.05):
+        assert (await service.get_rates())["usd"] == 80.0
+    assert provider.calls == 1
@@ -0,0 +1,64 @@
+import asyncio
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.db.pool import TimedQueuePool, create_engine, pool_snapshot
+
+pytestmark = pytest.mark.unit
+
+POOL_SETTINGS = SimpleNamespace(
+    DB_POOL_SIZE=1,
+    DB_MAX_OVERFLOW=1,
+    DB_POOL_TIMEOUT=0.1,
+    DB_POOL_RECYCLE=1800,
+    DB_POOL_PRE_PING=False,
+    DB_STATEMENT_CACHE_SIZE=None,
+)
+
+
+@pytest.fixture
+async def engine():
+    with tempfile.NamedTemporaryFile(suffix=".db") as f:
+        engine = create_engine(f"sqlite+aiosqlite:///{f.name}", POOL_SETTINGS)
+        yield engine
+        await engine.dispose()
+
+
+async def test_pool_configured_from_settings(engine):
+    pool = engine.sync_engine.pool
+    assert isinstance(pool, TimedQueuePool)
+    assert pool.size() == 1
+    assert pool._timeout == 0.1
+
+
+async def test_pool_snapshot_counts_overflow_and_timeouts(engine):
+    async with engine.connect() as first, engine.connect() as second:
+        await first.execute(text("select 1"))
+        await second.execute(text("select 1"))
+
+        snapshot = pool_snapshot(engine)
+        assert snapshot["checked_out"] == 2
+        assert snapshot["overflow"] == 1
+
+        with pytest.raises(PoolTimeoutError):
+            async with engine.connect() as third:
+                await third.execute(text("select 1"))
+
+    snapshot = pool_snapshot(engine)
+    assert snapshot["checked_out"] == 0
+    assert snapshot["checkouts_total"] == 2
+    assert snapshot["overflow_checkouts_total"] == 1
+    assert snapshot["timeouts_total"] == 1
+    assert snapshot["wait_count"] == 3
+    assert snapshot["wait_seconds_max"] >= 0.1
+
+
+async def test_in_memory_sqlite_keeps_default_pool():
+    engine = create_engine("sqlite+aiosqlite:///:memory:", POOL_SETTINGS)
+    assert not isinstance(engine.sync_engine.pool, TimedQueuePool)
+    assert pool_snapshot(engine)["checkouts_total"] == 0
+    await engine.dispose()
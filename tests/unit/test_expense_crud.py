@@ -34,3 +34,35 @@ async def test_get_user_expenses_with_filters(
     )
     assert len(expenses) == 1
     assert total == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_expenses_updates_rollup(
+    db_session, registered_user, expense_category
+):
+    from sqlalchemy import select
+
+    from app.db.models.expense_rollup import ExpenseDailyRollup
+    from app.schemas.expense import ExpenseCreate
+    from app.service.expense.crud import bulk_create_expenses
+
+    rows = [
+        ExpenseCreate(
+            expense_date=datetime(2025, 5, 1 + i % 2, 12),
+            category_id=expense_category.id,
+            cost=10,
+        )
+        for i in range(5)
+    ]
+    inserted = await bulk_create_expenses(db_session, registered_user.id, rows)
+    assert inserted == 5
+
+    res = await db_session.execute(
+        select(
+            ExpenseDailyRollup.day, ExpenseDailyRollup.total, ExpenseDailyRollup.count
+        )
+    )
+    assert {(r.day.day, float(r.total), r.count) for r in res} == {
+        (1, 30, 3),
+        (2, 20, 2),
+    }
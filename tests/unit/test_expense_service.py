@@ -2,33 +2,112 @@ from datetime import datetime
 
 import pytest
 from unittest.mock import AsyncMock, patch
+
+from app.db.models.category import TypesOfCat
 from app.service.expense.service import ExpenseService
-from app.service.category.exception import CategoryTypeException
+from app.service.category.exception import (
+    CategoryNotFoundException,
+    CategoryPermissionException,
+    CategoryTypeException,
+)
 from app.schemas.expense import ExpenseCreate
-from app.schemas.dataclasses.category import CategoryDTO
+from app.schemas.dataclasses.category import CategoryDTO, CategoryRefDTO
 
 pytestmark = pytest.mark.unit
 
 
+def make_expense(category_id=1):
+    return ExpenseCreate(
+        category_id=category_id, cost=100, comment=None, expense_date=datetime.now()
+    )
+
+
 @pytest.mark.asyncio
 async def test_create_expense_wrong_category_type():
     service = ExpenseService()
-    # Исправленный мок: добавляем все обязательные поля CategoryDTO
-    with patch.object(
-        service,
-        "_validate_category",
-        AsyncMock(
-            return_value=CategoryDTO(
-                id=1, title="", type_of_category="income", user_id=1
-            )
-        ),
+    # карта категорий пользователя: категория 1 — доходная
+    with patch(
+        "app.service.category.crud.get_category_refs",
+        AsyncMock(return_value={1: CategoryRefDTO(TypesOfCat.INCOME, user_id=1)}),
     ):
         with pytest.raises(CategoryTypeException):
-            await service.create_expense(
-                None,
-                ExpenseCreate(
-                    category_id=1, cost=100, comment=None, expense_date=datetime.now()
-                ),
-                1,
-                None,
-            )
+            await service.create_expense(None, make_expense(), 1, None)
+
+
+@pytest.mark.asyncio
+async def test_create_expense_foreign_category():
+    service = ExpenseService()
+    with (
+        patch(
+            "app.service.category.crud.get_category_refs",
+            AsyncMock(return_value={}),
+        ),
+        patch(
+            "app.service.category.crud.get_category_by_id",
+            AsyncMock(
+                return_value=CategoryDTO(
+                    id=7, title="", type_of_category=TypesOfCat.EXPENSE, user_id=2
+                )
+            ),
+        ),
+    ):
+        with pytest.raises(CategoryPermissionException):
+            await service.create_expense(None, make_expense(category_id=7), 1, None)
+
+
+@pytest.mark.asyncio
+async def test_category_map_loaded_once_per_user(db_session):
+    from app.service.category.resolver import resolve_category
+
+    refs = AsyncMock(return_value={1: CategoryRefDTO(TypesOfCat.EXPENSE, user_id=1)})
+    with patch("app.service.category.crud.get_category_refs", refs):
+        for _ in range(3):
+            await resolve_category(db_session, 1, 1, TypesOfCat.EXPENSE)
+
+    assert refs.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_category_deleted_in_other_worker(
+    db_session, registered_user, expense_category
+):
+    from app.core.memcached.session import memcached_session
+    from app.service.category import crud as category_crud
+    from app.service.category import resolver
+
+    service = ExpenseService()
+    user_id, category_id = registered_user.id, expense_category.id
+    await service.create_expense(db_session, make_expense(category_id), user_id)
+    await db_session.commit()
+
+    # другой воркер удалил категорию: его локальный сброс сюда не доходит,
+    # доходит только новое поколение в Memcached
+    await category_crud.delete_category(db_session, category_id)
+    await db_session.commit()
+    await memcached_session.incr(resolver._generation_key(user_id))
+
+    with pytest.raises(CategoryNotFoundException):
+        await service.create_expense(db_session, make_expense(category_id), user_id)
+
+
+@pytest.mark.asyncio
+async def test_stats_cache_invalidated_after_commit(
+    db_session, registered_user, expense_category
+):
+    from app.service.stats import cache as stats_cache
+
+    service = ExpenseService()
+    user_id, category_id = registered_user.id, expense_category.id
+    generation = await stats_cache._get_generation(user_id)
+
+    # откат транзакции кеш не трогает
+    await service.create_expense(db_session, make_expense(category_id), user_id)
+    await db_session.rollback()
+    assert await stats_cache._get_generation(user_id) == generation
+
+    # до commit параллельный запрос читает старые данные — поколение прежнее
+    await service.create_expense(db_session, make_expense(category_id), user_id)
+    assert await stats_cache._get_generation(user_id) == generation
+
+    await db_session.commit()
+    assert await stats_cache._get_generation(user_id) != generation
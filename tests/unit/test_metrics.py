@@ -0,0 +1,25 @@
+import pytest
+
+from app.core.metrics import Histogram, HttpMetrics
+
+pytestmark = pytest.mark.unit
+
+
+def test_histogram_buckets_are_cumulative_in_render():
+    metrics = HttpMetrics()
+    for seconds in (0.001, 0.02, 0.02, 3.0, 60.0):
+        metrics.observe("GET", "/api/v1/stats/categories", 200, seconds)
+
+    body = metrics.render()
+    labels = 'method="GET",route="/api/v1/stats/categories"'
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.005"}} 1' in body
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.025"}} 3' in body
+    assert f'http_request_duration_seconds_bucket{{{labels},le="5.0"}} 4' in body
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 5' in body
+
+
+def test_histogram_boundary_goes_to_lower_bucket():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    histogram.observe(0.1)
+    histogram.observe(1.5)
+    assert histogram.counts == [1, 0, 1]
@@ -0,0 +1,95 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app.schemas.stats import BucketWidth
+from app.service.expense.crud import get_user_expenses
+from app.service.income.crud import get_incomes_by_period
+from app.service.stats.crud import get_expense_buckets
+
+pytestmark = pytest.mark.unit
+
+
+@contextmanager
+def captured_statements(db_session):
+    """Собирает SQL и параметры всех выполненных запросов"""
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = db_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+
+async def explain(db_session, statement, parameters) -> str:
+    conn = await db_session.connection()
+    if conn.dialect.name == "sqlite":
+        res = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        return "\n".join(str(row[-1]) for row in res)
+
+    # на пустой таблице Postgres всё равно выберет seq scan
+    await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    res = await conn.exec_driver_sql("EXPLAIN " + statement, parameters)
+    return "\n".join(row[0] for row in res)
+
+
+async def assert_uses_index(db_session, statements, table, index):
+    checked = [s for s in statements if f"FROM {table}" in s[0]]
+    assert checked
+    for statement, parameters in checked:
+        plan = await explain(db_session, statement, parameters)
+        assert index in plan, plan
+
+
+@pytest.mark.asyncio
+async def test_expense_listing_uses_user_date_index(db_session, registered_user):
+    with captured_statements(db_session) as statements:
+        await get_user_expenses(
+            db=db_session,
+            user_id=registered_user.id,
+            skip=0,
+            limit=10,
+            from_date=datetime(2020, 1, 1),
+            to_date=datetime(2030, 1, 1),
+        )
+    await assert_uses_index(
+        db_session, statements, "expenses", "ix_expenses_user_id_expense_date"
+    )
+
+
+@pytest.mark.asyncio
+async def test_income_listing_uses_user_date_index(db_session, registered_user):
+    with captured_statements(db_session) as statements:
+        await get_incomes_by_period(
+            db=db_session,
+            user_id=registered_user.id,
+            from_date=datetime(2020, 1, 1),
+            to_date=datetime(2030, 1, 1),
+            skip=0,
+            limit=10,
+        )
+    await assert_uses_index(
+        db_session, statements, "incomes", "ix_incomes_user_id_income_date"
+    )
+
+
+@pytest.mark.asyncio
+async def test_hourly_stats_use_user_date_index(db_session, registered_user):
+    with captured_statements(db_session) as statements:
+        await get_expense_buckets(
+            db_session,
+            registered_user.id,
+            BucketWidth.hour,
+            datetime(2025, 3, 3),
+            datetime(2025, 3, 3, 23, 59),
+        )
+    await assert_uses_index(
+        db_session, statements, "expenses", "ix_expenses_user_id_expense_date"
+    )
@@ -0,0 +1,42 @@
+import logging
+
+import pytest
+from sqlalchemy import text
+
+from app.core.settings import settings
+from app.db.query_stats import parameters_shape, track_queries
+
+pytestmark = pytest.mark.unit
+
+
+def test_parameters_shape_hides_values():
+    assert parameters_shape({"user_id": 1, "comment": "секрет"}) == {
+        "user_id": "int",
+        "comment": "str",
+    }
+    assert parameters_shape((1, "a")) == ["int", "str"]
+    assert parameters_shape([{"x": 1.5}, {"x": 2.5}]) == {
+        "rows": 2,
+        "row": {"x": "float"},
+    }
+
+
+async def test_track_queries_counts_statements(db_session):
+    with track_queries() as stats:
+        await db_session.execute(text("select 1"))
+        await db_session.execute(text("select 2"))
+    await db_session.execute(text("select 3"))
+
+    assert stats.count == 2
+    assert stats.seconds > 0
+
+
+async def test_slow_query_logged_with_shape(db_session, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "DB_SLOW_QUERY_SECONDS", 0)
+    with caplog.at_level(logging.WARNING, logger="app.db.query_stats"):
+        await db_session.execute(text("select :value"), {"value": "секрет"})
+
+    [record] = caplog.records
+    assert "select ?" in record.getMessage()
+    assert "params=['str']" in record.getMessage()
+    assert "секрет" not in record.getMessage()
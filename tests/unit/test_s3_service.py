@@ -1,16 +1,139 @@
+import asyncio
+import hashlib
+
 import pytest
 from unittest.mock import AsyncMock, patch
-from app.core.s3.service import upload_file
 
+from fastapi import HTTPException
 
-@pytest.mark.asyncio
-async def test_upload_file():
+from app.core.s3 import service as s3_service
+from app.core.s3.service import (
+    delete_file,
+    get_download_urls,
+    upload_file,
+    upload_stream,
+)
+
+
+def make_file(*chunks, size=None):
     mock_file = AsyncMock()
-    mock_file.read = AsyncMock(return_value=b"data")
+    mock_file.read = AsyncMock(side_effect=[*chunks, b""])
     mock_file.filename = "test.jpg"
     mock_file.content_type = "image/jpeg"  # обязательно!
+    mock_file.size = size
+    return mock_file
+
+
+@pytest.mark.asyncio
+async def test_upload_file():
+    mock_file = make_file(b"data", size=4)
 
     with patch("app.core.s3.service.s3") as mock_s3:
-        mock_s3.upload_fileobj = AsyncMock()
         key = await upload_file(mock_file, 1)
         assert key.startswith("users/1/")
+        mock_s3.put_object.assert_called_once()
+        assert mock_s3.put_object.call_args.kwargs["Body"] == b"data"
+
+
+@pytest.mark.asyncio
+async def test_upload_file_multipart():
+    mock_file = make_file(b"a" * 3, b"b" * 3, b"c" * 2)
+
+    with (
+        patch("app.core.s3.service.s3") as mock_s3,
+        patch("app.core.s3.service.PART_SIZE", 4),
+    ):
+        mock_s3.create_multipart_upload.return_value = {"UploadId": "u1"}
+        mock_s3.upload_part.side_effect = lambda **kw: {"ETag": kw["Body"].decode()}
+        await upload_file(mock_file, 1)
+
+        bodies = [c.kwargs["Body"] for c in mock_s3.upload_part.call_args_list]
+        assert bodies == [b"aaab", b"bbcc"]
+        mock_s3.complete_multipart_upload.assert_called_once()
+        mock_s3.put_object.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_upload_file_too_large_aborts_while_streaming():
+    mock_file = make_file(b"a" * 4, b"b" * 4, b"c" * 4)
+
+    with (
+        patch("app.core.s3.service.s3") as mock_s3,
+        patch("app.core.s3.service.PART_SIZE", 4),
+        patch("app.core.s3.service.MAX_SIZE", 6),
+    ):
+        mock_s3.create_multipart_upload.return_value = {"UploadId": "u1"}
+        mock_s3.upload_part.return_value = {"ETag": "e"}
+        with pytest.raises(HTTPException) as exc:
+            await upload_file(mock_file, 1)
+
+        assert exc.value.status_code == 413
+        assert mock_file.read.await_count == 2  # третий кусок не читали
+        mock_s3.abort_multipart_upload.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_upload_stream_hashes_while_streaming():
+    mock_file = make_file(b"a" * 3, b"b" * 3, b"c" * 2)
+
+    with (
+        patch("app.core.s3.service.s3") as mock_s3,
+        patch("app.core.s3.service.PART_SIZE", 4),
+    ):
+        mock_s3.create_multipart_upload.return_value = {"UploadId": "u1"}
+        mock_s3.upload_part.return_value = {"ETag": "e"}
+        stored = await upload_stream(mock_file, "k", "image/jpeg", 100)
+
+    assert stored.size == 8
+    assert stored.sha256 == hashlib.sha256(b"aaabbbcc").hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_uploads_wait_for_free_slot():
+    slots = asyncio.Semaphore(1)
+    with (
+        patch("app.core.s3.service.s3"),
+        patch("app.core.s3.service._upload_slots", slots),
+        patch.object(s3_service.settings, "S3_UPLOAD_QUEUE_TIMEOUT", 0.05),
+    ):
+        # слот занят другой загрузкой — очередь ждёт и отказывает с 503
+        await slots.acquire()
+        with pytest.raises(HTTPException) as exc:
+            await upload_file(make_file(b"data"), 1)
+        assert exc.value.status_code == 503
+
+        # после освобождения загрузка проходит и возвращает слот
+        slots.release()
+        await upload_file(make_file(b"data"), 1)
+        assert not slots.locked()
+
+
+@pytest.fixture
+def presigner():
+    s3_service._presigned_urls.clear()
+    with patch("app.core.s3.service.s3_public") as mock_public:
+        mock_public.generate_presigned_url.side_effect = (
+            lambda op, Params, ExpiresIn: f"http://public/{Params['Key']}?sig"
+        )
+        yield mock_public
+    s3_service._presigned_urls.clear()
+
+
+@pytest.mark.asyncio
+async def test_download_urls_signed_once_per_key(presigner):
+    urls = await get_download_urls(["a", "b", "a"])
+    assert urls == {"a": "http://public/a?sig", "b": "http://public/b?sig"}
+
+    # повторный запрос отдаётся из кеша, подписывается только новый ключ
+    urls = await get_download_urls(["a", "c"])
+    assert set(urls) == {"a", "c"}
+    assert presigner.generate_presigned_url.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_delete_file_drops_cached_url(presigner):
+    await get_download_urls(["a"])
+    with patch("app.core.s3.service.s3"):
+        await delete_file("a")
+    await get_download_urls(["a"])
+    assert presigner.generate_presigned_url.call_count == 2
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from passlib.hash import sha256_crypt
+
+from app.core.security import PasswordHasher, pwd_context
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(workers=1)
+    yield hasher
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_in_pool(hasher):
+    hashed = await hasher.hash("secret")
+    assert pwd_context.verify("secret", hashed)
+
+    assert await hasher.verify_and_update("secret", hashed) == (True, None)
+    valid, _ = await hasher.verify_and_update("wrong", hashed)
+    assert not valid
+    assert hasher.snapshot()["jobs_total"] == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrency_bounded_by_pool_size(hasher):
+    hashed = pwd_context.hash("secret")
+
+    results = await asyncio.gather(
+        *(hasher.verify_and_update("secret", hashed) for _ in range(3))
+    )
+    assert all(valid for valid, _ in results)
+
+    stats = hasher.snapshot()
+    assert stats["in_flight"] == 0 and stats["waiting"] == 0
+    # с одним процессом задачи ждали друг друга в очереди
+    assert stats["queue_seconds_max"] > 0
+
+
+@pytest.mark.asyncio
+async def test_outdated_rounds_rehashed(hasher):
+    weak = sha256_crypt.using(rounds=1000).hash("secret")
+
+    valid, new_hash = await hasher.verify_and_update("secret", weak)
+    assert valid
+    assert new_hash and not pwd_context.needs_update(new_hash)
+    assert hasher.snapshot()["rehashed_total"] == 1
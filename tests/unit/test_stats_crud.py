@@ -1,27 +1,403 @@
 import pytest
-from datetime import datetime
-from app.service.stats.crud import get_category_expenses
-from app.db.models.expense import Expense
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import select
+
+from app.db.models.expense_rollup import ExpenseDailyRollup
+from app.schemas.expense import ExpenseCreate, ExpenseUpdate
+from app.schemas.stats import BucketWidth
+from app.service.budget.crud import get_spent_on_day
+from app.service.currency import crud as currency_crud
+from app.service.expense import crud as expense_crud
+from app.service.stats.crud import (
+    get_balance_buckets,
+    get_cashflow_buckets,
+    get_category_expenses,
+    get_expense_buckets,
+)
 
 pytestmark = pytest.mark.unit
 
 
 @pytest.mark.asyncio
 async def test_get_category_expenses(db_session, registered_user, expense_category):
-    # создаём расходы
+    # создаём расходы через crud, чтобы обновился дневной rollup
     for i in range(3):
-        exp = Expense(
+        await expense_crud.create_expense(
+            db_session,
+            ExpenseCreate(
+                expense_date=datetime.now(),
+                category_id=expense_category.id,
+                cost=100 * (i + 1),
+                comment="test",
+            ),
+            registered_user.id,
+            None,
+        )
+    await db_session.commit()
+
+    result = await get_category_expenses(
+        db_session, registered_user.id, datetime(2000, 1, 1), datetime(2100, 1, 1)
+    )
+    assert [(c.title, c.amount) for c in result.categories] == [("Еда", 600)]
+    assert result.total == 600
+    assert result.previous_total is None
+
+
+@pytest.mark.asyncio
+async def test_get_category_expenses_top_n_and_other(db_session, registered_user):
+    from app.db import Category
+    from app.db.models.category import TypesOfCat
+
+    categories = [
+        Category(
+            title=f"cat{i}",
+            type_of_category=TypesOfCat.EXPENSE,
             user_id=registered_user.id,
+        )
+        for i in range(5)
+    ]
+    db_session.add_all(categories)
+    await db_session.flush()
+
+    # текущий период: cat_i тратит 100*(i+1); предыдущий: по 10 на каждую
+    for i, category in enumerate(categories):
+        for day, cost in (
+            (datetime(2025, 3, 15), 100 * (i + 1)),
+            (datetime(2025, 2, 15), 10),
+        ):
+            await expense_crud.create_expense(
+                db_session,
+                ExpenseCreate(expense_date=day, category_id=category.id, cost=cost),
+                registered_user.id,
+                None,
+            )
+
+    result = await get_category_expenses(
+        db_session,
+        registered_user.id,
+        datetime(2025, 3, 1),
+        datetime(2025, 3, 31),
+        top_n=2,
+        previous_from=datetime(2025, 2, 1),
+    )
+
+    assert [(c.title, c.amount, c.previous_amount) for c in result.categories] == [
+        ("cat4", 500, 10),
+        ("cat3", 400, 10),
+        ("Другое", 600, 30),
+    ]
+    assert result.total == 1500
+    assert result.previous_total == 50
+
+
+@pytest.mark.asyncio
+async def test_get_category_expenses_empty_current_period(
+    db_session, registered_user, expense_category
+):
+    await expense_crud.create_expense(
+        db_session,
+        ExpenseCreate(
+            expense_date=datetime(2025, 2, 15),
+            category_id=expense_category.id,
+            cost=300,
+        ),
+        registered_user.id,
+        None,
+    )
+
+    result = await get_category_expenses(
+        db_session,
+        registered_user.id,
+        datetime(2025, 3, 1),
+        datetime(2025, 3, 31),
+        previous_from=datetime(2025, 2, 1),
+    )
+    assert result.categories == []
+    assert result.total == 0
+    assert result.previous_total == 300
+
+
+@pytest.mark.asyncio
+async def test_rollup_follows_update_and_delete(
+    db_session, registered_user, expense_category
+):
+    expense = await expense_crud.create_expense(
+        db_session,
+        ExpenseCreate(
+            expense_date=datetime(2025, 1, 10, 12),
+            category_id=expense_category.id,
+            cost=100,
+        ),
+        registered_user.id,
+        None,
+    )
+    await expense_crud.update_expense(
+        db_session,
+        expense,
+        ExpenseUpdate(
+            expense_date=datetime(2025, 1, 11, 12),
             category_id=expense_category.id,
-            value=100 * (i + 1),
-            expense_date=datetime.now(),
-            comment="test",
+            cost=250,
+        ),
+    )
+
+    rollup = select(
+        ExpenseDailyRollup.day, ExpenseDailyRollup.total, ExpenseDailyRollup.count
+    )
+    rows = (await db_session.execute(rollup)).all()
+    by_day = {row.day.day: (float(row.total), row.count) for row in rows}
+    assert by_day == {10: (0, 0), 11: (250, 1)}
+
+    await expense_crud.delete_expense(db_session, expense)
+    rows = (await db_session.execute(rollup)).all()
+    assert all(row.count == 0 and float(row.total) == 0 for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_expense_buckets_are_dense(db_session, registered_user, expense_category):
+    for day, cost in ((3, 100), (3, 50), (5, 200)):
+        await expense_crud.create_expense(
+            db_session,
+            ExpenseCreate(
+                expense_date=datetime(2025, 3, day, 10),
+                category_id=expense_category.id,
+                cost=cost,
+            ),
+            registered_user.id,
+            None,
+        )
+
+    days = await get_expense_buckets(
+        db_session,
+        registered_user.id,
+        BucketWidth.day,
+        datetime(2025, 3, 1),
+        datetime(2025, 3, 7, 23, 59),
+    )
+    assert [d.date.day for d in days] == [1, 2, 3, 4, 5, 6, 7]
+    assert [d.amount for d in days] == [0, 0, 150, 0, 200, 0, 0]
+
+    months = await get_expense_buckets(
+        db_session,
+        registered_user.id,
+        BucketWidth.month,
+        datetime(2025, 1, 15),
+        datetime(2025, 4, 1),
+    )
+    assert [(m.date.month, m.amount) for m in months] == [
+        (1, 0),
+        (2, 0),
+        (3, 350),
+        (4, 0),
+    ]
+
+    hours = await get_expense_buckets(
+        db_session,
+        registered_user.id,
+        BucketWidth.hour,
+        datetime(2025, 3, 3),
+        datetime(2025, 3, 3, 23, 59),
+    )
+    assert len(hours) == 24
+    assert hours[10].amount == 150
+
+
+@pytest.mark.asyncio
+async def test_cashflow_and_balance_buckets(
+    db_session, registered_user, expense_category
+):
+    from app.db import Category, Income
+    from app.db.models.category import TypesOfCat
+
+    salary = Category(
+        title="Зарплата", type_of_category=TypesOfCat.INCOME, user_id=registered_user.id
+    )
+    db_session.add(salary)
+    await db_session.flush()
+
+    # до окна: сальдо 1000 - 300 = 700
+    for day, cost in ((datetime(2025, 2, 20), 300), (datetime(2025, 3, 2), 120)):
+        await expense_crud.create_expense(
+            db_session,
+            ExpenseCreate(expense_date=day, category_id=expense_category.id, cost=cost),
+            registered_user.id,
+            None,
+        )
+    for day, value in ((datetime(2025, 2, 1), 1000), (datetime(2025, 3, 3), 500)):
+        db_session.add(
+            Income(
+                user_id=registered_user.id,
+                income_date=day,
+                category_id=salary.id,
+                value=value,
+            )
+        )
+    await db_session.flush()
+
+    window = (datetime(2025, 3, 1), datetime(2025, 3, 4, 23, 59))
+    flow = await get_cashflow_buckets(
+        db_session, registered_user.id, BucketWidth.day, *window
+    )
+    assert [(f.date.day, f.income, f.expense, f.net) for f in flow] == [
+        (1, 0, 0, 0),
+        (2, 0, 120, -120),
+        (3, 500, 0, 500),
+        (4, 0, 0, 0),
+    ]
+
+    balance = await get_balance_buckets(
+        db_session, registered_user.id, BucketWidth.day, *window
+    )
+    assert [(b.net, b.balance) for b in balance] == [
+        (0, 700),
+        (-120, 580),
+        (500, 1080),
+        (0, 1080),
+    ]
+
+
+@pytest.fixture
+async def multi_currency(db_session, registered_user, expense_category):
+    # USD: 80 ₽ с 1 марта, 100 ₽ с 3 марта
+    await currency_crud.save_rates(db_session, date(2025, 3, 1), {"USD": 80})
+    await currency_crud.save_rates(db_session, date(2025, 3, 3), {"USD": 100})
+
+    for day, cost, currency in (
+        (datetime(2025, 2, 20, 12), 1, "USD"),  # до начала истории
+        (datetime(2025, 3, 2, 12), 10, "USD"),
+        (datetime(2025, 3, 4, 12), 10, "USD"),  # курс ближайшего прошлого дня
+        (datetime(2025, 3, 4, 13), 500, "RUB"),
+    ):
+        await expense_crud.create_expense(
+            db_session,
+            ExpenseCreate(
+                expense_date=day,
+                category_id=expense_category.id,
+                cost=cost,
+                currency=currency,
+            ),
+            registered_user.id,
+            None,
+        )
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_rollup_is_split_by_currency(db_session, registered_user, multi_currency):
+    rows = (
+        await db_session.execute(
+            select(ExpenseDailyRollup.currency, ExpenseDailyRollup.total)
+            .where(ExpenseDailyRollup.day == date(2025, 3, 4))
+            .order_by(ExpenseDailyRollup.currency)
         )
-        db_session.add(exp)
+    ).all()
+    assert [(r.currency, float(r.total)) for r in rows] == [("RUB", 500), ("USD", 10)]
+
+
+@pytest.mark.asyncio
+async def test_aggregates_convert_by_rate_of_the_day(
+    db_session, registered_user, multi_currency
+):
+    march = (datetime(2025, 3, 1), datetime(2025, 3, 31))
+
+    rub = await get_category_expenses(db_session, registered_user.id, *march)
+    assert rub.total == 10 * 80 + 10 * 100 + 500
+
+    usd = await get_category_expenses(
+        db_session, registered_user.id, *march, currency="USD"
+    )
+    assert usd.total == 10 + 10 + 5
+
+    # траты до начала истории — по самому раннему курсу
+    february = await get_expense_buckets(
+        db_session,
+        registered_user.id,
+        BucketWidth.hour,
+        datetime(2025, 2, 20),
+        datetime(2025, 2, 20, 23),
+    )
+    assert sum(b.amount for b in february) == 80
+
+    spent = await get_spent_on_day(
+        db_session, registered_user.id, date(2025, 3, 4), "USD"
+    )
+    assert float(spent) == 15
+
+
+@pytest.mark.asyncio
+async def test_balance_history_and_unknown_rates(
+    db_session, registered_user, expense_category, multi_currency
+):
+    # для EUR курсов нет: сумма не пересчитывается как рубли, а не учитывается
+    await expense_crud.create_expense(
+        db_session,
+        ExpenseCreate(
+            expense_date=datetime(2025, 3, 2, 12),
+            category_id=expense_category.id,
+            cost=7,
+            currency="EUR",
+        ),
+        registered_user.id,
+        None,
+    )
+    await db_session.commit()
+
+    window = (datetime(2025, 3, 3), datetime(2025, 3, 3, 23, 59))
+    rub = await get_balance_buckets(
+        db_session, registered_user.id, BucketWidth.day, *window
+    )
+    # до окна: 1 USD по самому раннему курсу и 10 USD по курсу 1 марта
+    assert [b.balance for b in rub] == [-(1 * 80 + 10 * 80)]
+
+    usd = await get_balance_buckets(
+        db_session, registered_user.id, BucketWidth.day, *window, currency="USD"
+    )
+    assert [b.balance for b in usd] == [-11]
+
+    march_2 = await get_category_expenses(
+        db_session, registered_user.id, datetime(2025, 3, 2), datetime(2025, 3, 2, 23)
+    )
+    assert march_2.total == 10 * 80
+
+
+@pytest.mark.asyncio
+async def test_rollup_is_keyed_by_local_day(
+    db_session, registered_user, expense_category
+):
+    # 22:30 UTC 4 марта — это уже 01:30 5 марта по Москве
+    await expense_crud.create_expense(
+        db_session,
+        ExpenseCreate(
+            expense_date=datetime(2025, 3, 4, 22, 30, tzinfo=timezone.utc),
+            category_id=expense_category.id,
+            cost=100,
+        ),
+        registered_user.id,
+        None,
+        "Europe/Moscow",
+    )
     await db_session.commit()
 
+    days = (await db_session.scalars(select(ExpenseDailyRollup.day))).all()
+    assert days == [date(2025, 3, 5)]
+
+    moscow = ZoneInfo("Europe/Moscow")
     result = await get_category_expenses(
-        db_session, registered_user.id, datetime(2000, 1, 1), datetime(2100, 1, 1)
+        db_session,
+        registered_user.id,
+        datetime(2025, 3, 5, tzinfo=moscow),
+        datetime(2025, 3, 5, 23, 59, 59, tzinfo=moscow),
+        tz="Europe/Moscow",
     )
-    assert len(result) >= 1
-    assert sum(item.amount for item in result) == 600
+    assert result.total == 100
+    assert (
+        await get_spent_on_day(db_session, registered_user.id, date(2025, 3, 5)) == 100
+    )
+    assert await get_spent_on_day(db_session, registered_user.id, date(2025, 3, 4)) == 0
+
+    # после смены пояса rollup пересобирается по новым локальным дням
+    await expense_crud.rebuild_rollup(db_session, registered_user.id, "UTC")
+    await db_session.commit()
+    days = (await db_session.scalars(select(ExpenseDailyRollup.day))).all()
+    assert days == [date(2025, 3, 4)]
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.schemas.stats import PeriodEnum
+from app.service.stats.periods import resolve_window
+
+pytestmark = pytest.mark.unit
+
+UTC_NOW = datetime(2026, 10, 31, 22, 30, tzinfo=timezone.utc)
+
+
+def test_week_aligned_to_monday():
+    window = resolve_window(PeriodEnum.week, "UTC", UTC_NOW)
+    assert window.start == datetime(2026, 10, 26, tzinfo=timezone.utc)
+    assert window.end - window.start == timedelta(weeks=1)
+    assert window.previous_start == datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+
+def test_same_window_for_whole_period():
+    early = resolve_window(
+        PeriodEnum.month, "UTC", datetime(2026, 10, 1, 0, 5, tzinfo=timezone.utc)
+    )
+    late = resolve_window(PeriodEnum.month, "UTC", UTC_NOW)
+    assert early == late
+
+
+def test_user_timezone_moves_month_boundary():
+    # 22:30 UTC 31 октября — это уже 1 ноября в Токио
+    window = resolve_window(PeriodEnum.month, "Asia/Tokyo", UTC_NOW)
+    assert (window.start.month, window.start.day) == (11, 1)
+    assert window.start.utcoffset() == timedelta(hours=9)
+    assert (window.previous_start.month, window.end.month) == (10, 12)
+
+
+def test_year_and_december_rollover():
+    now = datetime(2026, 12, 15, tzinfo=timezone.utc)
+    month = resolve_window(PeriodEnum.month, "UTC", now)
+    assert month.end == datetime(2027, 1, 1, tzinfo=timezone.utc)
+    year = resolve_window(PeriodEnum.year, "UTC", now)
+    assert (year.start.year, year.end.year, year.previous_start.year) == (
+        2026,
+        2027,
+        2025,
+    )
+
+
+def test_day_window_keeps_local_midnight_across_dst():
+    # 29 марта 2026 в Берлине переход на летнее время: сутки длятся 23 часа
+    now = datetime(2026, 3, 29, 12, tzinfo=timezone.utc)
+    window = resolve_window(PeriodEnum.today, "Europe/Berlin", now)
+    assert (window.start.hour, window.end.hour) == (0, 0)
+    assert window.end.astimezone(timezone.utc) - window.start.astimezone(
+        timezone.utc
+    ) == timedelta(hours=23)
+    assert window.last < window.end
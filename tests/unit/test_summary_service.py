@@ -0,0 +1,161 @@
+import pytest
+from datetime import date, datetime, timezone
+from sqlalchemy import select
+
+from app.db import Category, Expense, Income, MonthlySummary
+from app.db.models.category import TypesOfCat
+from app.service.summary import crud as summary_crud
+from app.service.summary.service import SummaryService
+
+pytestmark = pytest.mark.unit
+
+NOW = datetime(2025, 11, 15, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def history(db_session, registered_user):
+    food = Category(
+        title="Еда", type_of_category=TypesOfCat.EXPENSE, user_id=registered_user.id
+    )
+    salary = Category(
+        title="Зарплата",
+        type_of_category=TypesOfCat.INCOME,
+        user_id=registered_user.id,
+    )
+    db_session.add_all([food, salary])
+    await db_session.flush()
+
+    for day, cost in ((datetime(2025, 9, 3), 100), (datetime(2025, 10, 7), 250)):
+        db_session.add(
+            Expense(
+                user_id=registered_user.id,
+                expense_date=day,
+                category_id=food.id,
+                value=cost,
+            )
+        )
+    db_session.add_all(
+        [
+            Income(
+                user_id=registered_user.id,
+                income_date=datetime(2025, 10, 1),
+                category_id=salary.id,
+                value=1000,
+            ),
+            # открытый месяц
+            Expense(
+                user_id=registered_user.id,
+                expense_date=datetime(2025, 11, 10),
+                category_id=food.id,
+                value=40,
+            ),
+        ]
+    )
+    await db_session.commit()
+    return food
+
+
+async def _built_until(db_session, user_id):
+    return await summary_crud.get_built_until(db_session, user_id)
+
+
+@pytest.mark.asyncio
+async def test_refresh_materialises_closed_months(db_session, registered_user, history):
+    service = SummaryService()
+
+    assert await service.refresh(db_session, NOW) == 1
+    assert await _built_until(db_session, registered_user.id) == date(2025, 11, 1)
+
+    rows = (
+        await db_session.execute(
+            select(MonthlySummary.month, MonthlySummary.kind, MonthlySummary.total)
+            .where(MonthlySummary.user_id == registered_user.id)
+            .order_by(MonthlySummary.month, MonthlySummary.kind)
+        )
+    ).all()
+    # открытый ноябрь в итоги не попадает
+    assert [(r.month, r.kind, float(r.total)) for r in rows] == [
+        (date(2025, 9, 1), TypesOfCat.EXPENSE, 100),
+        (date(2025, 10, 1), TypesOfCat.EXPENSE, 250),
+        (date(2025, 10, 1), TypesOfCat.INCOME, 1000),
+    ]
+
+    # повторный проход ничего не пересобирает
+    assert await service.refresh(db_session, NOW) == 0
+
+
+@pytest.mark.asyncio
+async def test_pending_skips_users_built_until_open_month(
+    db_session, registered_user, history
+):
+    await SummaryService().refresh(db_session, NOW)
+
+    # собранный пользователь не выбирается и не блокируется до закрытия месяца
+    assert await summary_crud.get_pending(db_session, NOW, 10) == []
+
+    next_month = datetime(2025, 12, 1, 0, 30, tzinfo=timezone.utc)
+    pending = await summary_crud.get_pending(db_session, next_month, 10)
+    assert [row.user_id for row in pending] == [registered_user.id]
+
+
+@pytest.mark.asyncio
+async def test_monthly_totals_combine_summaries_and_open_month(
+    db_session, registered_user, history
+):
+    service = SummaryService()
+    expected = [
+        (date(2025, 8, 1), 0, 0),
+        (date(2025, 9, 1), 100, 0),
+        (date(2025, 10, 1), 250, 1000),
+        (date(2025, 11, 1), 40, 0),
+    ]
+
+    # до первой сборки всё считается по сырым строкам
+    before = await service.get_monthly_totals(
+        db_session, registered_user.id, "UTC", 4, NOW
+    )
+    await service.refresh(db_session, NOW)
+    after = await service.get_monthly_totals(
+        db_session, registered_user.id, "UTC", 4, NOW
+    )
+
+    for result in (before, after):
+        assert [(m.month, m.expense, m.income) for m in result] == expected
+
+
+@pytest.mark.asyncio
+async def test_backdated_write_invalidates_month(db_session, registered_user, history):
+    service = SummaryService()
+    await service.refresh(db_session, NOW)
+
+    # запись в открытый месяц итоги не трогает
+    await summary_crud.invalidate_from(
+        db_session, registered_user.id, datetime(2025, 11, 12)
+    )
+    assert await _built_until(db_session, registered_user.id) == date(2025, 11, 1)
+
+    db_session.add(
+        Expense(
+            user_id=registered_user.id,
+            expense_date=datetime(2025, 9, 20),
+            category_id=history.id,
+            value=5,
+        )
+    )
+    await summary_crud.invalidate_from(
+        db_session, registered_user.id, datetime(2025, 9, 20)
+    )
+    await db_session.commit()
+    assert await _built_until(db_session, registered_user.id) == date(2025, 9, 1)
+
+    # пока воркер не пересобрал итоги, сентябрь читается из сырых строк
+    totals = await service.get_monthly_totals(
+        db_session, registered_user.id, "UTC", 3, NOW
+    )
+    assert totals[0].expense == 105
+
+    assert await service.refresh(db_session, NOW) == 1
+    totals = await service.get_monthly_totals(
+        db_session, registered_user.id, "UTC", 3, NOW
+    )
+    assert [m.expense for m in totals] == [105, 250, 40]
@@ -1,6 +1,11 @@
+import jwt
 import pytest
+from unittest.mock import patch
+
+from app.core.settings import settings
 from app.service.user.crud import change_user_role, get_all_users
 from app.db.models.user import UserRoles
+from tests.conftest import TestSessionLocal
 
 pytestmark = pytest.mark.unit
 
@@ -20,3 +25,35 @@ async def test_change_user_role(db_session, registered_user):
 async def test_get_all_users(db_session, registered_user, admin_user):
     users = await get_all_users(db_session, skip=0, limit=10)
     assert len(users) >= 2
+
+
+@pytest.mark.asyncio
+async def test_demote_while_request_in_flight(db_session, admin_user):
+    from app.service.auth import crud as auth_crud
+    from app.service.auth.cache import get_principal
+    from app.service.auth.dependencies import get_current_user
+
+    admin_id = admin_user.id
+    token = jwt.encode(
+        {"sub": str(admin_id)}, settings.SECRET_KEY, algorithm=settings.ALGORITHM
+    )
+    load_user = auth_crud.get_user_by_id
+
+    async def load_then_demote(user_id, db):
+        # запрос прочитал админа из БД, и тут же другой запрос снимает роль
+        user = await load_user(user_id, db)
+        await change_user_role(db_session, admin_id, UserRoles.USER)
+        assert await get_principal(admin_id) is None  # до commit кеш не тронут
+        await db_session.commit()
+        return user
+
+    async with TestSessionLocal() as db:
+        with patch("app.service.auth.crud.get_user_by_id", load_then_demote):
+            in_flight = await get_current_user(db=db, token=token)
+    assert in_flight.role == UserRoles.ADMIN
+
+    # запоздавший запрос не вернул в кеш старую роль
+    assert await get_principal(admin_id) is None
+    async with TestSessionLocal() as db:
+        principal = await get_current_user(db=db, token=token)
+    assert principal.role == UserRoles.USER